@@ -1,9 +1,12 @@
+import uuid
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException
 
 from app.schemas.user import UserRead
+from app.auth.token_cache import token_claims_cache
+from app.auth.revocation import revocation_list
 
 # ---------------- JWT Configuration (for testing only) ---------------------------->
 
@@ -19,14 +22,17 @@ REFRESH_TOKEN_EXPIRE_MINUTES = 60 * 24 * 30  # 30 days
 
 # Help to extract the headers
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
+# Same, but lets requests without a token through (routes that don't need a login)
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login", auto_error=False)
 
 # ------------------------ Get Current Token ------------------------>
 
-def get_current_token(token: str = Depends(oauth2_scheme)):
+# Async so a cached token is checked on the event loop instead of a threadpool hop
+async def get_current_token(token: str = Depends(oauth2_scheme)):
     if not token:
         raise HTTPException(status_code=401, detail="Access token missing")
     try:
-        user = verify_access_token(token)
+        user = await verify_access_token(token)
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
     return {
@@ -34,13 +40,25 @@ def get_current_token(token: str = Depends(oauth2_scheme)):
         "data": user
     }
 
+# Username of the caller on routes that don't require a login; None without a valid token
+async def get_optional_username(token: str = Depends(optional_oauth2_scheme)):
+    if not token:
+        return None
+    try:
+        user = await verify_access_token(token)
+    except Exception:
+        return None
+    return user.username
+
 # ------------------------- Access Token ---------------------------->
 
 # Generate access token
 def create_access_token(data: UserRead) -> dict:
     to_encode = data.model_dump()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # jti identifies the token for revocation; iat (with sub-second precision) places it against a user-wide cutoff
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "iat": now.timestamp()})
     encoded_jwt = jwt.encode(to_encode, ACCESS_SECRET_KEY, algorithm=ALGORITHM)
 
     return {
@@ -50,19 +68,36 @@ def create_access_token(data: UserRead) -> dict:
 
 
 # Verify access token
-def verify_access_token(token) -> UserRead:
+# Verified claims are cached until the token's exp; the returned UserRead is shared, so don't mutate it
+async def verify_access_token(token) -> UserRead:
     if token is None:
         raise HTTPException(status_code=401, detail="Access token has expired") 
-    try:
-        payload = jwt.decode(token, ACCESS_SECRET_KEY, algorithms=[ALGORITHM])
-        return UserRead(**payload)
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Your login session has expired. Please login again.") 
+    cached = token_claims_cache.get(token)
+    if cached is None:
+        try:
+            payload = jwt.decode(token, ACCESS_SECRET_KEY, algorithms=[ALGORITHM])
+            user = UserRead(**payload)
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Your login session has expired. Please login again.") 
+        cached = (user, payload.get("jti"), payload.get("iat"))
+        token_claims_cache.set(token, cached, payload.get("exp", 0), user.username)
+    user, jti, iat = cached
+    # Checked on every request, cached or not: another worker may have revoked the token or the user
+    if await revocation_list.is_revoked(jti) or await revocation_list.is_user_revoked(user.username, iat):
+        raise HTTPException(status_code=401, detail="Your login session has ended. Please login again.")
+    return user
+
+# Forced logout: stop accepting cached claims for one token, or for every token of a user
+def invalidate_cached_token(token: str) -> bool:
+    return token_claims_cache.invalidate(token)
+
+def invalidate_cached_user(username: str) -> int:
+    return token_claims_cache.invalidate_user(username)
     
 
 # Renew access token
-def renew_access_token(token: str) -> dict:
-    data = verify_refresh_token(token)
+async def renew_access_token(token: str) -> dict:
+    data = await verify_refresh_token(token)
     returned_data = create_access_token(data)
     return returned_data
     
@@ -71,8 +106,9 @@ def renew_access_token(token: str) -> dict:
 # Create access token
 def create_refresh_token(data: UserRead) -> dict:
     to_encode = data.model_dump()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "iat": now.timestamp()})
     encoded_jwt = jwt.encode(to_encode, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
 
     return {
@@ -81,10 +117,38 @@ def create_refresh_token(data: UserRead) -> dict:
     }
 
 # Verify refresh token
-def verify_refresh_token(token: str) -> UserRead:
+async def verify_refresh_token(token: str) -> UserRead:
     try:
         payload = jwt.decode(token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
-        return UserRead(**payload)
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid credentials") 
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if await revocation_list.is_revoked(payload.get("jti")) or \
+            await revocation_list.is_user_revoked(payload.get("username", ""), payload.get("iat")):
+        raise HTTPException(status_code=401, detail="Your login session has ended. Please login again.")
+    return UserRead(**payload)
+
+# ------------------------- Revocation --------------------------->
+
+# Revoke a token until its exp; invalid or already expired tokens need no revoking
+async def revoke_token(token: str, secret_key: str) -> bool:
+    try:
+        payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    if secret_key == ACCESS_SECRET_KEY:
+        invalidate_cached_token(token)
+    return await revocation_list.revoke(payload.get("jti"), payload.get("exp", 0), payload.get("username", ""))
+
+# Log a user out everywhere (account deleted, role or status changed): every token issued so far stops working
+async def revoke_user_tokens(username: str) -> None:
+    until = datetime.now(timezone.utc) + timedelta(minutes=max(ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES))
+    await revocation_list.revoke_user(username, until.timestamp())
+    invalidate_cached_user(username)
+
+# End a session: revoke whichever of its access and refresh tokens were sent
+async def revoke_session(access_token: str = None, refresh_token: str = None) -> dict:
+    return {
+        "access_token_revoked": bool(access_token) and await revoke_token(access_token, ACCESS_SECRET_KEY),
+        "refresh_token_revoked": bool(refresh_token) and await revoke_token(refresh_token, REFRESH_SECRET_KEY),
+    } 
 
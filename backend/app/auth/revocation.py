@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import math
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+import os
+
+from app import database
+from app.models.revoked_token import RevokedToken
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Revocation list for access and refresh tokens.
+    Every token carries a `jti` claim. Revoking a token stores its jti in the
+    `revoked_tokens` collection until the token's exp, and a TTL index
+    removes the record afterwards.
+
+    A whole user can be logged out too (account deleted, role changed): a
+    "user:<username>" record holds a cutoff, and every token of that user
+    issued (`iat`) before it is revoked. It lives in the same collection and
+    filter as single tokens, so checking it costs another filter probe.
+
+    Checking MongoDB on every request would cost a round trip, so each
+    process keeps a Bloom filter of revoked jtis:
+        - filter miss  -> definitely not revoked (nearly every request, ~1-2 us)
+        - filter hit   -> exact lookup in MongoDB (revoked tokens and rare false positives)
+    The filter is refreshed incrementally in the background: only records
+    revoked since the last refresh are read, so revocations made by other
+    workers are seen within REVOCATION_REFRESH_SECONDS. revoked_at comes
+    from the revoking worker's clock and a write can land after a newer
+    one, so each refresh reads back REVOCATION_REFRESH_MARGIN_SECONDS
+    before the newest record it has seen. Bloom filters can't
+    forget, so the filter is periodically rebuilt from the records that have
+    not expired yet.
+
+    Environment:
+        - REVOCATION_BLOOM_CAPACITY     Revoked tokens the filter holds at the target error rate
+        - REVOCATION_BLOOM_ERROR_RATE   False-positive rate at capacity
+        - REVOCATION_REFRESH_SECONDS    How often new revocations are pulled from MongoDB
+        - REVOCATION_REFRESH_MARGIN_SECONDS  How far back each refresh re-reads (more than clock skew plus write latency)
+        - REVOCATION_REBUILD_SECONDS    How often the filter is rebuilt to drop expired entries
+'''
+
+# ------------------------ Configuration ------------------------>
+
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+REVOCATION_REFRESH_MARGIN_SECONDS = float(os.getenv("REVOCATION_REFRESH_MARGIN_SECONDS", "60"))
+REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", "3600"))
+
+def _user_key(username: str) -> str:
+    return f"user:{username}"
+
+def _utc(exp) -> datetime:
+    """Naive UTC datetime (as stored by MongoDB) from a JWT timestamp (exp, iat)."""
+    return datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None)
+
+def unexpired_query(since=None) -> tuple:
+    """(filter, sort) for unexpired records, oldest revocation first; with `since`, only those revoked from a margin before it."""
+    query = {"expires_at": {"$gt": datetime.utcnow()}}
+    if since is not None:
+        query["revoked_at"] = {"$gte": since - timedelta(seconds=REVOCATION_REFRESH_MARGIN_SECONDS)}
+    return query, [("revoked_at", 1)]
+
+# ------------------------ Bloom filter ------------------------>
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for `capacity` items at `error_rate`."""
+
+    def __init__(self, capacity: int = REVOCATION_BLOOM_CAPACITY, error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        # Inlined rather than using _positions: a miss usually stops at the first or second probe
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits, size = self._bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+# ------------------------ Revocation list ------------------------>
+
+class RevocationList:
+    def __init__(self, capacity: int = REVOCATION_BLOOM_CAPACITY, error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        self._watermark = None  # revoked_at of the newest record seen
+        self._task = None
+        self.checks = 0
+        self.filter_hits = 0
+        self.false_positives = 0
+        self.revoked = 0
+
+    # ------------------------ Check ------------------------>
+
+    async def is_revoked(self, jti) -> bool:
+        """Whether a token has been revoked. Tokens without a jti (issued before revocation existed) never are."""
+        if not jti:
+            return False
+        self.checks += 1
+        if jti not in self._filter:
+            return False
+        self.filter_hits += 1
+        if await database.exists(RevokedToken, {"jti": jti}):
+            return True
+        self.false_positives += 1
+        return False
+
+    async def is_user_revoked(self, username: str, iat) -> bool:
+        """Whether a user's tokens issued at `iat` were revoked. Tokens without an `iat` predate any cutoff."""
+        key = _user_key(username)
+        if key not in self._filter:
+            return False
+        self.filter_hits += 1
+        record = await database.collection(RevokedToken).find_one({"jti": key}, {"issued_before": 1})
+        if record and (iat is None or _utc(iat) < record["issued_before"]):
+            return True
+        if not record:
+            self.false_positives += 1
+        return False
+
+    # ------------------------ Revoke ------------------------>
+
+    async def revoke(self, jti, exp, username: str = "") -> bool:
+        """Revoke one token until its exp. Returns False for tokens without a jti or already expired."""
+        if not jti or exp <= datetime.now(timezone.utc).timestamp():
+            return False
+        await database.collection(RevokedToken).update_one(
+            {"jti": jti},
+            {"$setOnInsert": {"username": username, "expires_at": _utc(exp), "revoked_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        self._filter.add(jti)
+        self.revoked += 1
+        return True
+
+    async def revoke_user(self, username: str, until) -> None:
+        """Revoke every token of a user issued until now. `until` is the latest exp any of them can have."""
+        now = datetime.utcnow()
+        await database.collection(RevokedToken).update_one(
+            {"jti": _user_key(username)},
+            # $set, not $setOnInsert: a later cutoff replaces an earlier one, and other workers re-read it
+            {"$set": {"username": username, "issued_before": now, "expires_at": _utc(until), "revoked_at": now}},
+            upsert=True,
+        )
+        self._filter.add(_user_key(username))
+        self.revoked += 1
+
+    # ------------------------ Refresh ------------------------>
+
+    def _unexpired(self, since=None):
+        query, sort = unexpired_query(since)
+        return database.collection(RevokedToken).find(query, {"jti": 1, "revoked_at": 1}, sort=sort)
+
+    async def refresh(self) -> int:
+        """Add records revoked since the last refresh (by any worker). Returns how many were new."""
+        added = 0
+        async for record in self._unexpired(self._watermark):
+            # Records inside the margin were read last time too; adding them again would inflate the count
+            if record["jti"] not in self._filter:
+                self._filter.add(record["jti"])
+                added += 1
+            self._watermark = record["revoked_at"]
+        return added
+
+    async def rebuild(self) -> int:
+        """Replace the filter with one holding only unexpired records, dropping the expired ones."""
+        fresh = BloomFilter(self.capacity, self.error_rate)
+        watermark = None
+        async for record in self._unexpired():
+            fresh.add(record["jti"])
+            watermark = record["revoked_at"]
+        self._filter = fresh
+        self._watermark = watermark
+        return fresh.count
+
+    async def _refresh_forever(self):
+        loop = asyncio.get_running_loop()
+        last_rebuild = loop.time()
+        while True:
+            await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+            try:
+                # Rebuild early if the filter is over capacity and its error rate has climbed
+                if loop.time() - last_rebuild >= REVOCATION_REBUILD_SECONDS or self._filter.count > self.capacity:
+                    await self.rebuild()
+                    last_rebuild = loop.time()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                print(f"Revocation list refresh failed: {e}")
+
+    # ------------------------ Lifecycle ------------------------>
+
+    async def start(self):
+        """Load the current revocations and start background refreshes. Called from the app lifespan."""
+        try:
+            await self.rebuild()
+        except Exception as e:
+            # Don't block start-up on it; the background refresh retries
+            print(f"Revocation list load failed: {e}")
+        self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "filter_items": self._filter.count,
+            "filter_bits": self._filter.size,
+            "filter_hashes": self._filter.hashes,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+            "revoked": self.revoked,
+        }
+
+# Shared by verify_access_token / verify_refresh_token and the logout endpoint
+revocation_list = RevocationList()
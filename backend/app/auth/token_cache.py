@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Cache of verified access-token claims.
+    The same bearer token arrives on every request of a session, so the
+    HMAC check, JSON parsing and UserRead validation are done once per token
+    and the result is kept until the token's own `exp`.
+
+    Entries are keyed by the SHA-256 digest of the token, so raw tokens are
+    not kept in memory. Anything that ends a session early (logout,
+    revocation, a deleted account) must call `invalidate` or
+    `invalidate_user`, or the cached claims keep being accepted.
+
+    Environment:
+        - TOKEN_CACHE_MAX_ENTRIES   Tokens kept before the least recently used is evicted (0 disables the cache)
+'''
+
+# ------------------------------------------------------------->
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+class TokenClaimsCache:
+    """Bounded LRU map of token digest -> (exp, claims), dropped once `exp` passes."""
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES, clock=time.time):
+        self.max_entries = max_entries
+        self._clock = clock  # Wall clock: `exp` is a UNIX timestamp
+        self._entries = OrderedDict()  # digest -> (exp, username, claims)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, token: str):
+        """Cached claims for a still-valid token, or None."""
+        digest = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            exp, _, claims = entry
+            if exp <= self._clock():
+                del self._entries[digest]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def set(self, token: str, claims, exp: float, username: str = "") -> None:
+        if self.max_entries <= 0 or exp <= self._clock():
+            return
+        digest = token_digest(token)
+        with self._lock:
+            self._entries[digest] = (exp, username, claims)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, token: str) -> bool:
+        """Forget one token, e.g. on logout. Returns whether it was cached."""
+        with self._lock:
+            removed = self._entries.pop(token_digest(token), None) is not None
+            self.invalidations += removed
+            return removed
+
+    def invalidate_user(self, username: str) -> int:
+        """Forget every cached token of a user (forced logout) and return how many were removed."""
+        with self._lock:
+            digests = [digest for digest, (_, owner, _) in self._entries.items() if owner == username]
+            for digest in digests:
+                del self._entries[digest]
+            self.invalidations += len(digests)
+            return len(digests)
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self.invalidations += removed
+            return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+# Shared by get_current_token / verify_access_token
+token_claims_cache = TokenClaimsCache()
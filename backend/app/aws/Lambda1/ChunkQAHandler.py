@@ -168,7 +168,8 @@ def generate_qa_pairs_from_text_groq(
     text,
     model="meta-llama/llama-4-scout-17b-16e-instruct",
     num_pairs=25,
-    api_key=None
+    api_key=None,
+    llm_complete=None
 ):
     if api_key is None:
         api_key = os.environ.get("GROQ_API_KEY")
@@ -176,17 +177,21 @@ def generate_qa_pairs_from_text_groq(
     if len(text) > max_chars:
         text = text[:max_chars] + "..."
     prompt = f"""Create {num_pairs} question-answer pairs from this text. Return only a JSON array like this:\n[\n  {{\"question\": \"What is the main topic?\", \"answer\": \"The main topic is...\"}},\n  {{\"question\": \"What are the key points?\", \"answer\": \"The key points are...\"}}\n]\n\nText: {text}"""
-    client = Groq(api_key=api_key)
-    completion = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-        max_completion_tokens=1024,
-        top_p=1,
-        stream=False,
-        stop=None,
-    )
-    response_text = completion.choices[0].message.content
+    if llm_complete is not None:
+        # The backend passes a callable backed by its LLM router (`app.services.llm_router`, route "qa")
+        response_text = llm_complete(prompt)
+    else:
+        client = Groq(api_key=api_key)
+        completion = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_completion_tokens=1024,
+            top_p=1,
+            stream=False,
+            stop=None,
+        )
+        response_text = completion.choices[0].message.content
     qa_pairs = extract_json_array(response_text)
     if qa_pairs:
         return qa_pairs
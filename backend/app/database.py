@@ -1,23 +1,118 @@
-from mongoengine import connect, disconnect
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.uri_parser import parse_uri
 from dotenv import load_dotenv
 import os
 
 # Load environment variables
 load_dotenv()
 
+# ------------------------------------------------------------->
+
+'''
+    Async MongoDB access for the request path.
+    One motor client (and its connection pool) is opened in the FastAPI
+    lifespan and shared by every request, so database calls no longer block
+    the event loop.
+
+    The mongoengine Documents in app/models stay the schema: documents are
+    validated and serialised with `to_mongo()` and read back with
+    `_from_son()`, so services keep working with the same model objects.
+
+    Environment:
+        - MONGODB_URI                           Connection string; its database is used (default lazydb)
+        - MONGODB_MAX_POOL_SIZE                 Connections per server in the pool
+        - MONGODB_MIN_POOL_SIZE                 Connections kept open while idle
+        - MONGODB_MAX_IDLE_TIME_MS              How long an idle pooled connection is kept
+        - MONGODB_SERVER_SELECTION_TIMEOUT_MS   How long a call waits for a reachable server
+'''
+
+# ------------------------ Configuration ------------------------>
+
 # MongoDB connection
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/lazydb")
+MONGODB_DATABASE = parse_uri(MONGODB_URI)["database"] or "lazydb"
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
 
-def connect_db():
-    try:
-        connect(host=MONGODB_URI, alias="default")
-        print("MongoDB connected.")
-    except Exception as e:
-        print(f"MongoDB connection error: {e}")
+# Module-level private variables for singleton pattern
+_client = None
+_db = None
 
-def disconnect_db():
-    try:
-        disconnect(alias="default")
+# ------------------------ Lifecycle ------------------------>
+
+async def init_db(client=None):
+    """Open the shared client. Called once from the app lifespan; `client` lets benchmarks pass a stand-in."""
+    global _client, _db
+    if _db is not None:
+        return _db
+    _client = client or AsyncIOMotorClient(
+        MONGODB_URI,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    )
+    _db = _client[MONGODB_DATABASE]
+    print("MongoDB connected.")
+    return _db
+
+async def close_db():
+    global _client, _db
+    if _client is not None:
+        _client.close()
         print("MongoDB disconnected.")
-    except Exception as e:
-        print(f"MongoDB disconnection error: {e}")
+    _client = None
+    _db = None
+
+def get_db():
+    if _db is None:
+        raise RuntimeError("MongoDB is not connected; call init_db() first")
+    return _db
+
+# ------------------------ Documents ------------------------>
+
+def collection(model):
+    """Motor collection backing a mongoengine Document class."""
+    return get_db()[model._get_collection_name()]
+
+def object_id(value):
+    """ObjectId from a path parameter, or None when it is not a valid id (treated as not found)."""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+async def find_one(model, query: dict, projection=None):
+    raw = await collection(model).find_one(query, projection)
+    return model._from_son(raw) if raw is not None else None
+
+async def find(model, query: dict, projection=None, sort=None, limit: int = 0) -> list:
+    cursor = collection(model).find(query, projection, sort=sort, limit=limit)
+    return [model._from_son(raw) async for raw in cursor]
+
+async def exists(model, query: dict) -> bool:
+    return await collection(model).find_one(query, {"_id": 1}) is not None
+
+async def insert(document):
+    """Validate and insert a new document; its `id` is set from the database."""
+    document.validate()
+    son = document.to_mongo()
+    result = await collection(type(document)).insert_one(son)
+    document.id = result.inserted_id
+    return document
+
+async def save(document):
+    """Validate and write back every field of a loaded document (insert if it has no id yet)."""
+    if document.id is None:
+        return await insert(document)
+    document.validate()
+    await collection(type(document)).replace_one({"_id": document.id}, document.to_mongo())
+    return document
+
+async def delete(document) -> bool:
+    result = await collection(type(document)).delete_one({"_id": document.id})
+    return result.deleted_count == 1
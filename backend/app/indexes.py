@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from bson import ObjectId
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+from dotenv import load_dotenv
+import os
+
+from app import database
+from app.models.user import User
+from app.models.file_uploaded import FileUploaded
+from app.models.blob import Blob
+from app.models.upload_session import UploadSession
+from app.models.ingestion_job import IngestionJob
+from app.models.qa_pair import QAPair
+from app.models.chat_history import ChatHistory
+from app.models.revoked_token import RevokedToken
+from app.models.units import Unit
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Index management.
+    Indexes are declared on the models themselves, the mongoengine way:
+    `unique=True` on a field, or `meta['indexes']` for the rest (compound,
+    descending, TTL). This module turns those declarations into MongoDB
+    indexes and checks that the queries the services run actually use them.
+
+        - sync    create every declared index that is missing (startup and CLI);
+                  --drop-extra also drops indexes no model declares
+        - check   run explain() on each query in service_queries() and fail if
+                  any of them would scan the whole collection
+
+    When a service gets a new query, add it to service_queries(), built
+    with the same helper the service uses. tests/test_indexes.py runs the
+    check against MONGODB_URI.
+
+    Usage (from backend/, against MONGODB_URI):
+        python -m app.indexes sync [--drop-extra]
+        python -m app.indexes check
+
+    Environment:
+        - MONGODB_SYNC_INDEXES    Sync indexes in the app lifespan (default true)
+'''
+
+# ------------------------ Configuration ------------------------>
+
+MONGODB_SYNC_INDEXES = os.getenv("MONGODB_SYNC_INDEXES", "true").lower() in ("1", "true", "yes")
+
+# Every model the API reads or writes
+MODELS = [User, FileUploaded, Blob, UploadSession, IngestionJob, QAPair, ChatHistory, RevokedToken, Unit]
+
+# (description, model, filter, sort) for each query the services run, with placeholder values.
+# Queries with operators or a sort come from the helpers the services build them with, so they
+# can't drift apart; plain equality lookups are spelled out. Imported here, not at the top, so
+# syncing indexes at startup doesn't depend on the services.
+def service_queries() -> list:
+    from app.auth.revocation import unexpired_query
+    from app.services.chat_history import history_query
+    from app.services.ingestion import claimable_query, held_jobs_query, attempt_pairs_query
+    from app.services.unit_catalog import changed_units_query
+    from app.services.upload_session import abandoned_sessions_query
+    from app.services.user import roster_taken_query
+
+    now = datetime.utcnow()
+    return [
+        ("register: email taken", User, {"email": "student@example.com"}, None),
+        ("register / login: by username", User, {"username": "student"}, None),
+        ("roster import: usernames or emails taken", User, *roster_taken_query(["student"], ["student@example.com"])),
+        ("get / update / delete user by id", User, {"_id": ObjectId()}, None),
+        ("upload: file name taken", FileUploaded, {"file_name": "notes.pdf"}, None),
+        ("get / delete file by id", FileUploaded, {"_id": ObjectId()}, None),
+        ("upload / delete: blob by digest", Blob, {"sha256": "0" * 64}, None),
+        ("resumable upload: session by id", UploadSession, {"_id": ObjectId(), "owner": "student"}, None),
+        ("resumable upload: abandoned sessions", UploadSession, *abandoned_sessions_query(now)),
+        ("ingestion: job by digest", IngestionJob, {"sha256": "0" * 64}, None),
+        ("ingestion: claim a job", IngestionJob, *claimable_query(now)),
+        ("ingestion: requeue on shutdown", IngestionJob, *held_jobs_query("host:1:worker")),
+        ("ingestion: pairs of an attempt", QAPair, *attempt_pairs_query("0" * 64, "attempt")),
+        ("ingestion: pairs of other attempts", QAPair, *attempt_pairs_query("0" * 64, "attempt", other=True)),
+        ("token check / revoke: by jti", RevokedToken, {"jti": "0" * 32}, None),
+        ("revocation refresh", RevokedToken, *unexpired_query(now)),
+        ("chat history: first page", ChatHistory, *history_query("student")),
+        ("chat history: next page", ChatHistory, *history_query("student", after=(now, ObjectId()))),
+        ("chat history: one unit", ChatHistory, *history_query("student", unit_name="FIT1008")),
+        ("chat history: date range", ChatHistory, *history_query("student", since=datetime(2024, 1, 1), until=now)),
+        ("unit catalog refresh", Unit, *changed_units_query(now)),
+    ]
+
+# ------------------------ Declared indexes ------------------------>
+
+def declared_indexes(model) -> list:
+    """IndexModels for the indexes `model` declares (mongoengine's index_specs)."""
+    return [
+        IndexModel(spec["fields"], **{key: value for key, value in spec.items() if key != "fields"})
+        for spec in model._meta.get("index_specs") or []
+    ]
+
+# ------------------------ Sync ------------------------>
+
+async def sync_model(model, drop_extra: bool = False) -> dict:
+    collection = database.collection(model)
+    wanted = declared_indexes(model)
+    existing = await collection.index_information()
+    missing = [index for index in wanted if index.document["name"] not in existing]
+
+    created = await collection.create_indexes(missing) if missing else []
+    dropped = []
+    if drop_extra:
+        names = {index.document["name"] for index in wanted}
+        for name in existing:
+            if name != "_id_" and name not in names:
+                await collection.drop_index(name)
+                dropped.append(name)
+    return {"created": created, "dropped": dropped}
+
+async def sync_indexes(drop_extra: bool = False) -> dict:
+    """
+    Create the declared indexes of every model. Returns {collection: {created, dropped} or {error}}.
+    An index that exists with other options (e.g. a non-unique username index) is reported, not replaced.
+    """
+    report = {}
+    try:
+        for model in MODELS:
+            name = model._get_collection_name()
+            try:
+                report[name] = await sync_model(model, drop_extra)
+            except OperationFailure as e:
+                report[name] = {"error": str(e)}
+                print(f"Index sync failed for {name}: {e}")
+    except PyMongoError as e:
+        # Unreachable server: don't hold up start-up for every model in turn
+        print(f"Index sync skipped: {e}")
+        return report
+    created = sum(len(row.get("created", [])) for row in report.values())
+    print(f"Indexes synced ({created} created).")
+    return report
+
+# ------------------------ Query plans ------------------------>
+
+def _stages(plan) -> list:
+    """Every stage name in an explain() plan tree."""
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _stages(item)]
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if "stage" in plan else []
+    for value in plan.values():
+        if isinstance(value, (dict, list)):
+            stages += _stages(value)
+    return stages
+
+async def explain_query(model, query: dict, sort=None) -> list:
+    """Stages of the winning plan for `query` on `model`'s collection."""
+    cursor = database.collection(model).find(query, sort=sort)
+    explained = await cursor.explain()
+    return _stages(explained["queryPlanner"]["winningPlan"])
+
+async def check_queries() -> list:
+    """(description, stages, ok) per service_queries() entry; not ok when the plan contains a COLLSCAN."""
+    results = []
+    for description, model, query, sort in service_queries():
+        stages = await explain_query(model, query, sort)
+        results.append((description, stages, "COLLSCAN" not in stages))
+    return results
+
+# ------------------------ CLI ------------------------>
+
+async def main(args) -> int:
+    await database.init_db()
+    try:
+        if args.command == "sync":
+            report = await sync_indexes(drop_extra=args.drop_extra)
+            for name, row in report.items():
+                print(f"{name:<16} {row}")
+            return 1 if any("error" in row for row in report.values()) else 0
+
+        results = await check_queries()
+        for description, stages, ok in results:
+            print(f"{'ok  ' if ok else 'SCAN'} {description:<40} {' > '.join(stages)}")
+        failed = [description for description, _, ok in results if not ok]
+        if failed:
+            print(f"{len(failed)} queries are not index-backed; run `python -m app.indexes sync` or add an index to the model.")
+        return 1 if failed else 0
+    finally:
+        await database.close_db()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync declared MongoDB indexes and check that service queries use them")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync_parser = commands.add_parser("sync", help="Create missing declared indexes")
+    sync_parser.add_argument("--drop-extra", action="store_true", help="Also drop indexes that no model declares")
+    commands.add_parser("check", help="explain() every service query and fail on collection scans")
+    sys.exit(asyncio.run(main(parser.parse_args())))
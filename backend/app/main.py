@@ -2,6 +2,7 @@ from fastapi import FastAPI, Request, Response, HTTPException
 from contextlib import asynccontextmanager
 
 from app.middleware.cors import setup_cors
+from app.middleware.metrics import setup_metrics
 
 from app.routers.user_router import router as user_router
 from app.routers.file_router import router as file_router
@@ -9,16 +10,44 @@ from app.routers.ask_router  import router as ask_router
 from app.routers.quiz_router import router as quiz_router
 from app.routers.auth_router import router as auth_router
 from app.routers.mock_chat import router as mock_chat_router
+from app.routers.cache_router import router as cache_router
+from app.routers.metrics_router import router as metrics_router
 
-from app.database import connect_db, disconnect_db  # Updated import
+from app.database import init_db, close_db
+from app.indexes import sync_indexes, MONGODB_SYNC_INDEXES
+from app.services.llm_client import init_llm_client, close_llm_client
+from app.services.llm_router import llm_router
+from app.services.password_hasher import init_password_pool, close_password_pool
+from app.auth.revocation import revocation_list
+from app.services.chat_history import chat_history_writer
+from app.services.unit_catalog import unit_catalog
+from app.services.upload_session import upload_sweeper
+from app.services.ingestion import ingestion_queue
 
-# --------------------------- Database connection ------------------------------->
+# --------------------------- Database / LLM connections ------------------------------->
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    connect_db()
+    await init_db()
+    if MONGODB_SYNC_INDEXES:
+        await sync_indexes()
+    await init_llm_client()
+    await init_password_pool()
+    await revocation_list.start()
+    await chat_history_writer.start()
+    await unit_catalog.start()
+    await upload_sweeper.start()
+    await ingestion_queue.start()
     yield
-    disconnect_db()
+    await ingestion_queue.stop()
+    await upload_sweeper.stop()
+    await unit_catalog.stop()
+    await chat_history_writer.stop()
+    await revocation_list.stop()
+    await close_password_pool()
+    await llm_router.aclose()
+    await close_llm_client()
+    await close_db()
 
 # --------------------------- FastAPI app initialization ------------------------->
 
@@ -29,6 +58,9 @@ app = FastAPI(lifespan=lifespan)
 # CORS middleware
 setup_cors(app)
 
+# Per-route latency / status metrics, served on /metrics
+setup_metrics(app)
+
 # ---------------------- Routers -------------------------->
 
 # Include routers
@@ -38,6 +70,8 @@ app.include_router(user_router)
 app.include_router(file_router)
 app.include_router(auth_router)
 app.include_router(mock_chat_router)
+app.include_router(cache_router)
+app.include_router(metrics_router)
 
 # --------------------------------------------------------->
 
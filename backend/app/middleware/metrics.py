@@ -0,0 +1,45 @@
+import time
+
+from app.services.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, HTTP_REQUESTS
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware recording latency, status and in-flight requests.
+
+    Latency and status are labelled with the matched route template (e.g.
+    /user/{user_id}), never the raw path, so metric cardinality stays bounded;
+    requests that match no route are labelled "unmatched". The router stores
+    the matched route in the shared scope, so the label is read after the
+    request. Streaming responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # The route is only known once routing has run, so in-flight is tracked per method
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            in_flight.dec()
+
+def setup_metrics(app):
+    app.add_middleware(PrometheusMiddleware)
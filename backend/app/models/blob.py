@@ -0,0 +1,11 @@
+from mongoengine import Document, StringField, DateTimeField, IntField
+from datetime import datetime
+
+class Blob(Document):
+    sha256 = StringField(required=True, unique=True)  # Content hash; also names the file on disk
+    file_path = StringField(required=True)
+    size = IntField(required=True)  # Size in bytes
+    refcount = IntField(default=0)  # FileUploaded records pointing at this blob
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {'collection': 'blobs'}
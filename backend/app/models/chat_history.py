@@ -1,15 +1,22 @@
 from mongoengine import Document, StringField, DateTimeField
 from datetime import datetime
 
+# Order of a history page, newest first; the indexes below end with the same keys
+HISTORY_SORT = [("date_created", -1), ("_id", -1)]
+
 class ChatHistory(Document):
     username = StringField(required=True)
     question = StringField(required=True)
     answer = StringField(required=True)
+    unit_name = StringField(default="")
     date_created = DateTimeField(default=datetime.now)
 
-    # meta = {
-    #     'collection': 'chat_history',
-    #     'indexes': [
-    #         {'fields': ['user_id'], 'unique': False}
-    #     ]
-    # }
+    meta = {
+        'collection': 'chat_history',
+        'indexes': [
+            # A student's history, newest first; _id breaks ties between equal dates for keyset pages
+            {'fields': ['username', '-date_created', '-_id']},
+            # The same, filtered to one unit
+            {'fields': ['username', 'unit_name', '-date_created', '-_id']},
+        ]
+    }
@@ -2,12 +2,15 @@ from mongoengine import Document, StringField, DateTimeField, IntField
 
 class FileUploaded(Document):
     # file_id = StringField(primary_key=True)  # Unique identifier for the file
-    file_name = StringField(required=True)
+    file_name = StringField(required=True, unique=True)  # Also what makes the duplicate check on upload atomic
     file_path = StringField(required=True)
     upload_date = DateTimeField(required=True)
     size = IntField(required=True)  # Size in bytes
+    sha256 = StringField()  # Hex digest of the content, computed while it was stored
     username = StringField(required=True)  # Reference to the user who uploaded the file
 
-    meta = {'collection': 'file_uploaded'}
+    meta = {
+        'collection': 'file_uploaded',
+    }
 
 
@@ -0,0 +1,29 @@
+from mongoengine import Document, StringField, DateTimeField, IntField
+from datetime import datetime
+
+class IngestionJob(Document):
+    sha256 = StringField(required=True, unique=True)  # One job per content, however many files share it
+    file_path = StringField(required=True)
+    file_name = StringField(required=True)  # Name of the first upload; also the QA pairs' source for a PDF
+    status = StringField(default="queued", choices=("queued", "running", "done", "failed"))
+    stage = StringField(default="")  # extract, redact, chunk or qa while running
+    chunks_total = IntField(default=0)
+    chunks_done = IntField(default=0)
+    qa_pairs = IntField(default=0)
+    attempts = IntField(default=0)
+    attempt = StringField()  # Id of the latest claim; its QA pairs are the ones kept
+    error = StringField()  # Why the last attempt failed
+    worker = StringField()  # Process holding the job while it runs
+    lease_expires_at = DateTimeField()  # A running job whose lease lapsed (worker died) is picked up again
+    available_at = DateTimeField(default=datetime.utcnow)  # Not picked up before this; pushed back between retries
+    created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'ingestion_jobs',
+        'indexes': [
+            {'fields': ['status', 'available_at']},  # Next queued job
+            {'fields': ['status', 'lease_expires_at']},  # Jobs abandoned by a dead worker
+            {'fields': ['worker', 'status']},  # Jobs handed back on shutdown
+        ]
+    }
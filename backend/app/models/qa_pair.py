@@ -0,0 +1,18 @@
+from mongoengine import Document, StringField, DateTimeField, IntField
+from datetime import datetime
+
+class QAPair(Document):
+    sha256 = StringField(required=True)  # Content it was generated from (see IngestionJob)
+    source_file = StringField(required=True)  # PDF name; for a ZIP, the PDF inside it
+    chunk_index = IntField(required=True)
+    question = StringField(required=True)
+    answer = StringField(required=True)
+    attempt = StringField()  # IngestionJob.attempt of the run that wrote it; the job's current one is the file's
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'qa_pairs',
+        'indexes': [
+            {'fields': ['sha256', 'chunk_index']},
+        ]
+    }
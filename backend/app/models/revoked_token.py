@@ -0,0 +1,18 @@
+from mongoengine import Document, StringField, DateTimeField
+from datetime import datetime
+
+class RevokedToken(Document):
+    jti = StringField(required=True, unique=True)  # `jti` claim of the revoked access or refresh token, or "user:<username>"
+    username = StringField()
+    issued_before = DateTimeField()  # On a "user:" record: every token of the user issued before this is revoked
+    expires_at = DateTimeField(required=True)  # The token's own exp; after that the record is useless
+    revoked_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'revoked_tokens',
+        'indexes': [
+            # MongoDB's TTL monitor deletes records once the token would have expired anyway
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0},
+            {'fields': ['revoked_at']},
+        ]
+    }
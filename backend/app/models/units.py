@@ -1,8 +1,20 @@
 from mongoengine import Document, StringField, ListField, DateTimeField
+from datetime import datetime
 
 class Unit(Document):   
     unit_name = StringField(required=True)
     unit_description = StringField(required=True)
     total_students: int = 0
     year = StringField(required=True)
-    semester = StringField(required=True)
\ No newline at end of file
+    semester = StringField(required=True)
+    last_modified = DateTimeField(default=datetime.utcnow)  # Watermark for the unit catalog's incremental refresh
+
+    meta = {
+        'indexes': [
+            {'fields': ['last_modified']},
+        ]
+    }
+
+    # Called by validate(), so every save moves the record past the catalog's watermark
+    def clean(self):
+        self.last_modified = datetime.utcnow()
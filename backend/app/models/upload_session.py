@@ -0,0 +1,22 @@
+from mongoengine import Document, StringField, DateTimeField, IntField, ListField
+from datetime import datetime
+
+class UploadSession(Document):
+    file_name = StringField(required=True)
+    username = StringField(required=True)  # Recorded on the FileUploaded once complete
+    owner = StringField(required=True)  # Account that started the upload; only it can send parts
+    size = IntField(required=True)  # Declared size in bytes; the partial file is preallocated to it
+    part_size = IntField(required=True)  # Every part but the last is exactly this long
+    parts = ListField(IntField())  # Part numbers fully written so far
+    writers = IntField(default=0)  # Parts being written right now; the upload can't be completed while any are
+    status = StringField(default="open", choices=("open", "completing"))
+    file_path = StringField(required=True)  # Partial file the parts are written into
+    created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)  # Last part received; abandoned sessions expire from here
+
+    meta = {
+        'collection': 'upload_sessions',
+        'indexes': [
+            {'fields': ['updated_at']},  # Garbage collection of abandoned sessions
+        ]
+    }
@@ -1,25 +1,49 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.hint_service import generate_hint
+from app.services.hint_service import generate_hint, stream_hint
 from app.services.ai_service import generate_hint_and_quiz
+from app.services.chat_history import chat_history_writer
+from app.auth.jwt_handler import get_optional_username
+from app.utils.sse import SSE_HEADERS, format_sse
 
 router = APIRouter()
 
 class QuestionRequest(BaseModel):
     question: str
+    unit_name: str = ""  # Scopes cached hints so they can be invalidated per unit
+
+# Relay the hint as SSE `token` frames, then a `done` frame with the full hint, approach and quiz
+async def _sse_events(question_text: str, unit_name: str, use_cache: bool, username: str):
+    try:
+        parts = []
+        async for text in stream_hint(question_text, unit_name, use_cache=use_cache):
+            parts.append(text)
+            yield format_sse("token", {"text": text})
+        hint = "".join(parts)
+        _, suggested_approach, quiz = generate_hint_and_quiz(question_text)
+        chat_history_writer.record(username, question_text, hint, unit_name)
+        yield format_sse("done", {"hint": hint, "suggested_approach": suggested_approach, "quiz": quiz})
+    except Exception as e:
+        yield format_sse("error", {"detail": str(e)})
 
 @router.post("/ask")
-async def ask_question(request: QuestionRequest):
+async def ask_question(request: QuestionRequest, stream: bool = False, no_cache: bool = False, username: str = Depends(get_optional_username)):
     try:
         # Strip whitespace and validate the question
         question_text = request.question.strip()
         if not question_text:
             raise HTTPException(status_code=400, detail="Question cannot be empty.")
+
+        if stream:
+            return StreamingResponse(_sse_events(question_text, request.unit_name, not no_cache, username), media_type="text/event-stream", headers=SSE_HEADERS)
         
         # Generate hint and quiz
-        hint = generate_hint(question_text)
+        hint = await generate_hint(question_text, request.unit_name, use_cache=not no_cache)
         _, suggested_approach, quiz = generate_hint_and_quiz(question_text)
-        
+        # Buffered and written in the background; the response doesn't wait for it
+        chat_history_writer.record(username, question_text, hint, request.unit_name)
+
         return {"hint": hint, "suggested_approach": suggested_approach, "quiz": quiz}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -19,7 +19,7 @@ async def refresh_token(request: Request):
     token = request.headers.get("x-refresh-token")
     if not token:
         raise HTTPException(status_code=404, detail="Please login again.")
-    returned_data = renew_access_token(token)
+    returned_data = await renew_access_token(token)
     # return {
     #     "accessToken": returned_data['access_token'],
     #     "refreshToken": token
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, status
+
+from app.services.response_cache import response_cache
+from app.services.semantic_cache import semantic_cache
+from app.services.single_flight import llm_flights
+from app.auth.jwt_handler import get_current_token
+from app.auth.token_cache import token_claims_cache
+from app.services.user_cache import user_cache
+from app.services.unit_catalog import unit_catalog
+
+# ----------------------- Router -------------------------------->
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+# --------------------------- Read --------------------------------->
+
+@router.get("/stats", status_code=status.HTTP_200_OK)
+async def get_cache_stats_endpoint(token: dict = Depends(get_current_token)):
+    return {
+        "response_cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "single_flight": llm_flights.stats(),
+        "token_cache": token_claims_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "unit_catalog": unit_catalog.stats(),
+    }
+
+# --------------------------- Delete --------------------------------->
+
+# Invalidate every cached chat answer and hint for one unit
+@router.delete("/units/{unit_name}", status_code=status.HTTP_200_OK)
+async def invalidate_unit_cache_endpoint(unit_name: str, token: dict = Depends(get_current_token)):
+    removed = response_cache.invalidate_unit(unit_name) + semantic_cache.invalidate_unit(unit_name)
+    return {"unit_name": unit_name, "removed": removed}
+
+@router.delete("", status_code=status.HTTP_200_OK)
+async def clear_cache_endpoint(token: dict = Depends(get_current_token)):
+    removed = response_cache.clear() + semantic_cache.clear()
+    return {"removed": removed}
@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, Request
 
 from app.schemas.file_uploaded import File
+from app.schemas.upload_session import UploadStart, UploadStatus
+from app.schemas.ingestion import IngestionStatus
 from app.services.file_uploaded import *
+from app.services.upload_session import start_upload, write_part, complete_upload, abort_upload, get_upload_session, upload_status
+from app.services.ingestion import ingestion_status
 
 from app.auth.jwt_handler import get_current_token
 
@@ -23,22 +27,73 @@ async def create_file_uploaded_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
+# --------------------------- Resumable upload --------------------------------->
+
+# Start | Returns the upload id and part size; preallocates the file
+@router.post("/uploads", status_code=status.HTTP_201_CREATED, response_model=UploadStatus)
+async def start_upload_endpoint(upload_in: UploadStart, username: str, token: dict = Depends(get_current_token)):
+    session = await start_upload(upload_in.file_name, upload_in.size, username, token["data"].username)
+    return upload_status(session)
+
+# Part | Raw bytes of part n in the request body; parts may be sent in any order, in parallel, and again
+@router.put("/uploads/{upload_id}/parts/{part_number}", response_model=UploadStatus)
+async def upload_part_endpoint(upload_id: str, part_number: int, request: Request, token: dict = Depends(get_current_token)):
+    session = await write_part(upload_id, token["data"].username, part_number, request.stream())
+    return upload_status(session)
+
+# Status | Which parts have arrived, to resume after a dropped connection
+@router.get("/uploads/{upload_id}", response_model=UploadStatus)
+async def upload_status_endpoint(upload_id: str, token: dict = Depends(get_current_token)):
+    return upload_status(await get_upload_session(upload_id, token["data"].username))
+
+# Complete | Creates the file record once every part is in
+@router.post("/uploads/{upload_id}/complete", status_code=status.HTTP_201_CREATED, response_model=File)
+async def complete_upload_endpoint(upload_id: str, token: dict = Depends(get_current_token)):
+    return await complete_upload(upload_id, token["data"].username)
+
+# Abort | Drops the session and the parts received so far
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload_endpoint(upload_id: str, token: dict = Depends(get_current_token)):
+    await abort_upload(upload_id, token["data"].username)
+
 # --------------------------- Read --------------------------------->
 
+# Stored vs. uploaded bytes across all files (what deduplication saves)
+@router.get("/storage/stats")
+async def storage_stats_endpoint(token: str = Depends(get_current_token)):
+    return await blob_storage.storage_stats()
+
 @router.get("/{file_uploaded_id}", response_model=File)
 async def get_file_uploaded_endpoint(file_uploaded_id: str):
     try:
-        file_uploaded = get_file_uploaded_by_id(file_uploaded_id)
+        file_uploaded = await get_file_uploaded_by_id(file_uploaded_id)
         return file_uploaded
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+# Download | The file itself; Range, ETag and conditional requests are honoured. ?attachment=true to save instead of view
+@router.api_route("/{file_uploaded_id}/download", methods=["GET", "HEAD"])
+async def download_file_uploaded_endpoint(
+        file_uploaded_id: str,
+        request: Request,
+        attachment: bool = False,
+        token: dict = Depends(get_current_token)
+    ):
+    file_uploaded = await get_file_uploaded_by_id(file_uploaded_id)
+    return await file_download_response(file_uploaded, request.headers, attachment)
+
+# Status | Progress of the file through ingestion (extract, redact, chunk, QA generation)
+@router.get("/{file_uploaded_id}/status", response_model=IngestionStatus)
+async def file_ingestion_status_endpoint(file_uploaded_id: str, token: dict = Depends(get_current_token)):
+    file_uploaded = await get_file_uploaded_by_id(file_uploaded_id)
+    return await ingestion_status(file_uploaded)
+
 # --------------------------- Delete --------------------------------->
 
 @router.delete("/{file_uploaded_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_file_uploaded_endpoint(file_uploaded_id: str):
     try:
-        delete_file_uploaded(file_uploaded_id)
+        await delete_file_uploaded(file_uploaded_id)
         return {"message": "File uploaded record deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.services.metrics import REGISTRY
+
+# ----------------------- Router -------------------------------->
+
+router = APIRouter(tags=["metrics"])
+
+# --------------------------- Read --------------------------------->
+
+# Prometheus scrape endpoint; keep it off the public ingress
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -1,15 +1,59 @@
-from fastapi import APIRouter
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.mock_chat_service import post_questions_service
+from app.services.mock_chat_service import post_questions_service, stream_questions_service
+from app.services.chat_history import chat_history_writer, get_chat_history, parse_fields, HISTORY_MAX_LIMIT
+from app.schemas.chat_history import ChatHistoryPage
+from app.auth.jwt_handler import get_current_token, get_optional_username
+from app.utils.sse import SSE_HEADERS, format_sse
 
 router = APIRouter(prefix='/chat', tags=['chat'])
 
+# Roles that may read other users' history
+HISTORY_READER_ROLES = {"teacher", "manager"}
+
 # Define the Pydantic model to validate incoming data
 class MessageRequest(BaseModel):
     message: str
     unit_name: str
 
+# Relay service events as SSE frames: `token` for each delta, `done` with the full text and usage
+async def _sse_events(request: MessageRequest, use_cache: bool, username: str):
+    try:
+        async for event in stream_questions_service(request, use_cache=use_cache):
+            kind = event.pop("type")
+            if kind == "done":
+                chat_history_writer.record(username, request.message, event["text"], request.unit_name)
+            yield format_sse(kind, event)
+    except Exception as e:
+        yield format_sse("error", {"detail": str(e)})
+
+# `no_cache=true` skips the cached answer and asks the model again
+# When logged in, each exchange is saved to the caller's chat history in the background
 @router.post('/ask')
-def post_questions(request: MessageRequest):
-    data = post_questions_service(request)
+async def post_questions(request: MessageRequest, stream: bool = False, no_cache: bool = False, username: str = Depends(get_optional_username)):
+    if stream:
+        return StreamingResponse(_sse_events(request, not no_cache, username), media_type="text/event-stream", headers=SSE_HEADERS)
+    data = await post_questions_service(request, use_cache=not no_cache)
+    chat_history_writer.record(username, request.message, data, request.unit_name)
     return {"text": data}
+
+# Page through past exchanges, newest first. Pass `next_cursor` back as `cursor` for the next page
+# `fields=question,unit_name` leaves the answer bodies out of list views
+@router.get('/history', response_model=ChatHistoryPage, response_model_exclude_none=True)
+async def get_chat_history_endpoint(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=HISTORY_MAX_LIMIT),
+    unit_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    username: Optional[str] = None,
+    token: dict = Depends(get_current_token),
+):
+    user = token["data"]
+    if username and username != user.username and user.role.lower() not in HISTORY_READER_ROLES:
+        raise HTTPException(status_code=403, detail="Not allowed to read another user's history")
+    return await get_chat_history(username or user.username, limit, cursor, unit_name, since, until, parse_fields(fields))
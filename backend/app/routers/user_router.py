@@ -1,30 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response, Request, Depends
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Request, Depends, UploadFile
 
 from app.schemas.user import *
 from app.services.user import *
 
-from app.auth.jwt_handler import get_current_token
+from app.auth.jwt_handler import get_current_token, revoke_session
 
 # ----------------------- Router -------------------------------->
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+# Roles that may import a roster of users
+ROSTER_IMPORT_ROLES = {"teacher", "manager"}
+
 # --------------------------- Create / Register / Login / Logout--------------------------------->
 
 # Create | Register new User
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register_user_endpoint(user_input: UserRegister) -> dict:
     try:
-        register_user(user_input)
+        await register_user(user_input)
         return {"message": "User registered successfully"} 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Bulk import | Register a whole roster (CSV with a header line, or JSON) in one request
+# Columns / keys: username, name, email, password, role (optional). Returns a result per row
+@router.post("/import", status_code=status.HTTP_200_OK)
+async def import_roster_endpoint(roster: UploadFile, token: dict = Depends(get_current_token)):
+    if token["data"].role.lower() not in ROSTER_IMPORT_ROLES:
+        raise HTTPException(status_code=403, detail="Only teachers and managers can import a roster")
+    rows = parse_roster(roster.filename, await roster.read())
+    return await import_roster(rows)
+
 # Login endpoint
 @router.post("/login", status_code=status.HTTP_200_OK)
 async def login_user_endpoint(user_input: UserLogin, response: Response):
     try:
-        result = login_user(user_input)
+        result = await login_user(user_input)
         data_access = result['data_access_token']
         data_refresh = result['data_refresh_token']
         user = result["user"]
@@ -45,11 +57,17 @@ async def login_user_endpoint(user_input: UserLogin, response: Response):
         raise HTTPException(status_code=401, detail=str(e))
     
 # Log out endpoint
+# Revokes the bearer access token and the X-Refresh-Token refresh token, when sent
 @router.post("/logout", status_code=status.HTTP_200_OK)
-async def logout_user_endpoint(response: Response):
+async def logout_user_endpoint(request: Request, response: Response):
     try:
         response.delete_cookie(key="access_token")
         response.delete_cookie(key="refresh_token")
+        scheme, _, access_token = request.headers.get("authorization", "").partition(" ")
+        return await revoke_session(
+            access_token if scheme.lower() == "bearer" else None,
+            request.headers.get("x-refresh-token"),
+        )
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
 
@@ -59,7 +77,7 @@ async def logout_user_endpoint(response: Response):
 @router.get("/get/{user_id}", response_model=UserRegister)
 async def get_user_endpoint(user_id: str):
     try:
-        user = get_user_by_id(user_id)
+        user = await get_user_by_id(user_id)
         return user
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -85,7 +103,7 @@ def get_current_user_endpoint(token: dict = Depends(get_current_token)):
 @router.put("/put/{user_id}", response_model=UserRegister)
 async def update_user_endpoint(user_id: str, user_input: UserUpdate):
     try:
-        user = update_user(user_id, user_input)
+        user = await update_user(user_id, user_input)
         return user
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -95,7 +113,7 @@ async def update_user_endpoint(user_id: str, user_input: UserUpdate):
 @router.delete("/delete/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user_endpoint(user_id: str):
     try:
-        delete_user(user_id)
+        await delete_user(user_id)
         return {"message": "User deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+# ------------------------------------------------------------->
+
+'''
+    Chat history schema would have those attributes:
+        - Id
+        - Question
+        - Answer
+        - Unit name
+        - Date created
+    Fields left out with `fields=` are omitted from the response.
+'''
+
+# ------------------------------------------------------------->
+
+class ChatHistoryItem(BaseModel):
+    id: str
+    question: Optional[str] = None
+    answer: Optional[str] = None
+    unit_name: Optional[str] = None
+    date_created: datetime
+
+class ChatHistoryPage(BaseModel):
+    items: List[ChatHistoryItem]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next (older) page; null on the last page
@@ -10,6 +10,7 @@ from datetime import datetime
         - File path
         - Upload date
         - Size
+        - SHA-256 digest
         - Username (reference to the user who uploaded the file)
 '''
 
@@ -22,6 +23,7 @@ class File(BaseModel):
     file_path: str = Field(..., min_length=1, max_length=255)
     upload_date: datetime
     size: int = Field(..., ge=0)  # Size in bytes, must be non-negative
+    sha256: Optional[str] = None  # Hex digest; missing on files stored before it was recorded
     username: str = Field(..., min_length=1, max_length=50)  # Reference to the user who uploaded the file
 
     class Config:
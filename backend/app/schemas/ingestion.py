@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+# ------------------------------------------------------------->
+
+'''
+    Ingestion status schema would have those attributes:
+        - File id, name and SHA-256 digest
+        - Status: not_queued, queued, running, done or failed
+        - Stage while running: extract, redact, chunk or qa
+        - Chunks done / total, QA pairs saved so far
+        - Attempts and the last error
+'''
+
+# ------------------------------------------------------------->
+
+class IngestionStatus(BaseModel):
+    file_id: str
+    file_name: str
+    sha256: Optional[str] = None
+    status: str
+    stage: Optional[str] = None
+    chunks_done: int = 0
+    chunks_total: int = 0
+    qa_pairs: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    updated_at: Optional[datetime] = None
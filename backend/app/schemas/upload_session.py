@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import List
+from datetime import datetime
+
+# ------------------------------------------------------------->
+
+'''
+    Resumable upload schemas:
+        - UploadStart     File name and total size, sent to start an upload
+        - UploadStatus    Where an upload stands: part size, parts received and still missing
+'''
+
+# ------------------------------------------------------------->
+
+class UploadStart(BaseModel):
+    file_name: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., ge=0)  # Total size in bytes
+
+class UploadStatus(BaseModel):
+    upload_id: str
+    file_name: str
+    size: int
+    part_size: int  # Part n covers bytes (n - 1) * part_size up to n * part_size; the last part is shorter
+    parts_total: int
+    parts_received: List[int]
+    parts_missing: List[int]
+    status: str
+    expires_at: datetime  # Abandoned after this unless another part arrives
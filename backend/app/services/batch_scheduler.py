@@ -0,0 +1,157 @@
+import asyncio
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Micro-batching for local-model calls.
+    Requests that arrive within a short window (or until the batch is full)
+    are sent to the backend together, and each caller gets its own result.
+    A new batch is only collected once a batch slot is free, so while the
+    model is busy the next batch keeps filling up instead of queueing
+    single requests.
+
+    Only whole completions are batched. Streams (streamed /ask hints, chat)
+    go straight to the server: it already decodes concurrent streams in its
+    parallel slots, and holding a stream back for the batch window would
+    only delay its first token.
+
+    Off by default. Ollama has no batch endpoint: a batch is just its
+    prompts sent together, and a batch slot is only freed once the slowest
+    of them finishes, so with answers of varying length the server's
+    parallel slots sit idle behind it. Sent one by one, requests fill a
+    slot as soon as one frees up (see benchmarks/bench_hint_batching.py).
+    Enable it for a backend with a real batch call.
+
+    When enabled, a batch fills the server's parallel slots by default
+    (OLLAMA_NUM_PARALLEL, the same variable the Ollama server reads), and as
+    many batches run at once as fit in them.
+
+    Environment:
+        - OLLAMA_NUM_PARALLEL       Sequences the Ollama server decodes at once (its own setting)
+        - OLLAMA_BATCH_ENABLED      "true" or "false" (default)
+        - OLLAMA_BATCH_WINDOW_MS    How long the first request of a batch waits for company
+        - OLLAMA_BATCH_MAX_SIZE     Requests per batch (default OLLAMA_NUM_PARALLEL)
+        - OLLAMA_BATCH_CONCURRENCY  Batches in flight at once (default OLLAMA_NUM_PARALLEL / batch size)
+'''
+
+# ------------------------------------------------------------->
+
+OLLAMA_BATCH_ENABLED = os.getenv("OLLAMA_BATCH_ENABLED", "false").lower() == "true"
+OLLAMA_BATCH_WINDOW_MS = float(os.getenv("OLLAMA_BATCH_WINDOW_MS", "20"))
+OLLAMA_NUM_PARALLEL = max(1, int(os.getenv("OLLAMA_NUM_PARALLEL", "4")))
+OLLAMA_BATCH_MAX_SIZE = int(os.getenv("OLLAMA_BATCH_MAX_SIZE", str(OLLAMA_NUM_PARALLEL)))
+OLLAMA_BATCH_CONCURRENCY = int(os.getenv("OLLAMA_BATCH_CONCURRENCY", str(max(1, OLLAMA_NUM_PARALLEL // OLLAMA_BATCH_MAX_SIZE))))
+
+class MicroBatcher:
+    """Collect `submit()`ed items into batches for `run_batch(items) -> results`.
+
+    `run_batch` returns one result per item, in order; an exception instance in
+    the results fails only that item's caller.
+    """
+
+    def __init__(self, run_batch, max_batch_size: int = OLLAMA_BATCH_MAX_SIZE,
+                 max_wait: float = OLLAMA_BATCH_WINDOW_MS / 1000, max_concurrent_batches: int = OLLAMA_BATCH_CONCURRENCY):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrent_batches = max_concurrent_batches
+        self._loop = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def _start(self, loop):
+        # Bound to the running loop on first use, and rebuilt if the loop changes
+        self._loop = loop
+        self._pending = []  # (item, future, enqueued_at)
+        self._arrived = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._running = set()
+        self._dispatcher = loop.create_task(self._dispatch())
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._start(loop)
+        future = loop.create_future()
+        self._pending.append((item, future, loop.time()))
+        self._arrived.set()
+        return await future
+
+    async def _wait_for_batch(self):
+        loop = asyncio.get_running_loop()
+        while not self._pending:
+            self._arrived.clear()
+            await self._arrived.wait()
+        # The window starts when the oldest waiting request arrived
+        deadline = self._pending[0][2] + self.max_wait
+        while len(self._pending) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            try:
+                await self._wait_for_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        try:
+            # Callers that gave up while waiting are dropped from the batch
+            live = [(item, future) for item, future, _ in batch if not future.done()]
+            if not live:
+                return
+            self.batches += 1
+            self.items += len(live)
+            self.largest_batch = max(self.largest_batch, len(live))
+            try:
+                results = await self.run_batch([item for item, _ in live])
+            except Exception as e:
+                results = [e] * len(live)
+            for (_, future), result in zip(live, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        if self._loop is None:
+            return
+        self._dispatcher.cancel()
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(self._dispatcher, *self._running, return_exceptions=True)
+        for _, future, _ in self._pending:
+            future.cancel()
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": len(self._pending) if self._loop is not None else 0,
+        }
@@ -0,0 +1,140 @@
+import hashlib
+import uuid
+import anyio
+from datetime import datetime
+from fastapi import UploadFile
+from pymongo import ReturnDocument
+
+from app import database
+from app.models.blob import Blob
+
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Content-addressed storage for uploaded files.
+    Uploads are streamed to disk in UPLOAD_CHUNK_SIZE chunks with async file
+    I/O, hashing (SHA-256) and counting bytes as they go, so a request holds
+    one chunk in memory however large the file is. The content is then
+    stored once per hash, under <upload_folder>/blobs/<ab>/<sha256>.
+
+    Each Blob record counts the FileUploaded records that point at it. A
+    duplicate upload only adds a reference and its temporary copy is
+    discarded. Releasing the last reference removes the record and the file.
+    The refcount is only changed with atomic MongoDB updates, so several
+    workers can store and release the same content at once. A release
+    that races a new upload of the same content leaves the file in place.
+
+    Environment:
+        - upload_folder         Where files are stored (a file:// prefix is accepted)
+        - UPLOAD_CHUNK_SIZE     Bytes read and written per step
+'''
+
+# ---------------------- Folder Directory ------------------------>
+
+upload_folder = os.getenv("upload_folder", "uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Local path of a stored file; paths are recorded with the upload folder's file:// prefix
+def local_path(file_path: str) -> str:
+    return str(file_path).removeprefix("file://")
+
+def blob_path(sha256: str) -> str:
+    return f"{upload_folder}/blobs/{sha256[:2]}/{sha256}"
+
+# Uploads in progress; whatever is left here past its age is garbage (see app.services.upload_session)
+def temporary_folder() -> anyio.Path:
+    return anyio.Path(local_path(upload_folder), "blobs", "tmp")
+
+def temporary_path(suffix: str = ".part") -> anyio.Path:
+    return temporary_folder() / f"{uuid.uuid4().hex}{suffix}"
+
+# ---------------------------- Store ------------------------>
+
+async def write_upload(file_uploaded_in: UploadFile, path: anyio.Path) -> tuple:
+    """Stream an upload to `path` chunk by chunk. Returns (size in bytes, SHA-256 hex digest)."""
+    await path.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    async with await anyio.open_file(path, "wb") as f:
+        while chunk := await file_uploaded_in.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            await f.write(chunk)
+    return size, digest.hexdigest()
+
+async def acquire(partial: anyio.Path, size: int, sha256: str) -> dict:
+    """Add a reference to the blob holding this content, moving `partial` into place if it is new (else deleting it)."""
+    path = blob_path(sha256)
+    record = await database.collection(Blob).find_one_and_update(
+        {"sha256": sha256},
+        {"$inc": {"refcount": 1}, "$setOnInsert": {"file_path": path, "size": size, "created_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    target = anyio.Path(local_path(path))
+    if record["refcount"] == 1 or not await target.exists():
+        # New content, or content a concurrent release is removing: (re)place it
+        await target.parent.mkdir(parents=True, exist_ok=True)
+        await partial.rename(target)
+    else:
+        await partial.unlink()
+    return record
+
+async def store(file_uploaded_in: UploadFile) -> dict:
+    """Store an upload and take a reference to its blob. Returns the Blob record (sha256, file_path, size, refcount)."""
+    partial = temporary_path()
+    try:
+        size, sha256 = await write_upload(file_uploaded_in, partial)
+        return await acquire(partial, size, sha256)
+    except BaseException:
+        await partial.unlink(missing_ok=True)
+        raise
+
+# ---------------------------- Release ------------------------>
+
+async def release(sha256: str) -> bool:
+    """Drop one reference to a blob. The file and record go with the last one; returns whether they did."""
+    blobs = database.collection(Blob)
+    record = await blobs.find_one_and_update(
+        {"sha256": sha256, "refcount": {"$gt": 0}},
+        {"$inc": {"refcount": -1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if record is None or record["refcount"] > 0:
+        return False
+
+    # Move the file aside first, so an upload of the same content that arrives now puts a fresh copy in place
+    path = anyio.Path(local_path(record["file_path"]))
+    aside = path.with_name(f"{path.name}.{uuid.uuid4().hex}.deleting")
+    try:
+        await path.rename(aside)
+    except FileNotFoundError:
+        aside = None
+    removed = (await blobs.delete_one({"sha256": sha256, "refcount": {"$lte": 0}})).deleted_count == 1
+    if aside is not None:
+        if removed:
+            await aside.unlink(missing_ok=True)
+        else:
+            # Referenced again in the meantime: keep the content
+            await aside.rename(path)
+    return removed
+
+# ---------------------------- Stats ------------------------>
+
+async def storage_stats() -> dict:
+    """Bytes on disk vs. bytes uploaded: the difference is what deduplication saved."""
+    totals = [row async for row in database.collection(Blob).aggregate([{"$group": {
+        "_id": None,
+        "blobs": {"$sum": 1},
+        "references": {"$sum": "$refcount"},
+        "stored_bytes": {"$sum": "$size"},
+        "referenced_bytes": {"$sum": {"$multiply": ["$size", "$refcount"]}},
+    }}])]
+    row = totals[0] if totals else {"blobs": 0, "references": 0, "stored_bytes": 0, "referenced_bytes": 0}
+    row.pop("_id", None)
+    return {**row, "saved_bytes": row["referenced_bytes"] - row["stored_bytes"]}
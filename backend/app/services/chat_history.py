@@ -0,0 +1,244 @@
+import asyncio
+import base64
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+from dotenv import load_dotenv
+import os
+
+from app import database
+from app.models.chat_history import ChatHistory, HISTORY_SORT
+from app.services.metrics import CHAT_HISTORY_FLUSH_DURATION
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Chat history: write-behind persistence of chat exchanges, and paged reads.
+    /chat/ask and /ask hand each question and answer to `record()`, which
+    only appends to an in-memory buffer, so responses never wait on MongoDB.
+    Exchanges made without a valid access token are not kept: there is no
+    account they could be read back from.
+    A background task writes the buffer with one `insert_many` when a batch
+    is full or CHAT_HISTORY_FLUSH_INTERVAL_MS has passed, whichever comes
+    first. The buffer is drained in the lifespan shutdown.
+
+    The buffer is bounded: when MongoDB is slow or down and it fills up, new
+    exchanges are dropped (and counted) instead of growing memory. A failed
+    batch is put back at the front of the buffer and retried on the next
+    flush.
+
+    History is read newest first with keyset pagination on
+    (username, date_created, _id): each page continues strictly after the
+    last item of the previous one, so a page costs the same index range scan
+    however deep it is, unlike skip/offset.
+
+    Environment:
+        - CHAT_HISTORY_BUFFER_SIZE          Exchanges held in memory at most
+        - CHAT_HISTORY_BATCH_SIZE           Exchanges per insert_many
+        - CHAT_HISTORY_FLUSH_INTERVAL_MS    Longest an exchange waits before being written
+        - CHAT_HISTORY_DRAIN_TIMEOUT        Seconds shutdown spends writing what is left
+'''
+
+# ------------------------ Configuration ------------------------>
+
+CHAT_HISTORY_BUFFER_SIZE = int(os.getenv("CHAT_HISTORY_BUFFER_SIZE", "10000"))
+CHAT_HISTORY_BATCH_SIZE = int(os.getenv("CHAT_HISTORY_BATCH_SIZE", "100"))
+CHAT_HISTORY_FLUSH_INTERVAL_MS = float(os.getenv("CHAT_HISTORY_FLUSH_INTERVAL_MS", "1000"))
+CHAT_HISTORY_DRAIN_TIMEOUT = float(os.getenv("CHAT_HISTORY_DRAIN_TIMEOUT", "10"))
+
+DUPLICATE_KEY = 11000
+
+# Fields a history page can return; id and date_created always are
+HISTORY_FIELDS = ("question", "answer", "unit_name", "date_created")
+HISTORY_MAX_LIMIT = 100
+
+_EPOCH = datetime(1970, 1, 1)
+
+# ------------------------ Writer ------------------------>
+
+class ChatHistoryWriter:
+    def __init__(self, max_buffer: int = CHAT_HISTORY_BUFFER_SIZE, batch_size: int = CHAT_HISTORY_BATCH_SIZE,
+                 flush_interval: float = CHAT_HISTORY_FLUSH_INTERVAL_MS / 1000):
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque()  # Documents ready for insert_many, oldest first
+        self._batch_ready = None
+        self._task = None
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+    # ------------------------ Record ------------------------>
+
+    def record(self, username: Optional[str], question: str, answer: str, unit_name: str = "") -> bool:
+        """Queue one exchange for writing. Never waits; returns False when it wasn't queued (no user, or the buffer is full)."""
+        if not username:
+            return False
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return False
+        exchange = ChatHistory(username=username, question=question, answer=answer, unit_name=unit_name)
+        self._buffer.append(exchange.to_mongo().to_dict())
+        self.queued += 1
+        if len(self._buffer) >= self.batch_size and self._batch_ready is not None:
+            self._batch_ready.set()
+        return True
+
+    # ------------------------ Flush ------------------------>
+
+    async def flush(self) -> bool:
+        """Write up to one batch. Returns False if the write failed and the batch was put back."""
+        if not self._buffer:
+            return True
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        started = time.perf_counter()
+        try:
+            await database.collection(ChatHistory).insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Some documents went in. Duplicates were written by an earlier, partly failed attempt
+            retry = [batch[error["index"]] for error in e.details["writeErrors"] if error["code"] != DUPLICATE_KEY]
+            self.written += e.details["nInserted"]
+            self._requeue(retry)
+            self.failed_flushes += 1
+            print(f"Chat history flush partly failed: {len(retry)} of {len(batch)} exchanges will be retried")
+            return not retry
+        except Exception as e:
+            self._requeue(batch)
+            self.failed_flushes += 1
+            print(f"Chat history flush failed: {e}")
+            return False
+        finally:
+            CHAT_HISTORY_FLUSH_DURATION.observe(time.perf_counter() - started)
+        self.written += len(batch)
+        self.flushes += 1
+        return True
+
+    def _requeue(self, batch: list) -> None:
+        # Back at the front, in order; whatever no longer fits is dropped
+        keep = batch[:max(0, self.max_buffer - len(self._buffer))]
+        self._buffer.extendleft(reversed(keep))
+        self.dropped += len(batch) - len(keep)
+
+    async def _flush_forever(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            # Full batches go out back to back; a partial one only when the interval is up
+            while await self.flush() and len(self._buffer) >= self.batch_size:
+                pass
+
+    # ------------------------ Lifecycle ------------------------>
+
+    async def start(self):
+        """Start the background flushes. Called from the app lifespan."""
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self):
+        """Stop the background flushes and write what is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            async with asyncio.timeout(CHAT_HISTORY_DRAIN_TIMEOUT):
+                while self._buffer and await self.flush():
+                    pass
+        except TimeoutError:
+            pass
+        if self._buffer:
+            print(f"Chat history: {len(self._buffer)} exchanges could not be written before shutdown")
+            self.dropped += len(self._buffer)
+            self._buffer.clear()
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+        }
+
+# Shared by /chat/ask and /ask
+chat_history_writer = ChatHistoryWriter()
+
+# ------------------------ Read ------------------------>
+
+def encode_cursor(date_created: datetime, last_id: ObjectId) -> str:
+    """Opaque cursor for the item a page ended on. MongoDB dates have millisecond precision, so this round-trips exactly."""
+    millis = (date_created - _EPOCH) // timedelta(milliseconds=1)
+    return base64.urlsafe_b64encode(f"{millis}:{last_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        millis, _, last_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        return _EPOCH + timedelta(milliseconds=int(millis)), ObjectId(last_id)
+    except (ValueError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields: str = None) -> tuple:
+    """Fields to return from a comma-separated list (all when empty)."""
+    if not fields:
+        return HISTORY_FIELDS
+    wanted = tuple(field.strip() for field in fields.split(",") if field.strip())
+    unknown = [field for field in wanted if field not in HISTORY_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}. Choose from {', '.join(HISTORY_FIELDS)}")
+    return wanted
+
+def history_query(username: str, after: tuple = None, unit_name: str = None, since: datetime = None, until: datetime = None) -> tuple:
+    """(filter, sort) for a history page; `after` is the decoded cursor (date_created, _id) the previous page ended on."""
+    query = {"username": username}
+    if unit_name is not None:
+        query["unit_name"] = unit_name
+    date_range = {}
+    if since is not None:
+        date_range["$gte"] = since
+    if until is not None:
+        date_range["$lt"] = until
+    if date_range:
+        query["date_created"] = date_range
+    if after:
+        # Strictly older than where the previous page ended, in (date_created, _id) order
+        date_created, last_id = after
+        query["$or"] = [
+            {"date_created": {"$lt": date_created}},
+            {"date_created": date_created, "_id": {"$lt": last_id}},
+        ]
+    return query, HISTORY_SORT
+
+async def get_chat_history(username: str, limit: int = 20, cursor: str = None, unit_name: str = None,
+                           since: datetime = None, until: datetime = None, fields: tuple = HISTORY_FIELDS) -> dict:
+    """
+    One page of a user's exchanges, newest first, and the cursor of the next page (None on the last one).
+    `since` is inclusive and `until` exclusive. Every query is served by one of ChatHistory's compound indexes.
+    """
+    query, sort = history_query(username, decode_cursor(cursor) if cursor else None, unit_name, since, until)
+
+    # date_created is always read: the next cursor is built from it
+    projection = {field: 1 for field in (*fields, "date_created")}
+    rows = database.collection(ChatHistory).find(query, projection, sort=sort, limit=limit + 1)
+    items = [row async for row in rows]
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["date_created"], items[-1]["_id"])
+    for item in items:
+        item["id"] = str(item.pop("_id"))
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+
+# ------------------------------------------------------------->
+
+'''
+    Offline stand-in for the async Groq client. It mimics the subset of
+    `client.chat.completions.create(...)` used by the chat service,
+    including `stream=True`, so the streaming path can be exercised
+    without an API key or network access.
+'''
+
+# ------------------------------------------------------------->
+
+FAKE_REPLY = (
+    "A linked list is a sequence of nodes where each node stores a value "
+    "and a reference to the next node in the list."
+)
+
+def _usage(prompt: str, completion: str) -> SimpleNamespace:
+    prompt_tokens = len(prompt.split())
+    completion_tokens = len(completion.split())
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+class _FakeCompletions:
+    def __init__(self, reply: str, token_delay: float):
+        self.reply = reply
+        self.token_delay = token_delay
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        prompt = messages[-1]["content"]
+        if not stream:
+            await asyncio.sleep(self.token_delay * len(self.reply.split()))
+            message = SimpleNamespace(content=self.reply)
+            return SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                usage=_usage(prompt, self.reply),
+            )
+        return self._stream(model, prompt)
+
+    async def _stream(self, model, prompt):
+        words = self.reply.split(" ")
+        for index, word in enumerate(words):
+            await asyncio.sleep(self.token_delay)
+            text = word if index == 0 else " " + word
+            delta = SimpleNamespace(content=text)
+            yield SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(delta=delta, finish_reason=None)],
+                usage=None,
+                x_groq=None,
+            )
+        # Groq reports usage on the final chunk
+        yield SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason="stop")],
+            usage=None,
+            x_groq=SimpleNamespace(usage=_usage(prompt, self.reply)),
+        )
+
+class FakeStreamingClient:
+    """Drop-in replacement for `groq.AsyncGroq` that replays a canned answer."""
+
+    def __init__(self, reply: str = FAKE_REPLY, token_delay: float = 0.02):
+        self.chat = SimpleNamespace(completions=_FakeCompletions(reply, token_delay))
@@ -1,17 +1,49 @@
-from fastapi import UploadFile, HTTPException
+import anyio
+from email.utils import parsedate_to_datetime
+from fastapi import UploadFile, HTTPException, Response
+from fastapi.responses import FileResponse
 from datetime import datetime
 
+from pymongo.errors import DuplicateKeyError
+
+from app import database
 from app.models.file_uploaded import FileUploaded 
 from app.schemas.file_uploaded import File
+from app.services import blob_storage
+from app.services.blob_storage import upload_folder, local_path
+from app.services.ingestion import ingestion_queue
 
 from dotenv import load_dotenv
 import os   
 
 load_dotenv()
 
-# ---------------------- Folder Directory ------------------------>
+# ------------------------------------------------------------->
+
+'''
+    File records point at content-addressed blobs (app.services.blob_storage):
+    the upload is streamed to disk and hashed, and identical content uploaded
+    under several names is stored once. PDFs and ZIPs are then queued for
+    ingestion (app.services.ingestion). Deleting a record releases its
+    reference; the content goes when the last record using it does.
+    Records saved before blob storage keep their own per-name file, which
+    deleting them leaves on disk.
+
+    Downloads are served with FileResponse: Range requests (PDF viewers load
+    pages on demand), and the file handed to the server with the ASGI
+    pathsend extension (sendfile) where the server supports it. A blob never
+    changes, so its digest is a strong ETag; browsers revalidate with
+    If-None-Match / If-Modified-Since and get a bodiless 304.
+
+    Environment:
+        - FILE_DOWNLOAD_CHUNK_SIZE      Bytes per read when the server streams the file itself
+        - FILE_DOWNLOAD_MAX_AGE         Seconds a browser reuses a download before revalidating
+'''
 
-upload_folder = os.getenv("upload_folder", "uploads")
+# ------------------------ Configuration ------------------------>
+
+FILE_DOWNLOAD_CHUNK_SIZE = int(os.getenv("FILE_DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+FILE_DOWNLOAD_MAX_AGE = int(os.getenv("FILE_DOWNLOAD_MAX_AGE", "3600"))
 
 # -------------------------- Convert UploadFile to right format ---------------------------->
 
@@ -31,45 +63,98 @@ def convert_upload_file(file_uploaded_in: UploadFile, username) -> File:
 async def create_file_uploaded(file_uploaded_in: UploadFile, username: str) -> FileUploaded:
 
         # Check in the database if the file's name has been existed
-        existing_file = FileUploaded.objects(file_name=file_uploaded_in.filename).first()  # type: ignore
+        existing_file = await database.exists(FileUploaded, {"file_name": file_uploaded_in.filename})
         if existing_file:
             raise HTTPException(status_code=400, detail="File with this name already exists")
         
         # Convert to file
         file_converted: File = convert_upload_file(file_uploaded_in, username)
 
-        # Create and save the new file uploaded record in the database
-        file = FileUploaded(
-            file_name=file_converted.file_name,
-            file_path=file_converted.file_path,
-            upload_date=file_converted.upload_date,
-            size=file_converted.size,
-            username=file_converted.username
-        )
-        file.save()  
-
-        # Save the content of file in database
-        data = await file_uploaded_in.read()  # Read the file data
-        file_path = str(file.file_path)[len('file://'):]
-        with open(file_path, "wb") as f:
-            f.write(data)  
-
-        return file
+        # Store the content (once per digest), then its record with the size and digest actually written
+        blob = await blob_storage.store(file_uploaded_in)
+        return await save_file_record(file_converted.file_name, file_converted.username, blob)
 
+# Record a file for a blob reference already taken; the reference is released if the record can't be saved
+async def save_file_record(file_name: str, username: str, blob: dict) -> FileUploaded:
+    file = FileUploaded(
+        file_name=file_name,
+        file_path=blob["file_path"],
+        upload_date=datetime.now(),
+        size=blob["size"],
+        sha256=blob["sha256"],
+        username=username or "default_username"
+    )
+    try:
+        await database.insert(file)
+    except Exception as e:
+        await blob_storage.release(blob["sha256"])
+        if isinstance(e, DuplicateKeyError):
+            # Another upload took the name after the early check
+            raise HTTPException(status_code=400, detail="File with this name already exists")
+        raise
+    # Only the job record is written here; the pipeline runs in the ingestion workers
+    try:
+        await ingestion_queue.enqueue(file)
+    except Exception as e:
+        print(f"Could not queue {file.file_name} for ingestion: {e}")
+    return file
 
 # ---------------------------- Read ------------------------>
 
-def get_file_uploaded_by_id(file_uploaded_id: str) -> FileUploaded:
-    file_uploaded = FileUploaded.objects(id=file_uploaded_id).first()  # type: ignore
+async def get_file_uploaded_by_id(file_uploaded_id: str) -> FileUploaded:
+    file_uploaded = await database.find_one(FileUploaded, {"_id": database.object_id(file_uploaded_id)})
     if not file_uploaded:
         raise HTTPException(status_code=400, detail="File uploaded record not found")
     return file_uploaded        
 
+# ---------------------------- Download ------------------------>
+
+# RFC 9110: If-None-Match wins over If-Modified-Since; If-None-Match compares weakly
+def is_not_modified(request_headers, etag: str, mtime: float) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+async def file_download_response(file_uploaded: FileUploaded, request_headers, attachment: bool = False) -> Response:
+    path = local_path(file_uploaded.file_path)
+    try:
+        stat_result = await anyio.Path(path).stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File content not found")
+
+    response = FileResponse(
+        path,
+        filename=file_uploaded.file_name,
+        stat_result=stat_result,
+        content_disposition_type="attachment" if attachment else "inline",
+        headers={"cache-control": f"private, max-age={FILE_DOWNLOAD_MAX_AGE}"},
+    )
+    response.chunk_size = FILE_DOWNLOAD_CHUNK_SIZE
+    if file_uploaded.sha256:
+        # Replaces FileResponse's mtime/size tag; also what If-Range is checked against
+        response.headers["etag"] = f'"{file_uploaded.sha256}"'
+
+    if is_not_modified(request_headers, response.headers["etag"], stat_result.st_mtime):
+        kept = ("etag", "last-modified", "cache-control")
+        return Response(status_code=304, headers={key: response.headers[key] for key in kept})
+    return response
+
 # ---------------------------- Delete ------------------------>
 
-def delete_file_uploaded(file_uploaded_id: str) -> bool:
-    file_uploaded = FileUploaded.objects(id=file_uploaded_id).first()  # type: ignore
+async def delete_file_uploaded(file_uploaded_id: str) -> bool:
+    file_uploaded = await database.find_one(FileUploaded, {"_id": database.object_id(file_uploaded_id)})
     if not file_uploaded:
         raise HTTPException(status_code=400, detail="File uploaded record not found")
-    file_uploaded.delete()
+    await database.delete(file_uploaded)
+    # Records from before blob storage own their file rather than a blob reference
+    if file_uploaded.sha256 and file_uploaded.file_path == blob_storage.blob_path(file_uploaded.sha256):
+        await blob_storage.release(file_uploaded.sha256)
     return True
@@ -1,28 +1,164 @@
-from langchain_ollama.llms import OllamaLLM
 from langchain_core.prompts import ChatPromptTemplate
 
-# Module-level private variables for singleton pattern
-_model = None
-_chain = None
-
-def _init_model_and_chain():
-    """Initialize the model and chain if not already initialized."""
-    global _model, _chain
-    if _model is None or _chain is None:
-        _model = OllamaLLM(model="deepseek-r1")
-        template = (
-            "The user is asking you some questions. Please do not provide them the correct answer they are looking for. "
-            "Instead, you should only provide the guide for the user to finish their projects by showing them the knowledge "
-            "that they should use to get the correct answer or the best source to read to get the best answer and which part "
-            "in the questions that they should check again so that they can correct their questions if there are mistakes. "
-            "Note: Don't provide the correct answer for the user yet just provide the guide. "
-            "Here is the question from the user: {question}"
-        )
-        prompt = ChatPromptTemplate.from_template(template)
-        _chain = prompt | _model
-
-def generate_hint(question: str) -> str:
+from app.services.llm_router import llm_router
+from app.services.response_cache import response_cache, make_key
+from app.services.semantic_cache import semantic_cache, aembed_question
+from app.services.single_flight import llm_flights
+
+HINT_ROUTE = "hint"  # Providers and models for this route are configured in llm_router
+HINT_PROMPT_VERSION = "v1"  # Bump whenever the template changes so cached hints are not reused
+
+_prompt = ChatPromptTemplate.from_template(
+    "The user is asking you some questions. Please do not provide them the correct answer they are looking for. "
+    "Instead, you should only provide the guide for the user to finish their projects by showing them the knowledge "
+    "that they should use to get the correct answer or the best source to read to get the best answer and which part "
+    "in the questions that they should check again so that they can correct their questions if there are mistakes. "
+    "Note: Don't provide the correct answer for the user yet just provide the guide. "
+    "Here is the question from the user: {question}"
+)
+
+def build_prompt(question: str) -> str:
+    return _prompt.format(question=question)
+
+async def _invoke(question: str, key: tuple, scope: tuple, vector) -> str:
+    completion = await llm_router.complete(HINT_ROUTE, build_prompt(question))
+    response = completion.text
+    response_cache.set(key, response)
+    if vector is not None:
+        semantic_cache.insert(scope, vector, response)
+    return response
+
+async def generate_hint(question: str, unit_name: str = "", use_cache: bool = True) -> str:
     """Generate a hint for the given question."""
-    _init_model_and_chain()
-    response = _chain.invoke({"question": question})
-    return response 
\ No newline at end of file
+    key = make_key(unit_name, question, HINT_ROUTE, HINT_PROMPT_VERSION)
+    scope = (key[0], HINT_PROMPT_VERSION)
+    vector = None
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+        # Fall back to a paraphrase of a question that was already answered
+        vector = await aembed_question(question)
+        if vector is not None:
+            cached = semantic_cache.lookup(scope, vector)
+            if cached is not None:
+                response_cache.set(key, cached)
+                return cached
+    # Identical questions asked at the same time share one upstream call
+    return await llm_flights.do(("hint",) + key, lambda: _invoke(question, key, scope, vector))
+
+# ------------------------ Streaming ------------------------>
+
+def _partial_tag_length(text: str, tag: str) -> int:
+    """Length of the longest suffix of `text` that could be the start of `tag`."""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+class ThinkBlockFilter:
+    """Incrementally drop deepseek-r1 `<think>...</think>` blocks from streamed text.
+
+    Tags may be split across chunks, so a possible partial tag is held back until
+    the next chunk decides it. Once answer text has been emitted, a new reasoning
+    block means the answer section is complete and `finished` is set.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_think = False
+        self.answer_started = False
+        self.finished = False
+
+    def feed(self, text: str) -> str:
+        """Consume a chunk and return the answer text that is safe to emit."""
+        if self.finished:
+            return ""
+        self._buffer += text
+        out = []
+        while self._buffer:
+            if self._in_think:
+                index = self._buffer.find(self.CLOSE_TAG)
+                if index == -1:
+                    keep = _partial_tag_length(self._buffer, self.CLOSE_TAG)
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                self._buffer = self._buffer[index + len(self.CLOSE_TAG):]
+                self._in_think = False
+            else:
+                index = self._buffer.find(self.OPEN_TAG)
+                if index == -1:
+                    keep = _partial_tag_length(self._buffer, self.OPEN_TAG)
+                    out.append(self._buffer[:len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                out.append(self._buffer[:index])
+                self._buffer = self._buffer[index + len(self.OPEN_TAG):]
+                if self.answer_started or "".join(out).strip():
+                    self.finished = True
+                    self._buffer = ""
+                    break
+                self._in_think = True
+        return self._emit("".join(out))
+
+    def flush(self) -> str:
+        """Return any held-back text once the upstream stream has ended."""
+        if self._in_think or self.finished:
+            return ""
+        text, self._buffer = self._buffer, ""
+        return self._emit(text)
+
+    def _emit(self, text: str) -> str:
+        # Drop the blank lines the model puts between `</think>` and the answer
+        if not self.answer_started:
+            text = text.lstrip()
+            self.answer_started = bool(text)
+        return text
+
+async def _stream_filtered(question: str, key: tuple, scope: tuple, vector):
+    parts = []
+    think_filter = ThinkBlockFilter()
+    stream = llm_router.stream(HINT_ROUTE, build_prompt(question))
+    try:
+        async for chunk in stream:
+            text = think_filter.feed(chunk.text)
+            if text:
+                parts.append(text)
+                yield text
+            if think_filter.finished:
+                break
+        text = think_filter.flush()
+        if text:
+            parts.append(text)
+            yield text
+        hint = "".join(parts)
+        response_cache.set(key, hint)
+        if vector is not None:
+            semantic_cache.insert(scope, vector, hint)
+    finally:
+        # Stop generation upstream as soon as we are done with the answer
+        await stream.aclose()
+
+async def stream_hint(question: str, unit_name: str = "", use_cache: bool = True):
+    """Yield the hint as it is generated, without the model's reasoning blocks."""
+    # Streamed hints have their reasoning stripped, so they are cached separately from `generate_hint`
+    key = make_key(unit_name, question, HINT_ROUTE, HINT_PROMPT_VERSION + "-stream")
+    scope = (key[0], HINT_PROMPT_VERSION + "-stream")
+    vector = None
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is None:
+            vector = await aembed_question(question)
+            if vector is not None:
+                cached = semantic_cache.lookup(scope, vector)
+                if cached is not None:
+                    response_cache.set(key, cached)
+        if cached is not None:
+            yield cached
+            return
+    # Identical questions streamed at the same time share one upstream stream
+    async for text in llm_flights.stream(("hint-stream",) + key, lambda: _stream_filtered(question, key, scope, vector)):
+        yield text
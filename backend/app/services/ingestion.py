@@ -0,0 +1,348 @@
+import asyncio
+import multiprocessing
+import socket
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+
+from app import database
+from app.models.ingestion_job import IngestionJob
+from app.models.qa_pair import QAPair
+from app.services import ingestion_pipeline
+from app.services.ingestion_pipeline import PermanentFailure
+from app.services.blob_storage import local_path
+
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Background ingestion of uploaded course material.
+    Every uploaded PDF or ZIP gets an IngestionJob in MongoDB: extract ->
+    redact -> chunk -> QA generation (see app.services.ingestion_pipeline).
+    Questions and answers are saved as QAPair records. Jobs are keyed by
+    the content's SHA-256, so the same file uploaded twice is processed once.
+
+    The upload itself only writes the job record. The steps run in a pool of
+    INGEST_WORKERS processes, so spaCy, the tokenizer and PDF parsing never
+    hold the web process's event loop or GIL. One asyncio task per worker
+    claims a job, hands its steps to the pool and records progress.
+
+    Workers are opt-in: the pipeline needs the Lambda1 packages (spaCy with
+    en_core_web_md, transformers, boto3), which requirements.txt and the
+    image leave out. With INGEST_WORKERS at 0, uploads still queue their
+    jobs, and a process started with workers picks them up.
+
+    Jobs survive restarts: a claimed job holds a lease that its worker keeps
+    renewing, and a job whose lease lapsed (the process died) is claimed
+    again by any worker. On shutdown, running jobs are handed back to the
+    queue. A failed job is retried INGEST_MAX_ATTEMPTS times, further apart
+    each time; a retry starts the file over.
+
+    A worker only works on a job while it holds the lease: when a heartbeat
+    finds the job taken over, the run is cancelled. Each claim gets its own
+    attempt id, and the QA pairs it saves are tagged with it. A run that
+    ends without finishing deletes its own pairs, and the run that finishes
+    deletes every other attempt's, so a file keeps one set of pairs.
+
+    Environment:
+        - INGEST_WORKERS           Worker processes, i.e. files processed at once (default 0: no ingestion here)
+        - INGEST_POLL_SECONDS      How often idle workers look for jobs queued by other processes
+        - INGEST_LEASE_SECONDS     How long a job stays claimed without a heartbeat
+        - INGEST_MAX_ATTEMPTS      Attempts before a job is marked failed
+        - INGEST_RETRY_SECONDS     Delay before the first retry; doubled for each further attempt
+'''
+
+# ------------------------ Configuration ------------------------>
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", "5"))
+INGEST_LEASE_SECONDS = float(os.getenv("INGEST_LEASE_SECONDS", "300"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+INGEST_RETRY_SECONDS = float(os.getenv("INGEST_RETRY_SECONDS", "60"))
+
+# File types the pipeline can read
+INGEST_FILE_TYPES = (".pdf", ".zip")
+
+class LeaseLost(Exception):
+    """Another worker took the job over (our lease had lapsed)."""
+
+# ------------------------ Queries ------------------------>
+
+def claimable_query(now: datetime) -> tuple:
+    """(filter, sort) for jobs a worker may claim: queued and due, or running on a lease that lapsed."""
+    return {"$or": [
+        {"status": "queued", "available_at": {"$lte": now}},
+        {"status": "running", "lease_expires_at": {"$lt": now}},
+    ]}, [("available_at", 1)]
+
+def held_jobs_query(worker: str) -> tuple:
+    """(filter, sort) for the jobs a worker is running."""
+    return {"worker": worker, "status": "running"}, None
+
+def attempt_pairs_query(sha256: str, attempt: str, other: bool = False) -> tuple:
+    """(filter, sort) for the QA pairs one attempt saved, or with `other` those every other attempt saved."""
+    return {"sha256": sha256, "attempt": {"$ne": attempt} if other else attempt}, None
+
+# ------------------------ Queue ------------------------>
+
+class IngestionQueue:
+    def __init__(self, workers: int = INGEST_WORKERS):
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pool = None
+        self._tasks = []
+        self._wake = None
+        self.enqueued = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    # ------------------------ Enqueue ------------------------>
+
+    async def enqueue(self, file_uploaded) -> bool:
+        """Queue a job for an uploaded file unless its content already has one. Returns whether it was queued."""
+        if not file_uploaded.sha256 or not file_uploaded.file_name.lower().endswith(INGEST_FILE_TYPES):
+            return False
+        now = datetime.utcnow()
+        jobs = database.collection(IngestionJob)
+        result = await jobs.update_one(
+            {"sha256": file_uploaded.sha256},
+            {"$setOnInsert": IngestionJob(
+                sha256=file_uploaded.sha256,
+                file_path=file_uploaded.file_path,
+                file_name=file_uploaded.file_name,
+                available_at=now,
+                created_at=now,
+                updated_at=now,
+            ).to_mongo().to_dict()},
+            upsert=True,
+        )
+        if result.upserted_id is None:
+            # Content seen before; give it another go only if it had failed
+            retry = await jobs.update_one(
+                {"sha256": file_uploaded.sha256, "status": "failed"},
+                {"$set": {"status": "queued", "attempts": 0, "error": None, "file_path": file_uploaded.file_path,
+                          "available_at": now, "updated_at": now}},
+            )
+            if retry.modified_count == 0:
+                self.deduplicated += 1
+                return False
+        self.enqueued += 1
+        if self._wake is not None:
+            self._wake.set()
+        return True
+
+    # ------------------------ Claim / Progress ------------------------>
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        query, sort = claimable_query(now)
+        return await database.collection(IngestionJob).find_one_and_update(
+            query,
+            {"$set": {"status": "running", "worker": self.worker_id, "attempt": uuid.uuid4().hex, "error": None,
+                      "updated_at": now, "lease_expires_at": now + timedelta(seconds=INGEST_LEASE_SECONDS)},
+             "$inc": {"attempts": 1}},
+            sort=sort,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _update(self, job: dict, **changes) -> None:
+        """Record progress on a job we hold. Raises LeaseLost if another worker has taken it over."""
+        update = {"$set": {**changes.pop("set", {}), "updated_at": datetime.utcnow(),
+                           "lease_expires_at": datetime.utcnow() + timedelta(seconds=INGEST_LEASE_SECONDS)}}
+        if changes.get("inc"):
+            update["$inc"] = changes["inc"]
+        result = await database.collection(IngestionJob).update_one(
+            {"_id": job["_id"], "worker": self.worker_id, "status": "running"}, update)
+        if result.matched_count == 0:
+            raise LeaseLost(job["sha256"])
+
+    async def _heartbeat(self, job: dict, work: asyncio.Task):
+        while True:
+            await asyncio.sleep(INGEST_LEASE_SECONDS / 3)
+            try:
+                await self._update(job)
+            except LeaseLost:
+                # Another worker has the job now: stop working on it
+                work.cancel()
+                raise
+            except Exception as e:
+                # MongoDB unreachable: keep trying while the lease lasts
+                print(f"Ingestion heartbeat for {job['sha256'][:12]} failed: {e}")
+
+    async def _step(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    # ------------------------ Process ------------------------>
+
+    async def process(self, job: dict) -> int:
+        """Run the pipeline for a claimed job. Returns the number of QA pairs saved."""
+        path = local_path(job["file_path"])
+        if not os.path.exists(path):
+            raise PermanentFailure("File is no longer stored")
+
+        await self._update(job, set={"stage": "extract", "chunks_total": 0, "chunks_done": 0, "qa_pairs": 0})
+        texts = await self._step(ingestion_pipeline.extract, path, job["file_name"])
+        if not texts:
+            raise PermanentFailure("No extractable text")
+
+        await self._update(job, set={"stage": "redact"})
+        texts = [(source, await self._step(ingestion_pipeline.redact, text)) for source, text in texts]
+
+        await self._update(job, set={"stage": "chunk"})
+        chunks = []
+        for source, text in texts:
+            chunks += [(source, index, chunk) for index, chunk in await self._step(ingestion_pipeline.chunk, text)]
+
+        await self._update(job, set={"stage": "qa", "chunks_total": len(chunks)})
+        saved = 0
+        for source, index, chunk in chunks:
+            pairs = await self._step(ingestion_pipeline.generate_qa, chunk)
+            if pairs:
+                await database.collection(QAPair).insert_many([
+                    QAPair(sha256=job["sha256"], source_file=source, chunk_index=index, attempt=job["attempt"],
+                           **pair).to_mongo().to_dict()
+                    for pair in pairs
+                ])
+            saved += len(pairs)
+            await self._update(job, inc={"chunks_done": 1, "qa_pairs": len(pairs)})
+        return saved
+
+    async def _run(self, job: dict) -> None:
+        work = asyncio.create_task(self.process(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, work))
+        finished = False
+        try:
+            try:
+                await work
+            except asyncio.CancelledError:
+                if work.cancelled() and heartbeat.done() and not heartbeat.cancelled():
+                    raise LeaseLost(job["sha256"]) from None  # Cancelled by the heartbeat
+                raise
+            except LeaseLost:
+                raise
+            except Exception as e:
+                await self._failed(job, e)
+            else:
+                # Fails with LeaseLost unless this run still holds the job; once done nobody claims it again
+                await self._update(job, set={"status": "done", "stage": "", "worker": None})
+                finished = True
+                self.completed += 1
+                await database.collection(QAPair).delete_many(attempt_pairs_query(job["sha256"], job["attempt"], other=True)[0])
+        finally:
+            work.cancel()
+            heartbeat.cancel()
+            await asyncio.gather(work, heartbeat, return_exceptions=True)
+            if not finished:
+                await self._discard(job)
+
+    async def _discard(self, job: dict) -> None:
+        """Delete the QA pairs of a run that did not finish."""
+        try:
+            await database.collection(QAPair).delete_many(attempt_pairs_query(job["sha256"], job["attempt"])[0])
+        except Exception as e:
+            print(f"Could not delete QA pairs of an unfinished ingestion of {job['sha256'][:12]}: {e}")
+
+    async def _failed(self, job: dict, error: Exception) -> None:
+        retry = not isinstance(error, PermanentFailure) and job["attempts"] < INGEST_MAX_ATTEMPTS
+        changes = {"status": "queued" if retry else "failed", "error": str(error) or type(error).__name__, "worker": None}
+        if retry:
+            delay = INGEST_RETRY_SECONDS * 2 ** (job["attempts"] - 1)
+            changes["available_at"] = datetime.utcnow() + timedelta(seconds=delay)
+            self.retried += 1
+        else:
+            self.failed += 1
+        print(f"Ingestion of {job['file_name']} ({job['sha256'][:12]}) failed: {changes['error']}")
+        await self._update(job, set=changes)
+
+    async def _work_forever(self):
+        while True:
+            try:
+                job = await self._claim()
+                if job is None:
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), INGEST_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job)
+            except LeaseLost:
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ingestion worker error: {e}")
+                await asyncio.sleep(INGEST_POLL_SECONDS)
+
+    # ------------------------ Lifecycle ------------------------>
+
+    async def start(self, executor=None):
+        """Start the worker processes and tasks. Called from the app lifespan; `executor` lets benchmarks pass a stand-in."""
+        if self.workers <= 0:
+            return
+        self._wake = asyncio.Event()
+        # spawn: forking a process that already runs an event loop and threads is unsafe
+        self._pool = executor or ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self._tasks = [asyncio.create_task(self._work_forever()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pool is not None:
+            # Jobs cut short go back to the queue for the next start (or another process)
+            try:
+                await database.collection(IngestionJob).update_many(
+                    held_jobs_query(self.worker_id)[0],
+                    {"$set": {"status": "queued", "worker": None, "available_at": datetime.utcnow()}, "$inc": {"attempts": -1}},
+                )
+            except Exception as e:
+                print(f"Could not requeue running ingestion jobs: {e}")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers if self._pool is not None else 0,
+            "enqueued": self.enqueued,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+# Fed by app.services.file_uploaded; started from the app lifespan
+ingestion_queue = IngestionQueue()
+
+# ------------------------ Status ------------------------>
+
+async def ingestion_status(file_uploaded) -> dict:
+    """Where the file's content is in the pipeline; "not_queued" for file types it doesn't read."""
+    job = None
+    if file_uploaded.sha256:
+        job = await database.collection(IngestionJob).find_one({"sha256": file_uploaded.sha256})
+    status = {
+        "file_id": str(file_uploaded.id),
+        "file_name": file_uploaded.file_name,
+        "sha256": file_uploaded.sha256,
+        "status": job["status"] if job else "not_queued",
+    }
+    if job:
+        status.update({
+            "stage": job.get("stage") or None,
+            "chunks_done": job.get("chunks_done", 0),
+            "chunks_total": job.get("chunks_total", 0),
+            "qa_pairs": job.get("qa_pairs", 0),
+            "attempts": job.get("attempts", 0),
+            "error": job.get("error"),
+            "updated_at": job.get("updated_at"),
+        })
+    return status
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import zipfile
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Ingestion steps, run inside the app.services.ingestion worker processes.
+    They wrap the functions of the QA Lambda (app/aws/Lambda1/ChunkQAHandler.py),
+    in the same order as its handler:
+        - extract    PDF text with pypdf; a ZIP is opened and each PDF in it extracted
+        - redact     spaCy PERSON / ORG entities, e-mail addresses and phone numbers
+        - chunk      token-based chunks (Llama tokenizer), lines mostly [REDACTED] dropped
+        - qa         question-answer pairs for one chunk
+    The Lambda module loads spaCy and transformers when it is imported, so it
+    is only imported here, on first use in each worker process, never in the
+    web process. The tokenizer is loaded once per worker process as well.
+    Ingestion needs the Lambda's packages (app/aws/Lambda1/requirements.txt)
+    and the spaCy en_core_web_md model installed with the backend. The
+    module also creates boto3 clients on import, so AWS_DEFAULT_REGION must
+    be set, even though no AWS call is made here.
+
+    QA pairs are generated through the LLM router's "qa" route. Each worker
+    process has its own router, driven by its own event loop.
+
+    Environment:
+        - INGEST_QA_PAIRS_PER_CHUNK     Pairs asked for per chunk
+        - INGEST_MIN_CHUNK_CHARS        Chunks shorter than this once cleaned are skipped
+        - INGEST_ZIP_MAX_BYTES          Largest total size of the PDFs in a ZIP, uncompressed
+'''
+
+# ------------------------ Configuration ------------------------>
+
+INGEST_QA_PAIRS_PER_CHUNK = int(os.getenv("INGEST_QA_PAIRS_PER_CHUNK", "25"))
+INGEST_MIN_CHUNK_CHARS = int(os.getenv("INGEST_MIN_CHUNK_CHARS", "30"))
+INGEST_ZIP_MAX_BYTES = int(os.getenv("INGEST_ZIP_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+class PermanentFailure(Exception):
+    """Retrying won't help (no text in the file, file gone, ZIP too large)."""
+
+# Per worker process, loaded on first use
+_handler = None
+_chunker = None
+_loop = None
+
+def _pipeline():
+    global _handler
+    if _handler is None:
+        from app.aws.Lambda1 import ChunkQAHandler
+        _handler = ChunkQAHandler
+    return _handler
+
+# ------------------------ Steps ------------------------>
+
+def _zip_pdfs(archive: zipfile.ZipFile) -> list:
+    """The PDF members of a ZIP, checked against INGEST_ZIP_MAX_BYTES before anything is extracted."""
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and info.filename.lower().endswith(".pdf") and not os.path.basename(info.filename).startswith("._")
+    ]
+    # file_size is the declared size; zipfile stops reading a member there, so it can't be exceeded
+    total = sum(info.file_size for info in members)
+    if total > INGEST_ZIP_MAX_BYTES:
+        raise PermanentFailure(f"PDFs in the ZIP add up to {total} bytes uncompressed, more than {INGEST_ZIP_MAX_BYTES}")
+    return members
+
+def extract(path: str, file_name: str) -> list:
+    """(source file, text) for the PDF, or for every PDF in a ZIP. Files without text are left out."""
+    handler = _pipeline()
+    if not file_name.lower().endswith(".zip"):
+        texts = [(file_name, handler.extract_text_from_pdf_local(path))]
+    else:
+        texts = []
+        temp_dir = tempfile.mkdtemp()
+        try:
+            with zipfile.ZipFile(path, "r") as archive:
+                # Only the PDFs are extracted, one at a time, to a fixed name (member paths are never used)
+                members = sorted(_zip_pdfs(archive), key=lambda info: info.filename)
+                target = os.path.join(temp_dir, "member.pdf")
+                for info in members:
+                    with archive.open(info) as source, open(target, "wb") as out:
+                        shutil.copyfileobj(source, out, 1024 * 1024)
+                    texts.append((os.path.basename(info.filename), handler.extract_text_from_pdf_local(target)))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return [(source, text) for source, text in texts if text.strip()]
+
+def redact(text: str) -> str:
+    handler = _pipeline()
+    redacted = handler.redact_entities(text, handler.nlp(text))
+    return handler.redact_emails_and_phones(redacted)
+
+def chunk(text: str) -> list:
+    """(chunk index, cleaned text) for each chunk long enough to generate questions from."""
+    global _chunker
+    handler = _pipeline()
+    if _chunker is None:
+        _chunker = handler.SyntheticDataChunker(max_seq_length=2048, max_generation_tokens=512, overlap=64)
+    chunks = []
+    for index, raw in enumerate(_chunker.chunk_data(text)):
+        cleaned = handler.clean_text_ignore_redacted(raw).strip()
+        if len(cleaned) >= INGEST_MIN_CHUNK_CHARS:
+            chunks.append((index, cleaned))
+    return chunks
+
+def _complete_qa(prompt: str) -> str:
+    global _loop
+    from app.services.llm_client import init_llm_client
+    from app.services.llm_router import llm_router
+
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+        _loop.run_until_complete(init_llm_client())
+    completion = _loop.run_until_complete(llm_router.complete("qa", prompt, temperature=0.7, max_tokens=1024))
+    return completion.text
+
+def generate_qa(text: str) -> list:
+    """List of {"question", "answer"} for one chunk."""
+    pairs = _pipeline().generate_qa_pairs_from_text_groq(text, num_pairs=INGEST_QA_PAIRS_PER_CHUNK, llm_complete=_complete_qa)
+    return [
+        {"question": str(pair["question"]), "answer": str(pair["answer"])}
+        for pair in pairs
+        if isinstance(pair, dict) and pair.get("question") and pair.get("answer")
+    ]
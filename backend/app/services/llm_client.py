@@ -0,0 +1,90 @@
+import httpx
+from groq import AsyncGroq
+from dotenv import load_dotenv
+import os
+
+from app.services.fake_llm import FakeStreamingClient
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    One shared async Groq client for the whole process.
+    Its httpx connection pool is opened in the FastAPI lifespan and reused
+    (keep-alive) by every request, so concurrent questions no longer each
+    hold a threadpool slot while they wait on the upstream API.
+
+    Environment:
+        - CHAT_PROVIDER                 "groq" (default) or "fake" for offline runs
+        - GROQ_BASE_URL                 Override the API host (e.g. a local stand-in server)
+        - LLM_MAX_CONNECTIONS           Total sockets in the pool
+        - LLM_MAX_KEEPALIVE_CONNECTIONS Idle sockets kept open for reuse
+        - LLM_KEEPALIVE_EXPIRY          Seconds an idle socket stays open
+        - LLM_CONNECT_TIMEOUT           Seconds to establish a connection
+        - LLM_POOL_TIMEOUT              Seconds to wait for a free pooled connection
+        - LLM_CALL_TIMEOUT              Default per-call read/write timeout in seconds
+        - LLM_MAX_RETRIES               Retries performed by the Groq SDK
+'''
+
+# ------------------------ Configuration ------------------------>
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "200"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "50"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_POOL_TIMEOUT = float(os.getenv("LLM_POOL_TIMEOUT", "10"))
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# Module-level private variables for singleton pattern
+_http_client = None
+_client = None
+
+# ------------------------ Timeouts ------------------------>
+
+def call_timeout(seconds: float = LLM_CALL_TIMEOUT) -> httpx.Timeout:
+    """Timeout for a single LLM call; connect and pool waits keep their own limits."""
+    return httpx.Timeout(seconds, connect=LLM_CONNECT_TIMEOUT, pool=LLM_POOL_TIMEOUT)
+
+# ------------------------ Lifecycle ------------------------>
+
+async def init_llm_client():
+    """Open the shared connection pool. Called once from the app lifespan."""
+    global _http_client, _client
+    if _client is not None:
+        return _client
+
+    if os.getenv("CHAT_PROVIDER", "groq") == "fake":
+        _client = FakeStreamingClient()
+        return _client
+
+    _http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=call_timeout(),
+    )
+    _client = AsyncGroq(
+        api_key=os.getenv("API_KEY"),
+        http_client=_http_client,
+        max_retries=LLM_MAX_RETRIES,
+    )
+    print("LLM client pool opened.")
+    return _client
+
+async def close_llm_client():
+    """Close the shared connection pool. Called once on app shutdown."""
+    global _http_client, _client
+    if _http_client is not None:
+        await _http_client.aclose()
+        print("LLM client pool closed.")
+    _http_client = None
+    _client = None
+
+def get_llm_client():
+    if _client is None:
+        raise RuntimeError("LLM client is not initialized; it is opened in the app lifespan")
+    return _client
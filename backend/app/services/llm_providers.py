@@ -0,0 +1,249 @@
+import asyncio
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.services.llm_client import get_llm_client, call_timeout
+from app.services.batch_scheduler import MicroBatcher
+
+# ------------------------------------------------------------->
+
+'''
+    LLM provider abstraction.
+    Every upstream (Groq, local Ollama, test stubs) exposes the same calls:
+        - complete(model, prompt, **params)        -> Completion
+        - complete_batch(model, prompts, **params) -> list of Completion (or exception) per prompt
+        - stream(model, prompt, **params)          -> async iterator of CompletionChunk
+    Supported params: temperature, max_tokens, top_p.
+'''
+
+# ------------------------------------------------------------->
+
+@dataclass
+class Completion:
+    text: str
+    usage: dict = field(default_factory=dict)
+    provider: str = ""
+    model: str = ""
+
+@dataclass
+class CompletionChunk:
+    text: str = ""
+    usage: Optional[dict] = None  # Only set on the last chunk, when the provider reports it
+    provider: str = ""
+    model: str = ""
+
+class LLMProviderError(Exception):
+    pass
+
+def usage_dict(prompt_tokens=None, completion_tokens=None) -> dict:
+    total = None
+    if prompt_tokens is not None and completion_tokens is not None:
+        total = prompt_tokens + completion_tokens
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total,
+    }
+
+class LLMProvider:
+    """One upstream LLM service."""
+
+    name = "base"
+
+    async def complete(self, model: str, prompt: str, **params) -> Completion:
+        raise NotImplementedError
+
+    async def complete_batch(self, model: str, prompts: list, **params) -> list:
+        """Complete several prompts together; without a batch API they are sent concurrently."""
+        return await asyncio.gather(*(self.complete(model, prompt, **params) for prompt in prompts), return_exceptions=True)
+
+    async def stream(self, model: str, prompt: str, **params):
+        raise NotImplementedError
+        yield
+
+# ------------------------ Groq ------------------------>
+
+def _groq_usage(usage) -> dict:
+    return usage_dict(getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None))
+
+def _groq_chunk_usage(chunk):
+    # Groq puts the usage of a streamed completion on the last chunk under `x_groq`
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+    return usage
+
+class GroqProvider(LLMProvider):
+    """Groq chat completions over the shared async client from `llm_client`."""
+
+    name = "groq"
+
+    def _request(self, model: str, prompt: str, temperature=1, max_tokens=1024, top_p=1) -> dict:
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_completion_tokens": max_tokens,
+            "top_p": top_p,
+            "stop": None,
+            "timeout": call_timeout(),
+        }
+
+    async def complete(self, model: str, prompt: str, **params) -> Completion:
+        completion = await get_llm_client().chat.completions.create(stream=False, **self._request(model, prompt, **params))
+        return Completion(completion.choices[0].message.content, _groq_usage(completion.usage), self.name, model)
+
+    async def stream(self, model: str, prompt: str, **params):
+        stream = await get_llm_client().chat.completions.create(stream=True, **self._request(model, prompt, **params))
+        usage = None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield CompletionChunk(chunk.choices[0].delta.content, provider=self.name, model=model)
+            usage = _groq_chunk_usage(chunk) or usage
+        yield CompletionChunk(usage=_groq_usage(usage), provider=self.name, model=model)
+
+# ------------------------ Ollama ------------------------>
+
+class OllamaProvider(LLMProvider):
+    """Local models served by Ollama, through LangChain's `OllamaLLM`.
+
+    `complete_batch` sends the prompts concurrently; the Ollama server decodes up to
+    OLLAMA_NUM_PARALLEL sequences together in one batch.
+    """
+
+    name = "ollama"
+
+    def __init__(self):
+        self._models = {}
+
+    def _llm(self, model: str, temperature=None, max_tokens=None, top_p=None):
+        key = (model, temperature, max_tokens, top_p)
+        if key not in self._models:
+            from langchain_ollama.llms import OllamaLLM
+            self._models[key] = OllamaLLM(model=model, temperature=temperature, num_predict=max_tokens, top_p=top_p)
+        return self._models[key]
+
+    async def complete(self, model: str, prompt: str, **params) -> Completion:
+        result = await self._llm(model, **params).agenerate([prompt])
+        generation = result.generations[0][0]
+        info = generation.generation_info or {}
+        usage = usage_dict(info.get("prompt_eval_count"), info.get("eval_count"))
+        return Completion(generation.text, usage, self.name, model)
+
+    async def stream(self, model: str, prompt: str, **params):
+        stream = self._llm(model, **params).astream(prompt)
+        try:
+            async for text in stream:
+                yield CompletionChunk(text, provider=self.name, model=model)
+        finally:
+            # Stop generation upstream when the consumer stops early
+            await stream.aclose()
+
+# ------------------------ Batching ------------------------>
+
+class BatchingProvider(LLMProvider):
+    """Wrap a provider so concurrent `complete()` calls are grouped by a MicroBatcher.
+
+    Calls with the same model and params share a batcher. Streams are not batched:
+    `stream()` goes straight to the wrapped provider (see batch_scheduler).
+    """
+
+    def __init__(self, provider: LLMProvider, **batcher_options):
+        self.provider = provider
+        self.name = provider.name
+        self._batcher_options = batcher_options
+        self._batchers = {}
+
+    def _batcher(self, model: str, params: dict) -> MicroBatcher:
+        key = (model, tuple(sorted(params.items())))
+        if key not in self._batchers:
+            async def run_batch(prompts):
+                return await self.provider.complete_batch(model, prompts, **params)
+            self._batchers[key] = MicroBatcher(run_batch, **self._batcher_options)
+        return self._batchers[key]
+
+    async def complete(self, model: str, prompt: str, **params) -> Completion:
+        return await self._batcher(model, params).submit(prompt)
+
+    async def complete_batch(self, model: str, prompts: list, **params) -> list:
+        return await self.provider.complete_batch(model, prompts, **params)
+
+    async def stream(self, model: str, prompt: str, **params):
+        stream = self.provider.stream(model, prompt, **params)
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def aclose(self):
+        for batcher in self._batchers.values():
+            await batcher.close()
+
+    def stats(self) -> dict:
+        return {model: batcher.stats() for (model, _), batcher in self._batchers.items()}
+
+# ------------------------ Stubs ------------------------>
+
+def fixed_latency(seconds: float):
+    return lambda: seconds
+
+def lognormal_latency(median: float, sigma: float = 0.5, rng: random.Random = None):
+    """Right-skewed latency: half the calls are faster than `median`, with a long tail."""
+    rng = rng or random.Random()
+    mu = math.log(median)
+    return lambda: rng.lognormvariate(mu, sigma)
+
+class StubProvider(LLMProvider):
+    """Offline provider with a configurable latency distribution and error rate, for routing tests."""
+
+    def __init__(self, name: str, latency=fixed_latency(0.05), error_rate: float = 0.0,
+                 reply: str = "Stub answer from the test provider.", token_delay: float = 0.0,
+                 parallel: int = 0, parallel_cost: float = 0.0, rng: random.Random = None):
+        self.name = name
+        self.latency = latency
+        # Like a local model server: at most `parallel` calls run at once (0: no limit), the
+        # rest wait, and each call running alongside adds `parallel_cost` of a call's latency
+        self.parallel = parallel
+        self.parallel_cost = parallel_cost
+        self._slots = None
+        self._running = 0
+        self.error_rate = error_rate
+        self.reply = reply
+        self.token_delay = token_delay
+        self.rng = rng or random.Random()
+        self.calls = 0
+
+    async def _wait_or_fail(self):
+        self.calls += 1
+        if self.parallel and self._slots is None:
+            self._slots = asyncio.Semaphore(self.parallel)
+        if self._slots is not None:
+            await self._slots.acquire()
+        self._running += 1
+        try:
+            await asyncio.sleep(self.latency() * (1 + self.parallel_cost * (self._running - 1)))
+        finally:
+            self._running -= 1
+            if self._slots is not None:
+                self._slots.release()
+        if self.rng.random() < self.error_rate:
+            raise LLMProviderError(f"{self.name} stub failure")
+
+    def _usage(self, prompt: str) -> dict:
+        return usage_dict(len(prompt.split()), len(self.reply.split()))
+
+    async def complete(self, model: str, prompt: str, **params) -> Completion:
+        await self._wait_or_fail()
+        return Completion(self.reply, self._usage(prompt), self.name, model)
+
+    async def stream(self, model: str, prompt: str, **params):
+        # The sampled latency is the time to first token
+        await self._wait_or_fail()
+        for index, word in enumerate(self.reply.split(" ")):
+            if index and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield CompletionChunk(word if index == 0 else " " + word, provider=self.name, model=model)
+        yield CompletionChunk(usage=self._usage(prompt), provider=self.name, model=model)
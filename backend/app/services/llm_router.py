@@ -0,0 +1,389 @@
+import asyncio
+import json
+import time
+from collections import deque
+from dotenv import load_dotenv
+import os
+
+from app.services.llm_providers import GroqProvider, OllamaProvider, BatchingProvider
+from app.services.batch_scheduler import OLLAMA_BATCH_ENABLED
+from app.services.metrics import observe_llm_call, observe_llm_ttft
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Latency-aware LLM router.
+    A route (e.g. "chat", "hint", "qa") lists the (provider, model) targets
+    that can serve it. For every call the router:
+        - ranks the targets by recent median latency, penalised by error rate,
+          skipping targets in cooldown and providers at their concurrency cap
+        - calls the best one and, if it has not answered by its own p95
+          (time to first token for streams), sends one hedged backup request
+          to the next target and keeps whichever answers first
+        - fails over to the next target when a call errors
+
+    Environment:
+        - LLM_ROUTES                JSON {"route": ["provider:model", ...]}
+        - LLM_PROVIDER_CONCURRENCY  JSON {"provider": max in-flight calls}
+        - LLM_WINDOW_SIZE           Calls remembered per target
+        - LLM_MIN_SAMPLES           Calls needed before the p95 deadline is trusted
+        - LLM_HEDGE_ENABLED         "true" (default) or "false"
+        - LLM_HEDGE_MIN_DELAY       Floor on the hedge deadline, in seconds
+        - LLM_HEDGE_DEFAULT_DELAY   Hedge deadline while a target has too few samples
+        - LLM_MAX_ERROR_RATE        Error rate that puts a target in cooldown
+        - LLM_COOLDOWN_SECONDS      How long an unhealthy target is skipped
+        - LLM_CALL_TIMEOUT          Per-call timeout, in seconds
+'''
+
+# ------------------------ Configuration ------------------------>
+
+DEFAULT_ROUTES = {
+    "chat": ["groq:meta-llama/llama-4-scout-17b-16e-instruct", "ollama:llama3.2"],
+    "hint": ["ollama:deepseek-r1", "groq:deepseek-r1-distill-llama-70b"],
+    "qa": ["groq:meta-llama/llama-4-scout-17b-16e-instruct"],
+}
+DEFAULT_PROVIDER_CONCURRENCY = {"groq": 64, "ollama": 16}
+
+LLM_ROUTES = json.loads(os.getenv("LLM_ROUTES", "null")) or DEFAULT_ROUTES
+LLM_PROVIDER_CONCURRENCY = json.loads(os.getenv("LLM_PROVIDER_CONCURRENCY", "null")) or DEFAULT_PROVIDER_CONCURRENCY
+LLM_WINDOW_SIZE = int(os.getenv("LLM_WINDOW_SIZE", "200"))
+LLM_MIN_SAMPLES = int(os.getenv("LLM_MIN_SAMPLES", "20"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.25"))
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "10"))
+LLM_MAX_ERROR_RATE = float(os.getenv("LLM_MAX_ERROR_RATE", "0.5"))
+LLM_COOLDOWN_SECONDS = float(os.getenv("LLM_COOLDOWN_SECONDS", "30"))
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
+
+class LLMUnavailableError(Exception):
+    pass
+
+# ------------------------ Latency window ------------------------>
+
+class LatencyWindow:
+    """The last N calls of one target: latency in seconds and whether it succeeded."""
+
+    def __init__(self, size: int = LLM_WINDOW_SIZE):
+        self._samples = deque(maxlen=size)
+
+    def record(self, latency: float, ok: bool) -> None:
+        self._samples.append((latency, ok))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float):
+        """q-th percentile (0-100) of successful calls, or None without samples."""
+        latencies = sorted(latency for latency, ok in self._samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q / 100))]
+
+    def error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+class _Target:
+    """Per (provider, model) health and counters, shared by every route that uses it."""
+
+    def __init__(self, provider, model: str, window_size: int):
+        self.provider = provider
+        self.model = model
+        self.latency = LatencyWindow(window_size)  # Total latency of complete() calls
+        self.ttft = LatencyWindow(window_size)  # Time to first token of stream() calls
+        self.unhealthy_until = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider.name}:{self.model}"
+
+# ------------------------ Router ------------------------>
+
+class LLMRouter:
+    def __init__(
+        self,
+        providers: dict,
+        routes: dict,
+        concurrency: dict = None,
+        window_size: int = LLM_WINDOW_SIZE,
+        min_samples: int = LLM_MIN_SAMPLES,
+        hedge: bool = LLM_HEDGE_ENABLED,
+        hedge_min_delay: float = LLM_HEDGE_MIN_DELAY,
+        hedge_default_delay: float = LLM_HEDGE_DEFAULT_DELAY,
+        max_error_rate: float = LLM_MAX_ERROR_RATE,
+        cooldown_seconds: float = LLM_COOLDOWN_SECONDS,
+        call_timeout: float = LLM_CALL_TIMEOUT,
+        clock=time.monotonic,
+    ):
+        self.providers = providers
+        self.min_samples = min_samples
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.max_error_rate = max_error_rate
+        self.cooldown_seconds = cooldown_seconds
+        self.call_timeout = call_timeout
+        self._clock = clock
+
+        self._targets = {}
+        self.routes = {}
+        for route, specs in routes.items():
+            self.routes[route] = []
+            for spec in specs:
+                provider_name, model = spec.split(":", 1)
+                key = (provider_name, model)
+                if key not in self._targets:
+                    self._targets[key] = _Target(providers[provider_name], model, window_size)
+                self.routes[route].append(self._targets[key])
+
+        concurrency = concurrency or {}
+        self._limits = {name: concurrency.get(name, 64) for name in providers}
+        self._slots = {name: asyncio.Semaphore(limit) for name, limit in self._limits.items()}
+        self._in_flight = {name: 0 for name in providers}
+
+    # ------------------------ Selection ------------------------>
+
+    def _healthy(self, target: _Target) -> bool:
+        return target.unhealthy_until <= self._clock()
+
+    def _score(self, target: _Target, window: str) -> float:
+        samples = getattr(target, window)
+        if not len(samples):
+            return 0.0  # Untried targets get one call to measure them
+        p50 = samples.percentile(50)
+        if p50 is None:
+            return float("inf")  # Only failures so far
+        return p50 / max(0.1, 1.0 - samples.error_rate())
+
+    def rank(self, route: str, window: str = "latency") -> list:
+        """Targets of a route, best first."""
+        if route not in self.routes:
+            raise LLMUnavailableError(f"Unknown LLM route: {route}")
+
+        def sort_key(item):
+            position, target = item
+            full = self._in_flight[target.provider.name] >= self._limits[target.provider.name]
+            return (not self._healthy(target), full, self._score(target, window), position)
+
+        return [target for _, target in sorted(enumerate(self.routes[route]), key=sort_key)]
+
+    def _hedge_delay(self, target: _Target, window: str) -> float:
+        samples = getattr(target, window)
+        if len(samples) < self.min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, samples.percentile(95) or 0.0)
+
+    # ------------------------ Bookkeeping ------------------------>
+
+    def _record(self, target: _Target, window: str, latency: float, ok: bool) -> None:
+        samples = getattr(target, window)
+        samples.record(latency, ok)
+        if ok:
+            return
+        target.errors += 1
+        if len(samples) >= 5 and samples.error_rate() >= self.max_error_rate:
+            target.unhealthy_until = self._clock() + self.cooldown_seconds
+
+    async def _acquire(self, target: _Target) -> None:
+        await self._slots[target.provider.name].acquire()
+        self._in_flight[target.provider.name] += 1
+
+    def _release(self, target: _Target) -> None:
+        self._in_flight[target.provider.name] -= 1
+        self._slots[target.provider.name].release()
+
+    # ------------------------ Racing ------------------------>
+
+    async def _race(self, targets: list, start, window: str, discard=None):
+        """Run `start(target)` on the best target, hedging once and failing over in rank order.
+
+        Returns the first successful result; the other attempts are cancelled and any
+        result that completes alongside the winner is handed to `discard`.
+        """
+        pending = {}
+        errors = []
+        queue = list(targets)
+        hedged = False
+
+        def launch(is_hedge: bool = False):
+            target = queue.pop(0)
+            target.calls += 1
+            if is_hedge:
+                target.hedges += 1
+            pending[asyncio.ensure_future(start(target))] = (target, is_hedge)
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and not hedged and queue and len(pending) == 1:
+                    primary, _ = next(iter(pending.values()))
+                    timeout = self._hedge_delay(primary, window)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedged = True
+                    launch(is_hedge=True)
+                    continue
+
+                winner = None
+                for task in done:
+                    target, is_hedge = pending.pop(task)
+                    if task.exception() is not None:
+                        errors.append(f"{target.label}: {task.exception()!r}")
+                    elif winner is None:
+                        winner = task.result()
+                        if is_hedge:
+                            target.hedge_wins += 1
+                    elif discard is not None:
+                        await discard(task.result())
+                if winner is not None:
+                    return winner
+                if not pending and queue:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                results = await asyncio.gather(*pending, return_exceptions=True)
+                if discard is not None:
+                    for result in results:
+                        if not isinstance(result, BaseException):
+                            await discard(result)
+
+        raise LLMUnavailableError("All LLM providers failed: " + "; ".join(errors))
+
+    # ------------------------ Complete ------------------------>
+
+    async def _complete_on(self, target: _Target, prompt: str, params: dict):
+        await self._acquire(target)
+        started = self._clock()
+        try:
+            result = await asyncio.wait_for(
+                target.provider.complete(target.model, prompt, **params), self.call_timeout
+            )
+        except asyncio.CancelledError:
+            observe_llm_call(target.provider.name, target.model, "complete", self._clock() - started, "cancelled")
+            raise  # Lost a hedge race; not a provider failure
+        except Exception:
+            self._record(target, "latency", self._clock() - started, ok=False)
+            observe_llm_call(target.provider.name, target.model, "complete", self._clock() - started, "error")
+            raise
+        finally:
+            self._release(target)
+        latency = self._clock() - started
+        self._record(target, "latency", latency, ok=True)
+        observe_llm_call(target.provider.name, target.model, "complete", latency, "ok", result.usage)
+        return result
+
+    async def complete(self, route: str, prompt: str, **params):
+        """Return a `Completion` from the fastest healthy target of the route."""
+        targets = self.rank(route, "latency")
+        return await self._race(targets, lambda target: self._complete_on(target, prompt, params), "latency")
+
+    # ------------------------ Stream ------------------------>
+
+    async def _open_stream(self, target: _Target, prompt: str, params: dict):
+        """Start a stream and wait for its first chunk. The caller owns the slot on success."""
+        await self._acquire(target)
+        started = self._clock()
+        stream = target.provider.stream(target.model, prompt, **params)
+        try:
+            first = await asyncio.wait_for(stream.__anext__(), self.call_timeout)
+        except StopAsyncIteration:
+            first = None
+        except BaseException as e:
+            outcome = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            if outcome == "error":
+                self._record(target, "ttft", self._clock() - started, ok=False)
+            observe_llm_call(target.provider.name, target.model, "stream", self._clock() - started, outcome)
+            await stream.aclose()
+            self._release(target)
+            raise
+        ttft = self._clock() - started
+        self._record(target, "ttft", ttft, ok=True)
+        observe_llm_ttft(target.provider.name, target.model, ttft)
+        return target, stream, first, started
+
+    async def _close_stream(self, opened) -> None:
+        target, stream = opened[:2]
+        await stream.aclose()
+        self._release(target)
+
+    async def stream(self, route: str, prompt: str, **params):
+        """Yield `CompletionChunk`s from the target with the fastest first token."""
+        targets = self.rank(route, "ttft")
+        opened = await self._race(
+            targets,
+            lambda target: self._open_stream(target, prompt, params),
+            "ttft",
+            discard=self._close_stream,
+        )
+        target, stream, first, opened_at = opened
+        started = self._clock()
+        usage = None
+        outcome = "cancelled"  # Unless it runs to the end or fails; the consumer stopped early
+        try:
+            if first is not None:
+                usage = first.usage or usage
+                yield first
+            async for chunk in stream:
+                usage = chunk.usage or usage
+                yield chunk
+            outcome = "ok"
+        except Exception:
+            outcome = "error"
+            # Too late to fail over once text has been sent; count it against the target
+            self._record(target, "ttft", self._clock() - started, ok=False)
+            raise
+        finally:
+            observe_llm_call(target.provider.name, target.model, "stream", self._clock() - opened_at, outcome, usage)
+            await self._close_stream(opened)
+
+    # ------------------------ Stats ------------------------>
+
+    def stats(self) -> dict:
+        targets = {}
+        for target in self._targets.values():
+            targets[target.label] = {
+                "healthy": self._healthy(target),
+                "calls": target.calls,
+                "errors": target.errors,
+                "error_rate": target.latency.error_rate(),
+                "p50": target.latency.percentile(50),
+                "p95": target.latency.percentile(95),
+                "ttft_p50": target.ttft.percentile(50),
+                "ttft_p95": target.ttft.percentile(95),
+                "hedges": target.hedges,
+                "hedge_wins": target.hedge_wins,
+            }
+        return {
+            "routes": {route: [target.label for target in targets_] for route, targets_ in self.routes.items()},
+            "in_flight": dict(self._in_flight),
+            "targets": targets,
+            "batching": {name: provider.stats() for name, provider in self.providers.items() if hasattr(provider, "stats")},
+        }
+
+    async def aclose(self):
+        """Stop provider background work (e.g. batch dispatchers). Called on app shutdown."""
+        for provider in self.providers.values():
+            if hasattr(provider, "aclose"):
+                await provider.aclose()
+
+# Shared by the chat, hint and QA-generation call sites
+# Local Ollama calls are micro-batched only if OLLAMA_BATCH_ENABLED (see batch_scheduler); Groq calls go straight out
+llm_router = LLMRouter(
+    providers={
+        "groq": GroqProvider(),
+        "ollama": BatchingProvider(OllamaProvider()) if OLLAMA_BATCH_ENABLED else OllamaProvider(),
+    },
+    routes=LLM_ROUTES,
+    concurrency=LLM_PROVIDER_CONCURRENCY,
+)
@@ -0,0 +1,196 @@
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# ------------------------------------------------------------->
+
+'''
+    Prometheus metrics for the backend, served on GET /metrics.
+        - HTTP: per-route latency histogram, in-flight gauge, status counter
+          (recorded by app.middleware.metrics)
+        - LLM: per provider/model call latency, time to first token, tokens and
+          outcomes (recorded by app.services.llm_router for every chat, hint and
+          QA-generation call)
+        - Chat history: write-behind flush latency (app.services.chat_history)
+        - Caches, single-flight, batching, router health, the password pool
+          and the chat-history buffer, read from their own counters at scrape time
+'''
+
+# ------------------------------------------------------------->
+
+REGISTRY = CollectorRegistry()
+
+# Request latencies range from cache hits (sub-millisecond) to long LLM streams
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# ------------------------ HTTP ------------------------>
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the response body is sent",
+    ["method", "route"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served",
+    ["method"], registry=REGISTRY,
+)
+HTTP_REQUESTS = Counter(
+    "http_requests", "HTTP responses by status code",
+    ["method", "route", "status"], registry=REGISTRY,
+)
+
+# ------------------------ LLM ------------------------>
+
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds", "Total LLM call latency",
+    ["provider", "model", "kind"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds", "Time until the first streamed chunk arrives",
+    ["provider", "model"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+LLM_REQUESTS = Counter(
+    "llm_requests", "LLM calls by outcome (ok, error, cancelled)",
+    ["provider", "model", "kind", "outcome"], registry=REGISTRY,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens", "Tokens reported by the provider",
+    ["provider", "model", "type"], registry=REGISTRY,
+)
+
+def observe_llm_call(provider: str, model: str, kind: str, seconds: float, outcome: str, usage: dict = None) -> None:
+    """Record one finished LLM call; `kind` is "complete" or "stream"."""
+    LLM_REQUESTS.labels(provider, model, kind, outcome).inc()
+    if outcome != "ok":
+        return
+    LLM_REQUEST_DURATION.labels(provider, model, kind).observe(seconds)
+    if usage:
+        if usage.get("prompt_tokens"):
+            LLM_TOKENS.labels(provider, model, "prompt").inc(usage["prompt_tokens"])
+        if usage.get("completion_tokens"):
+            LLM_TOKENS.labels(provider, model, "completion").inc(usage["completion_tokens"])
+
+def observe_llm_ttft(provider: str, model: str, seconds: float) -> None:
+    LLM_TIME_TO_FIRST_TOKEN.labels(provider, model).observe(seconds)
+
+# ------------------------ Chat history ------------------------>
+
+CHAT_HISTORY_FLUSH_DURATION = Histogram(
+    "chat_history_flush_duration_seconds", "Time to write one batch of chat exchanges with insert_many",
+    buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+
+# ------------------------ Component stats ------------------------>
+
+class _ComponentStatsCollector:
+    """Expose the counters the caches, single-flight and router already keep."""
+
+    def collect(self):
+        # Imported here so this module stays importable from those components
+        from app.services.response_cache import response_cache
+        from app.services.semantic_cache import semantic_cache
+        from app.services.single_flight import llm_flights
+        from app.services.llm_router import llm_router
+        from app.auth.token_cache import token_claims_cache
+        from app.services.user_cache import user_cache
+        from app.services import password_hasher
+        from app.services.chat_history import chat_history_writer
+        from app.services.ingestion import ingestion_queue
+
+        cache_lookups = CounterMetricFamily("cache_lookups", "Cache lookups by result", labels=["cache", "result"])
+        cache_removals = CounterMetricFamily("cache_removals", "Entries removed from a cache by reason", labels=["cache", "reason"])
+        cache_entries = GaugeMetricFamily("cache_entries", "Entries currently cached", labels=["cache"])
+
+        response = response_cache.stats()
+        cache_lookups.add_metric(["response", "hit"], response["hits"])
+        cache_lookups.add_metric(["response", "miss"], response["misses"])
+        cache_removals.add_metric(["response", "evicted"], response["evictions"])
+        cache_removals.add_metric(["response", "expired"], response["expirations"])
+        cache_removals.add_metric(["response", "invalidated"], response["invalidations"])
+        cache_entries.add_metric(["response"], response["entries"])
+
+        semantic = semantic_cache.stats()
+        cache_lookups.add_metric(["semantic", "hit"], semantic["hits"])
+        cache_lookups.add_metric(["semantic", "miss"], semantic["misses"])
+        cache_removals.add_metric(["semantic", "evicted"], semantic["evictions"])
+        cache_entries.add_metric(["semantic"], semantic["entries"])
+
+        tokens = token_claims_cache.stats()
+        cache_lookups.add_metric(["token", "hit"], tokens["hits"])
+        cache_lookups.add_metric(["token", "miss"], tokens["misses"])
+        cache_removals.add_metric(["token", "evicted"], tokens["evictions"])
+        cache_removals.add_metric(["token", "expired"], tokens["expirations"])
+        cache_removals.add_metric(["token", "invalidated"], tokens["invalidations"])
+        cache_entries.add_metric(["token"], tokens["entries"])
+
+        users = user_cache.stats()
+        cache_lookups.add_metric(["user", "hit"], users["hits"])
+        cache_lookups.add_metric(["user", "miss"], users["misses"])
+        cache_removals.add_metric(["user", "evicted"], users["evictions"])
+        cache_removals.add_metric(["user", "expired"], users["expirations"])
+        cache_removals.add_metric(["user", "invalidated"], users["invalidations"])
+        cache_entries.add_metric(["user"], users["entries"])
+        cache_bytes = GaugeMetricFamily("cache_bytes", "Approximate memory held by cache entries", labels=["cache"])
+        cache_bytes.add_metric(["user"], users["bytes"])
+        yield cache_lookups
+        yield cache_removals
+        yield cache_entries
+        yield cache_bytes
+
+        flights = llm_flights.stats()
+        calls = CounterMetricFamily("single_flight_calls", "Upstream calls started vs. collapsed into one", labels=["mode", "result"])
+        calls.add_metric(["call", "started"], flights["calls"])
+        calls.add_metric(["call", "collapsed"], flights["collapsed"])
+        calls.add_metric(["stream", "started"], flights["streams"])
+        calls.add_metric(["stream", "collapsed"], flights["stream_collapsed"])
+        yield calls
+
+        router = llm_router.stats()
+        healthy = GaugeMetricFamily("llm_target_healthy", "1 if the router currently routes to this target", labels=["target"])
+        hedges = CounterMetricFamily("llm_hedges", "Hedged backup requests by result", labels=["target", "result"])
+        for label, target in router["targets"].items():
+            healthy.add_metric([label], 1 if target["healthy"] else 0)
+            hedges.add_metric([label, "sent"], target["hedges"])
+            hedges.add_metric([label, "won"], target["hedge_wins"])
+        in_flight = GaugeMetricFamily("llm_provider_in_flight", "LLM calls in flight per provider", labels=["provider"])
+        for provider, count in router["in_flight"].items():
+            in_flight.add_metric([provider], count)
+        batches = CounterMetricFamily("llm_batches", "Micro-batches sent to local models", labels=["provider", "model"])
+        batched = CounterMetricFamily("llm_batched_requests", "Requests sent inside micro-batches", labels=["provider", "model"])
+        for provider, models in router["batching"].items():
+            for model, batch in models.items():
+                batches.add_metric([provider, model], batch["batches"])
+                batched.add_metric([provider, model], batch["items"])
+        yield healthy
+        yield hedges
+        yield in_flight
+        yield batches
+        yield batched
+
+        hashing = password_hasher.stats()
+        hash_in_flight = GaugeMetricFamily("password_hash_in_flight", "bcrypt jobs running or queued in the worker pool")
+        hash_in_flight.add_metric([], hashing["in_flight"])
+        hash_rejected = CounterMetricFamily("password_hash_rejected", "bcrypt jobs refused with 503 because the queue was full")
+        hash_rejected.add_metric([], hashing["rejected"])
+        yield hash_in_flight
+        yield hash_rejected
+
+        history = chat_history_writer.stats()
+        exchanges = CounterMetricFamily("chat_history_exchanges", "Chat exchanges by what happened to them", labels=["result"])
+        exchanges.add_metric(["queued"], history["queued"])
+        exchanges.add_metric(["written"], history["written"])
+        exchanges.add_metric(["dropped"], history["dropped"])
+        flushes = CounterMetricFamily("chat_history_flushes", "insert_many batches by outcome", labels=["outcome"])
+        flushes.add_metric(["ok"], history["flushes"])
+        flushes.add_metric(["failed"], history["failed_flushes"])
+        buffered = GaugeMetricFamily("chat_history_buffered", "Chat exchanges waiting to be written")
+        buffered.add_metric([], history["buffered"])
+        yield exchanges
+        yield flushes
+        yield buffered
+
+        ingestion = ingestion_queue.stats()
+        jobs = CounterMetricFamily("ingestion_jobs", "Ingestion jobs handled by this process, by outcome", labels=["outcome"])
+        for outcome in ("enqueued", "deduplicated", "completed", "retried", "failed"):
+            jobs.add_metric([outcome], ingestion[outcome])
+        yield jobs
+
+REGISTRY.register(_ComponentStatsCollector())
@@ -1,29 +1,72 @@
-from groq import Groq
-from dotenv import load_dotenv
-import os
+from app.services.llm_providers import usage_dict
+from app.services.llm_router import llm_router
+from app.services.response_cache import response_cache, make_key
+from app.services.single_flight import llm_flights
+from app.services.unit_catalog import unit_catalog
 
-load_dotenv()
+CHAT_ROUTE = "chat"  # Providers and models for this route are configured in llm_router
+CHAT_PROMPT_VERSION = "v2"  # Bump whenever build_prompt changes so cached answers are not reused
 
-# Initialize the Groq client with the API key
-client = Groq(api_key=os.getenv('API_KEY'))
+def _cache_key(request) -> tuple:
+    return make_key(request.unit_name, request.message, CHAT_ROUTE, CHAT_PROMPT_VERSION)
 
-def post_questions_service(request):
+def build_prompt(request) -> str:
+    # What the unit covers, when the catalog knows it (an in-memory lookup, no database read)
+    unit = unit_catalog.get(request.unit_name)
+    context = f" The unit {unit.unit_name} ({unit.year}, semester {unit.semester}) covers: {unit.description}" if unit else ""
+    return f""" As you are the tutor of unit named {request.unit_name}, you will have to answer all student questions from the  {request.unit_name} context. Please try to answer in the unit {request.unit_name} content.{context} Question: {request.message}"""
 
-    prompt = f""" As you are the tutor of unit named {request.unit_name}, you will have to answer all student questions from the  {request.unit_name} context. Please try to answer in the unit {request.unit_name} content. Question: {request.message}"""
+async def _complete(request) -> str:
+
+    prompt = build_prompt(request)
 
     print(prompt)
-    completion = client.chat.completions.create(
-        model="meta-llama/llama-4-scout-17b-16e-instruct",
-        messages=[
-            {"role": "user", "content": prompt}
-        ],
-        temperature=1,
-        max_completion_tokens=1024,
-        top_p=1,
-        stream=False,  # We can set this to False to get the full response at once
-        stop=None
-    )
-    # Access the message from the response correctly
-    message = completion.choices[0].message.content 
-
-    return message
+    completion = await llm_router.complete(CHAT_ROUTE, prompt, temperature=1, max_tokens=1024, top_p=1)
+
+    response_cache.set(_cache_key(request), {"text": completion.text, "usage": completion.usage})
+    return completion.text
+
+async def post_questions_service(request, use_cache: bool = True):
+
+    key = _cache_key(request)
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached["text"]
+
+    # Identical questions asked at the same time share one upstream call
+    return await llm_flights.do(("chat",) + key, lambda: _complete(request))
+
+# ------------------------ Streaming ------------------------>
+
+async def _stream_completion(request):
+
+    prompt = build_prompt(request)
+
+    parts = []
+    usage = usage_dict()
+    async for chunk in llm_router.stream(CHAT_ROUTE, prompt, temperature=1, max_tokens=1024, top_p=1):
+        if chunk.text:
+            parts.append(chunk.text)
+            yield {"type": "token", "text": chunk.text}
+        if chunk.usage:
+            usage = chunk.usage
+
+    text = "".join(parts)
+    response_cache.set(_cache_key(request), {"text": text, "usage": usage})
+    yield {"type": "done", "text": text, "usage": usage, "cached": False}
+
+async def stream_questions_service(request, use_cache: bool = True):
+    """Yield the answer token by token, then one final event with the full text and usage."""
+
+    key = _cache_key(request)
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield {"type": "token", "text": cached["text"]}
+            yield {"type": "done", "text": cached["text"], "usage": cached["usage"], "cached": True}
+            return
+
+    # Identical questions streamed at the same time share one upstream stream
+    async for event in llm_flights.stream(("chat-stream",) + key, lambda: _stream_completion(request)):
+        yield dict(event)
@@ -0,0 +1,126 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    bcrypt off the event loop.
+    A bcrypt hash or verify takes a few hundred milliseconds of CPU. Run
+    inline in an async endpoint, it stalls every other request. Here it runs
+    in a small process pool opened in the FastAPI lifespan. Requests past the
+    queue limit are rejected straight away with 503 + Retry-After instead of
+    piling up behind a login storm.
+
+    Bulk hashing (roster imports) runs in small chunks, at most one per
+    worker at a time, so logins queue behind one chunk rather than the
+    whole roster.
+
+    Environment:
+        - PASSWORD_HASH_WORKERS     Worker processes (default: min(4, CPU count))
+        - PASSWORD_HASH_MAX_QUEUE   Hash/verify jobs allowed to wait for a worker
+        - PASSWORD_HASH_RETRY_AFTER Seconds suggested to clients in the 503 Retry-After header
+'''
+
+# ------------------------ Configuration ------------------------>
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "2"))
+
+# Passwords per bulk job: big enough to amortise the round trip to the worker, small enough that a login waits ~1 s at most
+BULK_HASH_CHUNK_SIZE = 4
+
+# Context for password  |  Algorithm: bcrypt
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Module-level private variables for singleton pattern
+_pool = None
+_bulk_slots = None
+_in_flight = 0
+_rejected = 0
+
+# ------------------------ Worker functions ------------------------>
+
+# Run inside the worker processes; module-level so they can be pickled
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _hash_many(passwords: list) -> list:
+    return [pwd_context.hash(password) for password in passwords]
+
+# ------------------------ Lifecycle ------------------------>
+
+async def init_password_pool():
+    """Start the worker processes. Called once from the app lifespan."""
+    global _pool, _bulk_slots
+    if _pool is not None:
+        return _pool
+    _bulk_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+    # spawn: forking a process that already runs an event loop and threads is unsafe
+    _pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    # Start every worker now so the first logins don't pay the interpreter start-up
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(_pool, _hash, "warm-up") for _ in range(PASSWORD_HASH_WORKERS)))
+    return _pool
+
+async def close_password_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+# ------------------------ Hash / Verify ------------------------>
+
+async def _run(fn, *args, reject: bool = True):
+    global _in_flight, _rejected
+    if _pool is None:
+        raise RuntimeError("Password pool is not running; call init_password_pool() first")
+    if reject and _in_flight >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+        _rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sign-ins at once. Please try again in a moment.",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+        )
+    _in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool, fn, *args)
+    finally:
+        _in_flight -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run(_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run(_verify, plain_password, hashed_password)
+
+async def hash_passwords_async(passwords: list) -> list:
+    """Hash many passwords, in order. Waits for the pool instead of being rejected when it is busy."""
+    async def run(chunk):
+        async with _bulk_slots:
+            return await _run(_hash_many, chunk, reject=False)
+
+    chunks = [passwords[i:i + BULK_HASH_CHUNK_SIZE] for i in range(0, len(passwords), BULK_HASH_CHUNK_SIZE)]
+    if chunks and _pool is None:
+        raise RuntimeError("Password pool is not running; call init_password_pool() first")
+    results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+    return [hashed for chunk in results for hashed in chunk]
+
+def stats() -> dict:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "in_flight": _in_flight,
+        "queued": max(0, _in_flight - PASSWORD_HASH_WORKERS),
+        "rejected": _rejected,
+    }
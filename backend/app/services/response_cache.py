@@ -0,0 +1,112 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    In-process LRU + TTL cache for LLM answers.
+    Entries are keyed on (unit key, normalized question, model, prompt version),
+    so a prompt change only needs a new prompt version to stop serving stale answers.
+    The unit key is the case-folded unit name, the same key the unit catalog uses,
+    so "FIT1008" and "fit1008 " share answers and are invalidated together.
+
+    Environment:
+        - RESPONSE_CACHE_MAX_ENTRIES   Entries kept before the least recently used is evicted
+        - RESPONSE_CACHE_TTL_SECONDS   Seconds an answer stays fresh
+'''
+
+# ------------------------------------------------------------->
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_question(question: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    return _WHITESPACE.sub(" ", question).strip().rstrip("?!.").strip().casefold()
+
+def unit_key(unit_name: str) -> str:
+    return (unit_name or "").strip().casefold()
+
+def make_key(unit_name: str, question: str, model: str, prompt_version: str) -> tuple:
+    return (unit_key(unit_name), normalize_question(question), model, prompt_version)
+
+class ResponseCache:
+    """Bounded LRU map whose entries also expire after a fixed TTL."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: tuple, value) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_unit(self, unit_name: str) -> int:
+        """Drop every cached answer for one unit and return how many were removed."""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == unit_key(unit_name)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self.invalidations += removed
+            return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+# Shared by the chat and hint services
+response_cache = ResponseCache()
@@ -0,0 +1,184 @@
+import threading
+import numpy as np
+from dotenv import load_dotenv
+import os
+
+from app.services.response_cache import unit_key
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Semantic near-duplicate cache for hints.
+    Questions are embedded with a small local CPU embedding model (served by
+    Ollama) and stored per unit in a preallocated float32 matrix of unit-length
+    vectors. A lookup is one matrix-vector product plus an argmax, and a hit is
+    served when the best cosine similarity reaches the threshold.
+
+    Memory is bounded by SEMANTIC_CACHE_MAX_UNITS x SEMANTIC_CACHE_MAX_ENTRIES_PER_UNIT
+    rows; both the rows of a unit and the units themselves are evicted LRU.
+
+    Environment:
+        - SEMANTIC_CACHE_ENABLED              "true" (default) or "false"
+        - SEMANTIC_CACHE_EMBED_MODEL          Ollama embedding model (default all-minilm)
+        - SEMANTIC_CACHE_THRESHOLD            Minimum cosine similarity for a hit
+        - SEMANTIC_CACHE_MAX_ENTRIES_PER_UNIT Rows kept per unit
+        - SEMANTIC_CACHE_MAX_UNITS            Units kept before the least recently used is dropped
+'''
+
+# ------------------------ Configuration ------------------------>
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_EMBED_MODEL = os.getenv("SEMANTIC_CACHE_EMBED_MODEL", "all-minilm")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES_PER_UNIT = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES_PER_UNIT", "1024"))
+SEMANTIC_CACHE_MAX_UNITS = int(os.getenv("SEMANTIC_CACHE_MAX_UNITS", "64"))
+
+# Module-level private variable for singleton pattern
+_embedder = None
+
+# ------------------------ Embedding ------------------------>
+
+def _get_embedder():
+    global _embedder
+    if _embedder is None:
+        from langchain_ollama import OllamaEmbeddings
+        _embedder = OllamaEmbeddings(model=SEMANTIC_CACHE_EMBED_MODEL)
+    return _embedder
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+async def aembed_question(question: str):
+    """Unit-length embedding of a question, or None when the cache is disabled or the model is unavailable."""
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    try:
+        return _normalize(await _get_embedder().aembed_query(question))
+    except Exception as e:
+        print(f"Semantic cache embedding error: {e}")
+        return None
+
+# ------------------------ Per-unit index ------------------------>
+
+class _UnitIndex:
+    """Fixed-capacity matrix of question vectors with LRU row replacement."""
+
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.values = [None] * capacity
+        self.size = 0
+
+    def search(self, vector: np.ndarray):
+        """Return (row, cosine similarity) of the nearest cached question."""
+        if self.size == 0:
+            return -1, -1.0
+        scores = self.vectors[:self.size] @ vector
+        row = int(np.argmax(scores))
+        return row, float(scores[row])
+
+    def insert(self, vector: np.ndarray, value, tick: int) -> bool:
+        """Store a row, replacing the least recently used one when full. Returns True on eviction."""
+        evicted = self.size == len(self.values)
+        if evicted:
+            row = int(np.argmin(self.last_used))
+        else:
+            row = self.size
+            self.size += 1
+        self.vectors[row] = vector
+        self.values[row] = value
+        self.last_used[row] = tick
+        return evicted
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.last_used.nbytes
+
+# ------------------------ Cache ------------------------>
+
+class SemanticCache:
+    """Serve a stored value for questions whose embedding is close enough to a cached one."""
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries_per_unit: int = SEMANTIC_CACHE_MAX_ENTRIES_PER_UNIT,
+        max_units: int = SEMANTIC_CACHE_MAX_UNITS,
+    ):
+        self.threshold = threshold
+        self.max_entries_per_unit = max_entries_per_unit
+        self.max_units = max_units
+        self._units = {}  # scope -> _UnitIndex, in LRU order
+        self._tick = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _touch_unit(self, scope):
+        index = self._units.pop(scope, None)
+        if index is not None:
+            self._units[scope] = index
+        return index
+
+    def lookup(self, scope, vector: np.ndarray):
+        """Return the cached value for the nearest question, or None below the threshold."""
+        with self._lock:
+            index = self._touch_unit(scope)
+            if index is None:
+                self.misses += 1
+                return None
+            row, score = index.search(vector)
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            self._tick += 1
+            index.last_used[row] = self._tick
+            self.hits += 1
+            return index.values[row]
+
+    def insert(self, scope, vector: np.ndarray, value) -> None:
+        with self._lock:
+            index = self._touch_unit(scope)
+            if index is None:
+                if len(self._units) >= self.max_units:
+                    oldest = next(iter(self._units))
+                    self.evictions += self._units.pop(oldest).size
+                index = _UnitIndex(len(vector), self.max_entries_per_unit)
+                self._units[scope] = index
+            self._tick += 1
+            if index.insert(vector, value, self._tick):
+                self.evictions += 1
+
+    def invalidate_unit(self, unit_name: str) -> int:
+        """Drop every scope belonging to a unit; scopes are (unit key or name, variant) tuples."""
+        with self._lock:
+            scopes = [scope for scope in self._units if unit_key(scope[0]) == unit_key(unit_name)]
+            return sum(self._units.pop(scope).size for scope in scopes)
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = sum(index.size for index in self._units.values())
+            self._units.clear()
+            return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "units": len(self._units),
+                "entries": sum(index.size for index in self._units.values()),
+                "bytes": sum(index.nbytes for index in self._units.values()),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+# Shared by the hint service
+semantic_cache = SemanticCache()
@@ -0,0 +1,143 @@
+import asyncio
+
+# ------------------------------------------------------------->
+
+'''
+    Single-flight request coalescing for LLM calls.
+    Concurrent callers with the same key share one upstream call:
+        - do(key, fn)       awaits one shared task and hands everyone its result
+        - stream(key, fn)   runs one upstream async generator and fans each item
+                            out to every subscriber (late joiners replay from the start)
+
+    The shared work runs in its own task, so a caller that disconnects does not
+    cancel the call for the others. A stream counts its subscribers: when the
+    last one leaves before the end, the upstream generator is cancelled and
+    closed, which stops generation upstream.
+'''
+
+# ------------------------------------------------------------->
+
+class _Broadcast:
+    """Items produced once, replayed to any number of subscribers."""
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error = None
+        self.task = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, item):
+        self.items.append(item)
+        self._notify()
+
+    def close(self, error: BaseException = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def subscribe(self):
+        index = 0
+        while True:
+            changed = self._changed
+            if index < len(self.items):
+                item = self.items[index]
+                index += 1
+                yield item
+                continue
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+def _consume_exception(task: asyncio.Task):
+    # Mark the exception as retrieved when every caller has already gone away
+    if not task.cancelled():
+        task.exception()
+
+class SingleFlight:
+    """Collapse identical in-flight calls into one."""
+
+    def __init__(self):
+        self._calls = {}
+        self._streams = {}
+        self.calls = 0
+        self.collapsed = 0
+        self.streams = 0
+        self.stream_collapsed = 0
+
+    def _forget(self, registry: dict, key, value):
+        if registry.get(key) is value:
+            del registry[key]
+
+    async def do(self, key, fn):
+        """Await `fn()` once for all concurrent callers with the same key."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(self._calls, key, done))
+            task.add_done_callback(_consume_exception)
+            self.calls += 1
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    async def stream(self, key, fn):
+        """Iterate `fn()` once and yield every item to all concurrent subscribers."""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            self.streams += 1
+
+            async def produce():
+                upstream = fn()
+                try:
+                    async for item in upstream:
+                        broadcast.publish(item)
+                    broadcast.close()
+                except Exception as e:
+                    broadcast.close(e)
+                except BaseException:
+                    # Cancelled (shutdown): wake the subscribers with an error instead of leaving them waiting
+                    broadcast.close(RuntimeError("Shared stream was cancelled"))
+                    raise
+                finally:
+                    self._forget(self._streams, key, broadcast)
+                    # Closing the generator closes the provider stream, which stops generation upstream
+                    await upstream.aclose()
+
+            broadcast.task = asyncio.ensure_future(produce())  # Held so the task is not garbage collected
+        else:
+            self.stream_collapsed += 1
+
+        broadcast.subscribers += 1
+        try:
+            async for item in broadcast.subscribe():
+                yield item
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done:
+                # Everyone went away: don't keep pulling tokens nobody will read
+                self._forget(self._streams, key, broadcast)
+                broadcast.task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "streams_in_flight": len(self._streams),
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "streams": self.streams,
+            "stream_collapsed": self.stream_collapsed,
+        }
+
+# Shared by the chat and hint services
+llm_flights = SingleFlight()
@@ -0,0 +1,175 @@
+import asyncio
+from types import MappingProxyType
+from typing import NamedTuple
+from dotenv import load_dotenv
+import os
+
+from app import database
+from app.models.units import Unit
+from app.services.response_cache import response_cache, unit_key
+from app.services.semantic_cache import semantic_cache
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Unit catalog for prompt construction.
+    Every Unit record (description, year, semester) is loaded at startup
+    into an in-memory map, so building a chat prompt looks the unit up in a
+    dict instead of reading MongoDB on every question.
+
+    The map is immutable: a refresh builds a new one and swaps it in, so
+    readers never see a half-updated catalog and need no lock. Refreshes
+    are incremental: only units whose `last_modified` is at or past the
+    newest one already seen are read. Deleted units can't be seen that way,
+    so the catalog is also reloaded in full every UNIT_CATALOG_RELOAD_SECONDS.
+    Unit.clean() stamps `last_modified` on every validated save; records
+    written some other way are only picked up by the full reload.
+
+    When a unit that was already loaded changes, or a reload finds it
+    deleted, its cached answers and hints are invalidated, since they were
+    generated with the old context. Caches are keyed by the same unit key.
+    If several records share a unit name, the most recently modified wins.
+
+    Environment:
+        - UNIT_CATALOG_REFRESH_SECONDS   How often changed units are pulled from MongoDB
+        - UNIT_CATALOG_RELOAD_SECONDS    How often the whole catalog is reloaded (drops deleted units)
+'''
+
+# ------------------------ Configuration ------------------------>
+
+UNIT_CATALOG_REFRESH_SECONDS = float(os.getenv("UNIT_CATALOG_REFRESH_SECONDS", "30"))
+UNIT_CATALOG_RELOAD_SECONDS = float(os.getenv("UNIT_CATALOG_RELOAD_SECONDS", "3600"))
+
+_FIELDS = {"unit_name": 1, "unit_description": 1, "year": 1, "semester": 1, "last_modified": 1}
+
+class UnitInfo(NamedTuple):
+    unit_name: str
+    description: str
+    year: str
+    semester: str
+
+def changed_units_query(since=None) -> tuple:
+    """(filter, sort) for units modified at or after `since` (every unit without it), oldest change first."""
+    # >= because last_modified has millisecond precision; re-reading a unit is harmless
+    return ({"last_modified": {"$gte": since}} if since is not None else {}), [("last_modified", 1)]
+
+# ------------------------ Catalog ------------------------>
+
+class UnitCatalog:
+    def __init__(self):
+        self._units = MappingProxyType({})  # unit_key -> UnitInfo
+        self._watermark = None  # last_modified of the newest record seen
+        self._task = None
+        self.lookups = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.reloads = 0
+        self.records_read = 0
+
+    # ------------------------ Lookup ------------------------>
+
+    def get(self, unit_name: str):
+        """UnitInfo for a unit name (case-insensitive), or None if the catalog doesn't know it."""
+        self.lookups += 1
+        unit = self._units.get(unit_key(unit_name))
+        if unit is None:
+            self.misses += 1
+        return unit
+
+    # ------------------------ Refresh ------------------------>
+
+    def _read(self, since=None):
+        query, sort = changed_units_query(since)
+        return database.collection(Unit).find(query, _FIELDS, sort=sort)
+
+    @staticmethod
+    def _info(record) -> UnitInfo:
+        return UnitInfo(record["unit_name"], record.get("unit_description", ""), record.get("year", ""), record.get("semester", ""))
+
+    async def refresh(self) -> int:
+        """Apply units changed since the last refresh. Returns how many already-loaded units changed."""
+        units = dict(self._units)
+        changed = []
+        watermark = self._watermark
+        async for record in self._read(self._watermark):
+            info = self._info(record)
+            previous = units.get(unit_key(info.unit_name))
+            if previous is not None and previous != info:
+                changed.append(unit_key(info.unit_name))
+            units[unit_key(info.unit_name)] = info
+            watermark = record.get("last_modified") or watermark
+            self.records_read += 1
+        self._units = MappingProxyType(units)
+        self._watermark = watermark
+        self.refreshes += 1
+        self._invalidate(changed)
+        return len(changed)
+
+    async def reload(self) -> int:
+        """Replace the catalog with every unit currently stored, dropping deleted ones."""
+        previous = self._units
+        units = {}
+        watermark = None
+        async for record in self._read():
+            info = self._info(record)
+            units[unit_key(info.unit_name)] = info
+            watermark = record.get("last_modified") or watermark
+        self._units = MappingProxyType(units)
+        self._watermark = watermark
+        self.reloads += 1
+        self._invalidate([key for key, info in previous.items() if units.get(key) != info])
+        return len(units)
+
+    @staticmethod
+    def _invalidate(keys) -> None:
+        for key in keys:
+            response_cache.invalidate_unit(key)
+            semantic_cache.invalidate_unit(key)
+
+    async def _refresh_forever(self):
+        loop = asyncio.get_running_loop()
+        last_reload = loop.time()
+        while True:
+            await asyncio.sleep(UNIT_CATALOG_REFRESH_SECONDS)
+            try:
+                if loop.time() - last_reload >= UNIT_CATALOG_RELOAD_SECONDS:
+                    await self.reload()
+                    last_reload = loop.time()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                print(f"Unit catalog refresh failed: {e}")
+
+    # ------------------------ Lifecycle ------------------------>
+
+    async def start(self):
+        """Load every unit and start background refreshes. Called from the app lifespan."""
+        try:
+            count = await self.reload()
+            print(f"Unit catalog loaded ({count} units).")
+        except Exception as e:
+            # Prompts fall back to the bare unit name until the background refresh succeeds
+            print(f"Unit catalog load failed: {e}")
+        self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "units": len(self._units),
+            "lookups": self.lookups,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "reloads": self.reloads,
+            "records_read": self.records_read,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+        }
+
+# Shared by the chat prompt builder
+unit_catalog = UnitCatalog()
@@ -0,0 +1,308 @@
+import asyncio
+import errno
+import hashlib
+import time
+import anyio
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from app import database
+from app.models.file_uploaded import FileUploaded
+from app.models.upload_session import UploadSession
+from app.services import blob_storage
+from app.services.blob_storage import UPLOAD_CHUNK_SIZE
+from app.services.file_uploaded import save_file_record
+
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Resumable uploads for large files.
+    A client starts an upload with the file's name and size and gets back an
+    upload id and a part size. It then sends the numbered parts, in any
+    order and in parallel if it likes, asks which parts have arrived after
+    a dropped connection, and completes the upload once every part is in.
+
+    The partial file is preallocated to the full size when the upload
+    starts, and each part is streamed straight to its own offset in it, so
+    assembling the parts copies nothing. A part counts as received only
+    once all of its bytes are written; a part cut off half way is simply
+    sent again. Every part write is counted on the session while it runs,
+    and completing only starts once none is, so no write can land in a file
+    that has already been moved on.
+
+    Completing hashes the file once and moves it into blob storage with a
+    rename. The FileUploaded record is only created then, so an unfinished
+    upload never appears as a file. If hashing or storing fails, the
+    session is reopened and completing can be retried; once the content has
+    gone to blob storage the session is deleted instead, whatever happens.
+    A part write that dies without being counted off (the server stopping
+    mid-part) keeps its session from completing until it expires.
+
+    Sessions with no new part for UPLOAD_SESSION_TTL_SECONDS are abandoned:
+    a background sweep deletes them and their partial files, along with
+    temporary files left in blob storage by interrupted uploads.
+
+    Environment:
+        - UPLOAD_PART_SIZE                 Bytes per part (the last part is shorter)
+        - UPLOAD_MAX_SIZE                  Largest file that can be uploaded this way, in bytes
+        - UPLOAD_SESSION_TTL_SECONDS       Idle time after which an upload is abandoned
+        - UPLOAD_SWEEP_INTERVAL_SECONDS    How often abandoned uploads are cleaned up
+'''
+
+# ------------------------ Configuration ------------------------>
+
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", str(10 * 1024 * 1024 * 1024)))
+UPLOAD_SESSION_TTL_SECONDS = float(os.getenv("UPLOAD_SESSION_TTL_SECONDS", str(24 * 3600)))
+UPLOAD_SWEEP_INTERVAL_SECONDS = float(os.getenv("UPLOAD_SWEEP_INTERVAL_SECONDS", "600"))
+
+def parts_total(session: UploadSession) -> int:
+    return -(-session.size // session.part_size)
+
+def part_length(session: UploadSession, part_number: int) -> int:
+    return min(session.part_size, session.size - (part_number - 1) * session.part_size)
+
+def upload_status(session: UploadSession) -> dict:
+    received = sorted(session.parts)
+    return {
+        "upload_id": str(session.id),
+        "file_name": session.file_name,
+        "size": session.size,
+        "part_size": session.part_size,
+        "parts_total": parts_total(session),
+        "parts_received": received,
+        "parts_missing": sorted(set(range(1, parts_total(session) + 1)) - set(received)),
+        "status": session.status,
+        "expires_at": session.updated_at + timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS),
+    }
+
+def abandoned_sessions_query(cutoff: datetime) -> tuple:
+    """(filter, sort) for sessions with no new part since `cutoff`."""
+    return {"updated_at": {"$lt": cutoff}}, None
+
+# Sessions are only visible to the account that started them
+async def get_upload_session(upload_id: str, owner: str) -> UploadSession:
+    session = await database.find_one(UploadSession, {"_id": database.object_id(upload_id), "owner": owner})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return session
+
+# ---------------------------- Start ------------------------>
+
+# Reserve the whole file up front, so a full disk fails the upload now rather than at 90%
+def _preallocate(path: str, size: int) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        if size == 0:
+            return
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except AttributeError:
+            f.truncate(size)
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+            f.truncate(size)  # Filesystem can't reserve space: a sparse file still takes parts at any offset
+
+async def start_upload(file_name: str, size: int, username: str, owner: str) -> UploadSession:
+    if size > UPLOAD_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"Files larger than {UPLOAD_MAX_SIZE} bytes can't be uploaded")
+    if await database.exists(FileUploaded, {"file_name": file_name}):
+        raise HTTPException(status_code=400, detail="File with this name already exists")
+
+    partial = blob_storage.temporary_path(".upload")
+    try:
+        await anyio.to_thread.run_sync(_preallocate, str(partial), size)
+    except OSError as e:
+        await partial.unlink(missing_ok=True)
+        if e.errno == errno.ENOSPC:
+            raise HTTPException(status_code=507, detail="Not enough storage for this file")
+        raise
+
+    session = UploadSession(
+        file_name=file_name,
+        username=username or "default_username",
+        owner=owner,
+        size=size,
+        part_size=UPLOAD_PART_SIZE,
+        file_path=str(partial),
+    )
+    try:
+        await database.insert(session)
+    except Exception:
+        await partial.unlink(missing_ok=True)
+        raise
+    return session
+
+# ---------------------------- Parts ------------------------>
+
+async def write_part(upload_id: str, owner: str, part_number: int, chunks) -> UploadSession:
+    """Stream one part from `chunks` (an async iterator of bytes) to its offset in the partial file."""
+    session = await get_upload_session(upload_id, owner)
+    if not 1 <= part_number <= parts_total(session):
+        raise HTTPException(status_code=400, detail=f"Part number must be between 1 and {parts_total(session)}")
+
+    # Count this write on the session, so it can't be completed under it
+    sessions = database.collection(UploadSession)
+    started = await sessions.update_one(
+        {"_id": session.id, "status": "open"},
+        {"$inc": {"writers": 1}, "$set": {"updated_at": datetime.utcnow()}},
+    )
+    if started.matched_count != 1:
+        raise HTTPException(status_code=409, detail="Upload is being completed")
+
+    expected = part_length(session, part_number)
+    written = 0
+    try:
+        async with await anyio.open_file(session.file_path, "r+b") as f:
+            await f.seek((part_number - 1) * session.part_size)
+            async for chunk in chunks:
+                written += len(chunk)
+                if written > expected:
+                    break
+                await f.write(chunk)
+    except BaseException as e:
+        await sessions.update_one({"_id": session.id}, {"$inc": {"writers": -1}})
+        if isinstance(e, FileNotFoundError):
+            raise HTTPException(status_code=404, detail="Upload not found or expired")
+        raise
+    if written != expected:
+        await sessions.update_one({"_id": session.id}, {"$inc": {"writers": -1}})
+        raise HTTPException(status_code=400, detail=f"Part {part_number} must be exactly {expected} bytes")
+
+    record = await sessions.find_one_and_update(
+        {"_id": session.id},
+        {"$inc": {"writers": -1}, "$addToSet": {"parts": part_number}, "$set": {"updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if record is None:
+        raise HTTPException(status_code=404, detail="Upload expired while the part was sent")
+    return UploadSession._from_son(record)
+
+# ---------------------------- Complete ------------------------>
+
+def _digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def complete_upload(upload_id: str, owner: str) -> FileUploaded:
+    session = await get_upload_session(upload_id, owner)
+    status = upload_status(session)
+    if status["parts_missing"]:
+        raise HTTPException(status_code=409, detail={"message": "Upload is missing parts", "parts_missing": status["parts_missing"]})
+    if await database.exists(FileUploaded, {"file_name": session.file_name}):
+        raise HTTPException(status_code=400, detail="File with this name already exists")
+
+    # Only one request gets to complete a session, only with every part in and none being written
+    sessions = database.collection(UploadSession)
+    claimed = await sessions.find_one_and_update(
+        {"_id": session.id, "status": "open", "parts": {"$size": status["parts_total"]}, "writers": 0},
+        {"$set": {"status": "completing", "updated_at": datetime.utcnow()}},
+    )
+    if claimed is None:
+        raise HTTPException(status_code=409, detail="Upload is already being completed, or a part is still being written")
+
+    try:
+        sha256 = await anyio.to_thread.run_sync(_digest, session.file_path)
+        blob = await blob_storage.acquire(anyio.Path(session.file_path), session.size, sha256)
+    except BaseException:
+        # The parts are still in place: let the client try again
+        await sessions.update_one({"_id": session.id}, {"$set": {"status": "open", "updated_at": datetime.utcnow()}})
+        raise
+
+    # The content now belongs to blob storage: if the record can't be saved, the reference
+    # is released (possibly deleting the blob), and the upload has to be sent again
+    try:
+        return await save_file_record(session.file_name, session.username, blob)
+    finally:
+        await sessions.delete_one({"_id": session.id})
+
+# ---------------------------- Abort ------------------------>
+
+async def abort_upload(upload_id: str, owner: str) -> bool:
+    session = await get_upload_session(upload_id, owner)
+    result = await database.collection(UploadSession).delete_one({"_id": session.id, "status": "open"})
+    if result.deleted_count != 1:
+        raise HTTPException(status_code=409, detail="Upload is being completed")
+    await anyio.Path(session.file_path).unlink(missing_ok=True)
+    return True
+
+# ------------------------ Garbage collection ------------------------>
+
+class UploadSweeper:
+    """Deletes abandoned upload sessions and stale temporary files in the background."""
+
+    def __init__(self):
+        self._task = None
+        self.sweeps = 0
+        self.sessions_expired = 0
+        self.files_removed = 0
+
+    async def sweep(self) -> int:
+        """Remove sessions idle past the TTL and temporary files as old. Returns how many sessions went."""
+        cutoff = datetime.utcnow() - timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)
+        sessions = database.collection(UploadSession)
+        expired = 0
+        async for record in sessions.find(abandoned_sessions_query(cutoff)[0], {"file_path": 1}):
+            # Re-check the age, so a part that just arrived keeps its session
+            result = await sessions.delete_one({"_id": record["_id"], "updated_at": {"$lt": cutoff}})
+            if result.deleted_count == 1:
+                await anyio.Path(record["file_path"]).unlink(missing_ok=True)
+                expired += 1
+
+        # Files whose session record is gone, and blob storage temporaries from interrupted uploads
+        cutoff_timestamp = time.time() - UPLOAD_SESSION_TTL_SECONDS
+        removed = 0
+        folder = blob_storage.temporary_folder()
+        if await folder.exists():
+            async for path in folder.iterdir():
+                try:
+                    if (await path.stat()).st_mtime < cutoff_timestamp:
+                        await path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+
+        self.sweeps += 1
+        self.sessions_expired += expired
+        self.files_removed += removed
+        return expired
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(UPLOAD_SWEEP_INTERVAL_SECONDS)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Upload sweep failed: {e}")
+
+    # ------------------------ Lifecycle ------------------------>
+
+    async def start(self):
+        """Start the periodic sweep. Called from the app lifespan."""
+        self._task = asyncio.create_task(self._sweep_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "sweeps": self.sweeps,
+            "sessions_expired": self.sessions_expired,
+            "files_removed": self.files_removed,
+        }
+
+# Started from the app lifespan
+upload_sweeper = UploadSweeper()
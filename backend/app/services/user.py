@@ -1,14 +1,20 @@
+import csv
+import io
+import json
 from fastapi import HTTPException
-from passlib.context import CryptContext
-from app.auth.jwt_handler import create_access_token, create_refresh_token, verify_access_token
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app import database
+from app.auth.jwt_handler import create_access_token, create_refresh_token, verify_access_token, revoke_user_tokens
+from app.services.password_hasher import pwd_context, hash_password_async, hash_passwords_async, verify_password_async
+from app.services.user_cache import user_cache, CachedUser
 
 from app.models.user import User
 from app.schemas.user import *
 
 #------------------------ Password Hashing ------------------------>
 
-# Context for password  |  Algorithm: bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Blocking versions, for scripts; request handlers use the *_async pool versions
 
 # Hashing passwords
 def hash_password(password: str) -> str:
@@ -21,16 +27,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 # ------------------------ Register ------------------------>
 
 # Create a new user
-def register_user(user_in: UserRegister) -> User:
+async def register_user(user_in: UserRegister) -> User:
 
     # Check if user already exists
-    if User.objects(email=user_in.email).first():  # type: ignore
+    if await database.exists(User, {"email": user_in.email}):
         raise HTTPException(status_code=403, detail="Email already registered")
-    if User.objects(username=user_in.username).first(): # type: ignore
+    if await database.exists(User, {"username": user_in.username}):
         raise HTTPException(status_code=403, detail="Username already taken")
 
     # Hash the password before storing it
-    hashed_password = hash_password(user_in.password)
+    hashed_password = await hash_password_async(user_in.password)
 
     # Create and save the new user in the database
     user = User(
@@ -40,30 +46,154 @@ def register_user(user_in: UserRegister) -> User:
         password=hashed_password,
         role=user_in.role
     )
-    user.save()  # Save the user in the database
+    try:
+        await database.insert(user)  # Save the user in the database
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration; the unique indexes have the final say
+        raise HTTPException(status_code=403, detail="Username or email already registered")
 
     return user
 
+# ------------------------ Bulk import ------------------------>
+
+ROSTER_MAX_ROWS = 5000
+ROSTER_BATCH_SIZE = 500  # Rows per uniqueness query and insert_many
+DUPLICATE_KEY = 11000
+
+# Rows of a CSV (with a header line) or JSON (a list, or {"users": [...]}) roster
+def parse_roster(filename: str, content: bytes) -> list:
+    try:
+        text = content.decode("utf-8-sig")
+        if (filename or "").lower().endswith(".json") or text.lstrip().startswith(("[", "{")):
+            rows = json.loads(text)
+            rows = rows.get("users", []) if isinstance(rows, dict) else rows
+        else:
+            rows = list(csv.DictReader(io.StringIO(text)))
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read roster: {e}")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise HTTPException(status_code=400, detail="Roster must be a list of users")
+    if len(rows) > ROSTER_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Roster has {len(rows)} rows; import at most {ROSTER_MAX_ROWS} at a time")
+    return rows
+
+def roster_taken_query(usernames: list, emails: list) -> tuple:
+    """(filter, sort) matching every user that already has one of these usernames or emails."""
+    return {"$or": [{"username": {"$in": usernames}}, {"email": {"$in": emails}}]}, None
+
+async def _import_batch(batch: list, report: list) -> None:
+    """batch: (row number, UserRegister) pairs that passed validation."""
+    # One query for every username and email of the batch that is already taken
+    query, _ = roster_taken_query([user_in.username for _, user_in in batch], [user_in.email for _, user_in in batch])
+    taken = database.collection(User).find(query, {"username": 1, "email": 1})
+    usernames, emails = set(), set()
+    async for user in taken:
+        usernames.add(user["username"])
+        emails.add(user["email"])
+
+    fresh = []
+    for row, user_in in batch:
+        if user_in.email in emails:
+            report[row].update({"status": "exists", "detail": "Email already registered"})
+        elif user_in.username in usernames:
+            report[row].update({"status": "exists", "detail": "Username already taken"})
+        else:
+            fresh.append((row, user_in))
+    if not fresh:
+        return
+
+    hashed = await hash_passwords_async([user_in.password for _, user_in in fresh])
+    documents = []
+    for (row, user_in), hashed_password in zip(fresh, hashed):
+        user = User(username=user_in.username, name=user_in.name, email=user_in.email, password=hashed_password, role=user_in.role)
+        user.validate()
+        documents.append(user.to_mongo().to_dict())
+
+    failed = {}
+    try:
+        await database.collection(User).insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        failed = {error["index"]: error for error in e.details["writeErrors"]}
+    for index, (row, _) in enumerate(fresh):
+        if index not in failed:
+            report[row].update({"status": "created", "id": str(documents[index]["_id"])})
+        elif failed[index]["code"] == DUPLICATE_KEY:
+            # Registered by someone else between the check and the insert
+            report[row].update({"status": "exists", "detail": "Username or email already registered"})
+        else:
+            report[row].update({"status": "error", "detail": failed[index]["errmsg"]})
+
+# Register every valid, new user of a roster. Returns a result per row, in roster order
+async def import_roster(rows: list) -> dict:
+    report = []
+    valid = []
+    seen_usernames, seen_emails = set(), set()
+    for row, data in enumerate(rows):
+        data = {key.strip(): value for key, value in data.items() if key and value not in (None, "")}
+        report.append({"row": row + 1, "username": data.get("username")})
+        try:
+            user_in = UserRegister(**data)
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+            report[row].update({"status": "invalid", "detail": errors})
+            continue
+        if user_in.username in seen_usernames or user_in.email in seen_emails:
+            report[row].update({"status": "duplicate", "detail": "Username or email repeated in the roster"})
+            continue
+        seen_usernames.add(user_in.username)
+        seen_emails.add(user_in.email)
+        valid.append((row, user_in))
+
+    for start in range(0, len(valid), ROSTER_BATCH_SIZE):
+        await _import_batch(valid[start:start + ROSTER_BATCH_SIZE], report)
+
+    counts = {}
+    for result in report:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"total": len(report), "counts": counts, "rows": report}
+
 # ---------------------------- Read -------------------------------->
 
+# Read-through lookup by id or username: the user cache first, MongoDB on a miss
+# Returns a read-only CachedUser, or None; writes load the Document instead
+async def get_cached_user(user_id: str = None, username: str = None):
+    user = user_cache.get(user_id=user_id, username=username)
+    if user is not None:
+        return user
+    if user_id is not None:
+        object_id = database.object_id(user_id)
+        if object_id is None:
+            return None
+        query = {"_id": object_id}
+    else:
+        query = {"username": username}
+    generation = user_cache.generation()
+    document = await database.find_one(User, query)
+    if document is None:
+        return None
+    user = CachedUser.from_document(document)
+    user_cache.set(user, generation)
+    return user
+
 # Get a user by ID
-def get_user_by_id(user_id: str) -> User:
-    user = User.objects(id=user_id).first() # type: ignore
+async def get_user_by_id(user_id: str) -> CachedUser:
+    user = await get_cached_user(user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 # Get data from current user
-def get_current_user(token: str) -> UserRead:
-    return verify_access_token(token)
+async def get_current_user(token: str) -> UserRead:
+    return await verify_access_token(token)
 
 # -------------------------- Update ---------------------------------->
 
 # Update a user
-def update_user(user_id: str, user_input: UserUpdate) -> User:
-    user = User.objects(id=user_id).first() # type: ignore
+async def update_user(user_id: str, user_input: UserUpdate) -> User:
+    user = await database.find_one(User, {"_id": database.object_id(user_id)})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    claims = (user.username, user.role, user.is_active)
 
     # Update fields if provided
     if user_input.username:
@@ -77,29 +207,35 @@ def update_user(user_id: str, user_input: UserUpdate) -> User:
     if user_input.is_active is not None:
         user.is_active = user_input.is_active
 
-    user.save()
+    await database.save(user)
+    user_cache.invalidate(str(user.id))
+    # Tokens carry the old username and role: log the user out so they get new ones
+    if (user.username, user.role, user.is_active) != claims:
+        await revoke_user_tokens(claims[0])
     return user
 
 # ------------------------- Delete --------------------------------->
 
 # Delete a user
-def delete_user(user_id: str) -> bool:
-    user = User.objects(id=user_id).first() # type: ignore
+async def delete_user(user_id: str) -> bool:
+    user = await database.find_one(User, {"_id": database.object_id(user_id)})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user.delete()
+    await database.delete(user)
+    user_cache.invalidate(str(user.id))
+    await revoke_user_tokens(user.username)
     return True
 
 # ----------------------- Log In ----------------------------->
 
 # Login User
-def login_user(userLogin: UserLogin) -> dict:
+async def login_user(userLogin: UserLogin) -> dict:
 
     # Check if the user exists
-    user = User.objects(username=userLogin.username).first() # type: ignore
+    user = await get_cached_user(username=userLogin.username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if not verify_password(userLogin.password, user.password):
+    if not await verify_password_async(userLogin.password, user.password):
         raise HTTPException(status_code=401, detail="Invalid password")
 
     user_data = UserRead(
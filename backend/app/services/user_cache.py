@@ -0,0 +1,159 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# ------------------------------------------------------------->
+
+'''
+    Read-through cache of User documents, by id and by username.
+    Login, /users/get and the other user endpoints load the same accounts
+    again and again. app.services.user looks them up here first and only
+    goes to MongoDB on a miss.
+
+    Entries are CachedUser tuples holding just the fields those paths read,
+    not mongoengine Documents (which carry change tracking and are several
+    times larger). Writes don't go through the cache: update_user and
+    delete_user load the Document from MongoDB and invalidate the entry.
+
+    Each worker process has its own cache, so a change made by another
+    worker is seen once the entry expires: keep USER_CACHE_TTL_SECONDS short.
+
+    Environment:
+        - USER_CACHE_MAX_ENTRIES   Users kept before the least recently used is evicted (0 disables the cache)
+        - USER_CACHE_TTL_SECONDS   Seconds an entry is served before it is read again
+'''
+
+# ------------------------------------------------------------->
+
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+class CachedUser(NamedTuple):
+    id: str
+    username: str
+    name: str
+    email: str
+    password: str  # bcrypt hash, checked on login
+    role: str
+    is_active: bool
+
+    @classmethod
+    def from_document(cls, user) -> "CachedUser":
+        return cls(str(user.id), user.username, user.name, user.email, user.password, user.role, user.is_active)
+
+def _size(user: CachedUser) -> int:
+    """Approximate bytes held by one entry (the tuple and its strings)."""
+    return sys.getsizeof(user) + sum(sys.getsizeof(value) for value in user[:6])
+
+class UserCache:
+    """Bounded LRU map of user id -> CachedUser with a TTL, plus a username -> id index."""
+
+    def __init__(self, max_entries: int = USER_CACHE_MAX_ENTRIES, ttl_seconds: float = USER_CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()  # id -> (expires_at, CachedUser)
+        self._ids = {}  # username -> id
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped on every invalidation
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    # ------------------------ Read ------------------------>
+
+    def get(self, user_id: str = None, username: str = None):
+        """Cached user by id or username, or None."""
+        with self._lock:
+            if user_id is None:
+                user_id = self._ids.get(username)
+            entry = self._entries.get(user_id) if user_id is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at <= self._clock():
+                self._remove(user_id)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return user
+
+    # ------------------------ Write ------------------------>
+
+    def generation(self) -> int:
+        """Take before reading MongoDB on a miss and pass to `set`, so a read that raced an invalidation isn't cached."""
+        return self._generation
+
+    def set(self, user: CachedUser, generation: int = None) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if user.id in self._entries:
+                self._remove(user.id)
+            self._entries[user.id] = (self._clock() + self.ttl_seconds, user)
+            self._ids[user.username] = user.id
+            self.bytes += _size(user)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, user_id: str) -> None:
+        _, user = self._entries.pop(user_id)
+        if self._ids.get(user.username) == user_id:
+            del self._ids[user.username]
+        self.bytes -= _size(user)
+
+    # ------------------------ Invalidate ------------------------>
+
+    def invalidate(self, user_id: str) -> bool:
+        """Forget one user after it changed or was deleted. Returns whether it was cached."""
+        with self._lock:
+            self._generation += 1
+            if user_id not in self._entries:
+                return False
+            self._remove(user_id)
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> int:
+        with self._lock:
+            self._generation += 1
+            removed = len(self._entries)
+            self._entries.clear()
+            self._ids.clear()
+            self.bytes = 0
+            self.invalidations += removed
+            return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+# Shared by app.services.user
+user_cache = UserCache()
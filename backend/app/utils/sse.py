@@ -0,0 +1,13 @@
+import json
+
+# ---------------------- Server-Sent Events ------------------------>
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Stop nginx from buffering the stream
+}
+
+def format_sse(event: str, data: dict) -> str:
+    """Serialize one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Per-request authentication overhead, with and without the token claims cache.
+
+    Measures:
+        - verify_access_token       the JWT check on its own
+        - GET /users/me over ASGI   a whole authenticated request (no sockets, no database)
+    each with the cache disabled (every call re-verifies the HMAC and rebuilds
+    UserRead) and enabled (one verification per token), plus the revocation
+    Bloom-filter check that runs on every request, loaded with
+    `--revoked` revoked tokens.
+
+    Usage (from backend/):
+        python -m benchmarks.bench_auth_overhead --calls 20000 --tokens 50
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth import jwt_handler
+from app.auth.revocation import BloomFilter
+from app.auth.token_cache import TokenClaimsCache
+from app.schemas.user import UserRead
+
+def make_tokens(count: int) -> list:
+    return [
+        jwt_handler.create_access_token(UserRead(username=f"student{n}", email=f"student{n}@example.com"))["access_token"]
+        for n in range(count)
+    ]
+
+async def per_verify(tokens: list, calls: int) -> float:
+    started = time.perf_counter()
+    for n in range(calls):
+        await jwt_handler.verify_access_token(tokens[n % len(tokens)])
+    return (time.perf_counter() - started) / calls
+
+async def per_request(tokens: list, calls: int) -> float:
+    from fastapi import Depends, FastAPI
+
+    app = FastAPI()
+
+    # Same shape as GET /users/me, without importing the database-backed routers
+    @app.get("/users/me")
+    def get_current_user_endpoint(token: dict = Depends(jwt_handler.get_current_token)):
+        return token["data"]
+
+    async def call(token: str):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/users/me", "raw_path": b"/users/me", "root_path": "", "query_string": b"",
+            "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+            "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        }
+        status = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        await app(scope, receive, send)
+        assert status == [200], status
+
+    started = time.perf_counter()
+    for n in range(calls):
+        await call(tokens[n % len(tokens)])
+    return (time.perf_counter() - started) / calls
+
+def per_revocation_check(revoked: int, calls: int) -> float:
+    import uuid
+
+    bloom = BloomFilter()
+    for _ in range(revoked):
+        bloom.add(uuid.uuid4().hex)
+    jtis = [uuid.uuid4().hex for _ in range(1000)]
+    started = time.perf_counter()
+    for n in range(calls):
+        jtis[n % len(jtis)] in bloom
+    return (time.perf_counter() - started) / calls
+
+def run(tokens: list, args, cache: TokenClaimsCache) -> tuple:
+    # verify_access_token looks the cache up on the module
+    jwt_handler.token_claims_cache = cache
+    verify = statistics.median(asyncio.run(per_verify(tokens, args.calls)) for _ in range(args.rounds))
+    request = statistics.median(asyncio.run(per_request(tokens, args.calls // 4)) for _ in range(args.rounds))
+    return verify, request
+
+def main(args):
+    tokens = make_tokens(args.tokens)
+    uncached = run(tokens, args, TokenClaimsCache(max_entries=0))
+    cache = TokenClaimsCache()
+    cached = run(tokens, args, cache)
+
+    print(f"{args.tokens} distinct tokens, median of {args.rounds} rounds")
+    print(f"{'path':<28}{'no cache us':>13}{'cache us':>11}{'speed-up':>10}")
+    for name, without, with_cache in (("verify_access_token", uncached[0], cached[0]), ("GET /users/me (ASGI)", uncached[1], cached[1])):
+        print(f"{name:<28}{without * 1e6:>13.1f}{with_cache * 1e6:>11.1f}{without / with_cache:>9.1f}x")
+    print(f"cache hit rate {cache.stats()['hit_rate']:.1%}")
+    print(f"revocation filter miss with {args.revoked} revoked tokens: {per_revocation_check(args.revoked, args.calls) * 1e6:.2f} us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure JWT verification overhead with and without the claims cache")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=50, help="Distinct users/tokens cycled through")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--revoked", type=int, default=50000, help="Revoked tokens loaded into the Bloom filter")
+    main(parser.parse_args())
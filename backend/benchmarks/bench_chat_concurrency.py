@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Concurrency benchmark for POST /chat/ask.
+
+    Compares the old blocking path (a sync endpoint calling the sync Groq
+    client, i.e. one Starlette threadpool slot per in-flight question) with
+    the async path on the shared connection pool, both against the local
+    stand-in server. Throughput of the blocking path flattens once the
+    threadpool (40 slots by default) is saturated; the async path keeps
+    scaling with concurrency.
+
+    Usage (from backend/):
+        python -m benchmarks.bench_chat_concurrency --latency 0.5 --levels 10 40 80 160 320
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stand_in_llm import start_stand_in
+
+MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+QUESTION = "What is a linked list?"
+
+def build_threadpool_app():
+    """The pre-async handler: a sync route with a blocking Groq call."""
+    from fastapi import FastAPI
+    from groq import Groq
+    from app.services.mock_chat_service import build_prompt
+    from app.routers.mock_chat import MessageRequest
+
+    client = Groq(api_key="stand-in")
+    app = FastAPI()
+
+    @app.post("/chat/ask")
+    def post_questions(request: MessageRequest):
+        completion = client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": build_prompt(request)}],
+            stream=False,
+        )
+        return {"text": completion.choices[0].message.content}
+
+    return app
+
+async def run_level(app, concurrency: int, requests_per_worker: int) -> dict:
+    import httpx
+
+    latencies = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+        async def worker(worker_id: int):
+            nonlocal errors
+            for n in range(requests_per_worker):
+                # Distinct questions, so the response cache and single-flight do not short-circuit the upstream call
+                payload = {"message": f"{QUESTION} ({worker_id}-{n})", "unit_name": "FIT1008"}
+                start = time.perf_counter()
+                response = await client.post("/chat/ask", json=payload)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "errors": errors,
+    }
+
+async def main(args):
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("API_KEY", "stand-in")
+    # Lift the router's per-provider cap so the benchmark measures the pool, not the cap
+    os.environ.setdefault("LLM_PROVIDER_CONCURRENCY", json.dumps({"groq": max(args.levels)}))
+    start_stand_in(port=args.port, latency=args.latency)
+
+    from app.main import app, lifespan
+
+    # The chat service prints every prompt; keep the benchmark output readable
+    results = {"threadpool": [], "async": []}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for level in args.levels:
+            results["threadpool"].append(await run_level(build_threadpool_app(), level, args.requests))
+        async with lifespan(app):
+            for level in args.levels:
+                results["async"].append(await run_level(app, level, args.requests))
+
+    print(f"stand-in latency {args.latency:.2f}s, {args.requests} requests per worker")
+    print(f"{'mode':<11}{'conc':>6}{'req/s':>10}{'p50 s':>9}{'p95 s':>9}{'errors':>8}")
+    for mode, rows in results.items():
+        for row in rows:
+            print(f"{mode:<11}{row['concurrency']:>6}{row['throughput']:>10.1f}"
+                  f"{row['p50']:>9.3f}{row['p95']:>9.3f}{row['errors']:>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /chat/ask concurrency")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Stand-in response delay in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 40, 80, 160, 320])
+    parser.add_argument("--requests", type=int, default=3, help="Requests per concurrent worker")
+    asyncio.run(main(parser.parse_args()))
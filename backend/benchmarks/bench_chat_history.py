@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# ------------------------------------------------------------->
+
+'''
+    Chat history page latency: keyset cursors vs. skip/offset.
+
+    For each history size, seeds one user's exchanges and times fetching
+    pages at increasing depth (first page, middle, last):
+        - keyset    app.services.chat_history.get_chat_history with the
+                    cursor of the previous page (what GET /chat/history does)
+        - offset    the same query with .skip(page * limit)
+
+    Meaningful numbers need a real MongoDB (--mongo-uri), with the indexes
+    from app.indexes synced first. The in-memory stand-in has no indexes,
+    so without --mongo-uri it only checks that both paths return the same pages.
+
+    Usage (from backend/):
+        python -m benchmarks.bench_chat_history --mongo-uri mongodb://localhost:27017/lazybench --sizes 10 1000 100000
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import database
+from app.indexes import sync_indexes
+from app.models.chat_history import ChatHistory, HISTORY_SORT
+from app.services.chat_history import get_chat_history, HISTORY_FIELDS
+
+ANSWER = "A linked list stores each element in a node that points to the next one. " * 20
+
+async def seed(username: str, count: int) -> None:
+    collection = database.collection(ChatHistory)
+    await collection.delete_many({"username": username})
+    started = datetime(2024, 1, 1)
+    for offset in range(0, count, 5000):
+        await collection.insert_many([
+            # Several exchanges share each timestamp, so pages also have to break ties on _id
+            {"username": username, "question": f"question {n}", "answer": ANSWER, "unit_name": f"FIT{1000 + n % 5}",
+             "date_created": started + timedelta(seconds=n // 3)}
+            for n in range(offset, min(count, offset + 5000))
+        ], ordered=False)
+
+async def offset_page(username: str, page: int, limit: int) -> list:
+    projection = {field: 1 for field in HISTORY_FIELDS}
+    rows = database.collection(ChatHistory).find({"username": username}, projection, sort=HISTORY_SORT, skip=page * limit, limit=limit)
+    return [row async for row in rows]
+
+async def timed(call, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await call()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples)
+
+async def run_size(username: str, size: int, args) -> list:
+    await seed(username, size)
+    pages = max(1, -(-size // args.limit))
+    depths = sorted({0, pages // 2, pages - 1})
+    rows = []
+
+    # Walk the cursors once to reach each depth, timing the pages we sample
+    cursor, page = None, 0
+    while page <= depths[-1]:
+        if page in depths:
+            result, keyset = await timed(lambda: get_chat_history(username, args.limit, cursor), args.repeat)
+            expected, offset = await timed(lambda: offset_page(username, page, args.limit), args.repeat)
+            same = [item["id"] for item in result["items"]] == [str(row["_id"]) for row in expected]
+            rows.append((size, page, keyset, offset, same))
+        else:
+            result = await get_chat_history(username, args.limit, cursor, fields=("date_created",))
+        cursor, page = result["next_cursor"], page + 1
+    return rows
+
+async def main(args):
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        await database.init_db(AsyncIOMotorClient(args.mongo_uri))
+        await sync_indexes()
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        await database.init_db(AsyncMongoMockClient())
+
+    print(f"{'mongo ' + args.mongo_uri if args.mongo_uri else 'in-memory stand-in (no indexes: correctness only)'}, "
+          f"{args.limit} per page, median of {args.repeat}")
+    print(f"{'messages':>9}{'page':>7}{'keyset ms':>11}{'offset ms':>11}  same items")
+    try:
+        for size in args.sizes:
+            for size, page, keyset, offset, same in await run_size("bench-history", size, args):
+                print(f"{size:>9}{page:>7}{keyset * 1000:>11.2f}{offset * 1000:>11.2f}  {'yes' if same else 'NO'}")
+    finally:
+        await database.collection(ChatHistory).delete_many({"username": "bench-history"})
+        await database.close_db()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark chat history pages: keyset cursors vs. skip/offset")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000], help="Exchanges in the user's history")
+    parser.add_argument("--limit", type=int, default=20, help="Items per page")
+    parser.add_argument("--repeat", type=int, default=5, help="Timings per sampled page")
+    parser.add_argument("--mongo-uri", help="Use a real MongoDB instead of the in-memory stand-in (the user's records are deleted afterwards)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Concurrency benchmark for database-backed endpoints.
+
+    Compares GET /users/get/{user_id} on:
+        - blocking   the old handler: an async endpoint calling mongoengine's
+                     synchronous `.objects(...).first()`, which holds the event loop
+                     for the whole round trip
+        - async      the current handler on the motor data layer (app.database)
+    at rising concurrency.
+
+    With --mongo-uri both paths talk to that server. Without it they use
+    in-memory stand-ins (mongomock / mongomock-motor) with `--db-latency`
+    added to every query, sleeping in the same way each driver waits on the
+    network: blocking for mongoengine and awaiting for motor.
+
+    Usage (from backend/):
+        python -m benchmarks.bench_db_concurrency --db-latency 0.005 --levels 1 10 50 100
+        python -m benchmarks.bench_db_concurrency --mongo-uri mongodb://localhost:27017/lazybench
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import database
+from app.models.user import User
+
+class _DelayedCollection:
+    """Motor-like collection wrapper that waits `latency` before each query, like a network round trip."""
+
+    def __init__(self, inner, latency: float):
+        self._inner = inner
+        self._latency = latency
+
+    async def find_one(self, *args, **kwargs):
+        await asyncio.sleep(self._latency)
+        return await self._inner.find_one(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+def setup_blocking(args):
+    from mongoengine import connect
+
+    if args.mongo_uri:
+        connect(host=args.mongo_uri, alias="default")
+        return
+    import mongomock
+
+    connect("lazybench", host="mongodb://localhost", alias="default", mongo_client_class=mongomock.MongoClient)
+
+async def setup_async(args):
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_uri, maxPoolSize=database.MONGODB_MAX_POOL_SIZE)
+        await database.init_db(client)
+        return
+    from mongomock_motor import AsyncMongoMockClient
+
+    await database.init_db(AsyncMongoMockClient())
+    collection = database.collection
+    database.collection = lambda model: _DelayedCollection(collection(model), args.db_latency)
+
+def build_app(blocking: bool, args):
+    from fastapi import FastAPI, HTTPException
+    from app.routers.user_router import router as user_router
+
+    app = FastAPI()
+    if blocking:
+        @app.get("/users/get/{user_id}")
+        async def get_user_endpoint(user_id: str):
+            if not args.mongo_uri:
+                time.sleep(args.db_latency)  # The stand-in's round trip, blocking like pymongo's socket read
+            user = User.objects(id=user_id).first()  # type: ignore
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+            return {"username": user.username}
+    else:
+        app.include_router(user_router)
+    return app
+
+async def run_level(app, user_ids: list, concurrency: int, requests: int) -> dict:
+    import httpx
+
+    latencies = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue = list(range(requests))
+
+        async def worker():
+            nonlocal errors
+            while queue:
+                n = queue.pop()
+                started = time.perf_counter()
+                response = await client.get(f"/users/get/{user_ids[n % len(user_ids)]}")
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "errors": errors,
+    }
+
+async def main(args):
+    setup_blocking(args)
+    await setup_async(args)
+
+    # Seed through both drivers so each path reads its own store
+    users = [User(username=f"bench{n:04d}", name="Bench", email=f"bench{n}@example.com", password="bench-password-hash", role="user") for n in range(args.users)]
+    for user in users:
+        user.save()
+        await database.insert(User(**{k: user[k] for k in ("username", "name", "email", "password", "role")}, id=user.id))
+    user_ids = [str(user.id) for user in users]
+
+    print(f"{'mongo ' + args.mongo_uri if args.mongo_uri else f'in-memory stand-in, {args.db_latency * 1000:g} ms per query'}, "
+          f"{args.requests} requests per level")
+    print(f"{'path':<10}{'conc':>6}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+    for name, blocking in (("blocking", True), ("async", False)):
+        app = build_app(blocking, args)
+        for level in args.levels:
+            row = await run_level(app, user_ids, level, args.requests)
+            print(f"{name:<10}{level:>6}{row['throughput']:>10.1f}{row['p50'] * 1000:>9.1f}{row['p95'] * 1000:>9.1f}{row['errors']:>8}")
+
+    if args.mongo_uri:
+        User.drop_collection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark database-backed endpoints: blocking mongoengine vs async motor")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--db-latency", type=float, default=0.005, help="Stand-in round trip per query, in seconds")
+    parser.add_argument("--mongo-uri", help="Use a real MongoDB instead of the in-memory stand-ins (the collection is dropped afterwards)")
+    asyncio.run(main(parser.parse_args()))
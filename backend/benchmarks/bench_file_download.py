@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    File download: what a repeat view of a course PDF costs the server.
+
+    Uploads one `--size-mb` file, then downloads it `--requests` times per
+    pattern through GET /files/{id}/download (in-process ASGI transport,
+    in-memory MongoDB):
+        - full          plain GET, the whole file every time
+        - range         GET with Range: first 64 KiB (a PDF viewer's first page load)
+        - conditional   GET with If-None-Match: the ETag from the first response (304)
+    CPU is the process time spent per request; bytes is the body sent back.
+    In-process the file is always read and sent in chunks: behind a server
+    with the ASGI pathsend extension, full downloads go out with sendfile.
+
+    Usage (from backend/):
+        python -m benchmarks.bench_file_download --size-mb 20 --requests 50
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def build_app():
+    from fastapi import FastAPI
+    from app.routers.file_router import router as file_router
+    from app.auth.jwt_handler import get_current_token
+
+    app = FastAPI()
+    app.include_router(file_router)
+    app.dependency_overrides[get_current_token] = lambda: {"token": "bench", "data": None}
+    return app
+
+async def run_pattern(client, url: str, headers: dict, requests: int) -> dict:
+    sent = 0
+    started, cpu_started = time.perf_counter(), time.process_time()
+    for _ in range(requests):
+        response = await client.get(url, headers=headers)
+        sent += len(response.content)
+    return {
+        "status": response.status_code,
+        "ms": (time.perf_counter() - started) * 1000 / requests,
+        "cpu_ms": (time.process_time() - cpu_started) * 1000 / requests,
+        "bytes": sent // requests,
+    }
+
+async def main(args):
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient
+    from app import database
+    from app.models.file_uploaded import FileUploaded
+
+    await database.init_db(AsyncMongoMockClient())
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        response = await client.post("/files/upload", params={"username": "bench"},
+                                     files={"file_uploaded_in": ("lecture.pdf", os.urandom(args.size_mb * 1024 * 1024), "application/pdf")})
+        response.raise_for_status()
+        file_id = str((await database.find_one(FileUploaded, {"file_name": "lecture.pdf"})).id)
+        url = f"/files/{file_id}/download"
+        etag = (await client.head(url)).headers["etag"]
+
+        results = {}
+        for name, headers in (("full", {}), ("range", {"Range": "bytes=0-65535"}), ("conditional", {"If-None-Match": etag})):
+            results[name] = await run_pattern(client, url, headers, args.requests)
+
+    print(f"{args.requests} downloads of a {args.size_mb} MB file per pattern")
+    print(f"{'pattern':<13}{'status':>7}{'ms/req':>9}{'CPU ms/req':>12}{'bytes/req':>12}")
+    for name, row in results.items():
+        print(f"{name:<13}{row['status']:>7}{row['ms']:>9.2f}{row['cpu_ms']:>12.2f}{row['bytes']:>12}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark full, ranged and conditional file downloads")
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    # Set before the app is imported, so blob storage writes here
+    upload_dir = tempfile.mkdtemp(prefix="lazyai-download-")
+    os.environ["upload_folder"] = "file://" + upload_dir
+    try:
+        asyncio.run(main(args))
+    finally:
+        shutil.rmtree(upload_dir)
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Throughput benchmark for micro-batched local-model hint requests.
+
+    Both paths call `hint_service.generate_hint` (cache off, every question
+    different) through an LLM router whose "hint" route is served by a stub
+    of the Ollama server: at most `--parallel` sequences run at once (its
+    OLLAMA_NUM_PARALLEL), further requests queue, and each sequence running
+    alongside adds `--parallel-cost` of a single sequence's latency. Answer
+    lengths vary, so latencies are lognormal around `--latency` with
+    `--sigma` spread (0 gives every sequence the same length, which hides
+    the cost of waiting for a batch's slowest sequence).
+    Compared paths:
+        - unbatched   the router's Ollama provider as it was before batching:
+                      every request goes to the server as it arrives
+        - batched     the provider wrapped in BatchingProvider / MicroBatcher
+                      with the given window and batch size
+
+    Usage (from backend/):
+        python -m benchmarks.bench_hint_batching --requests 64 --concurrency 32 --windows 5 20 50 --sizes 4 8
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import hint_service
+from app.services.llm_providers import BatchingProvider, StubProvider, fixed_latency, lognormal_latency
+from app.services.llm_router import LLMRouter, LLM_PROVIDER_CONCURRENCY
+
+MODEL = "deepseek-r1"
+
+def summarize(name: str, latencies: list, elapsed: float) -> str:
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return (f"{name:<28}{len(latencies) / elapsed:>9.2f}{statistics.median(latencies):>9.3f}"
+            f"{p95:>9.3f}")
+
+async def run(provider, requests: int, concurrency: int):
+    # generate_hint looks the router up on its module, so each path gets its own
+    hint_service.llm_router = LLMRouter(providers={"ollama": provider}, routes={hint_service.HINT_ROUTE: [f"ollama:{MODEL}"]},
+                                        concurrency=LLM_PROVIDER_CONCURRENCY, hedge=False)
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(n):
+        async with semaphore:
+            started = time.perf_counter()
+            await hint_service.generate_hint(f"question {n}", use_cache=False)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(n) for n in range(requests)))
+    return latencies, time.perf_counter() - started
+
+async def main(args):
+    def server():
+        # Same seed for every path, so they see the same sequence of latencies
+        latency = lognormal_latency(args.latency, args.sigma, random.Random(args.seed)) if args.sigma else fixed_latency(args.latency)
+        return StubProvider("ollama", latency=latency, parallel=args.parallel, parallel_cost=args.parallel_cost)
+
+    print(f"stub latency {args.latency:.2f}s median (sigma {args.sigma:g}), {args.parallel} parallel slots, extra cost per parallel sequence "
+          f"{args.parallel_cost:.0%}, {args.requests} requests, {args.concurrency} concurrent callers")
+    print(f"{'path':<28}{'req/s':>9}{'p50 s':>9}{'p95 s':>9}")
+    print(summarize("unbatched", *await run(server(), args.requests, args.concurrency)))
+    for size in args.sizes:
+        for window in args.windows:
+            provider = BatchingProvider(server(), max_batch_size=size, max_wait=window / 1000,
+                                        max_concurrent_batches=max(1, args.parallel // size))
+            latencies, elapsed = await run(provider, args.requests, args.concurrency)
+            stats = provider.stats()[MODEL]
+            label = f"batched {window:g}ms x{size} (avg {stats['average_batch_size']:.1f})"
+            print(summarize(label, latencies, elapsed))
+            await provider.aclose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched hint generation")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2, help="Median stub latency of a single sequence")
+    parser.add_argument("--sigma", type=float, default=0.8, help="Lognormal spread of the latency (0: fixed)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--parallel", type=int, default=4, help="Sequences the stub server runs at once")
+    parser.add_argument("--parallel-cost", type=float, default=0.15, help="Extra latency per sequence running alongside")
+    parser.add_argument("--windows", type=float, nargs="+", default=[5, 20, 50], help="Batch windows in ms")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 8])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Login storm: many students signing in at once at the start of a lecture.
+
+    Sends `--logins` concurrent POST /users/login requests over ASGI, against
+    an in-memory MongoDB (mongomock-motor) with seeded accounts, while a
+    probe measures how late the event loop wakes up (lag) and how long
+    GET /health takes meanwhile. Compared paths:
+        - inline    bcrypt verify called directly in the async endpoint (the old code)
+        - pool      bcrypt in the password_hasher process pool
+
+    Usage (from backend/):
+        python -m benchmarks.bench_login_storm --logins 64 --users 16
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = "storm-password"
+
+async def seed_users(count: int) -> list:
+    from app import database
+    from app.models.user import User
+    from app.services.user import hash_password
+
+    hashed = hash_password(PASSWORD)  # Same password for everyone; one hash is enough
+    usernames = [f"storm{n:04d}" for n in range(count)]
+    for username in usernames:
+        await database.insert(User(username=username, name="Storm", email=f"{username}@example.com", password=hashed, role="user"))
+    return usernames
+
+def build_app(inline: bool):
+    from fastapi import FastAPI, HTTPException
+    from app.routers.user_router import router as user_router
+
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "ok"}
+
+    if inline:
+        from app import database
+        from app.models.user import User
+        from app.schemas.user import UserLogin
+        from app.services.user import verify_password
+
+        @app.post("/users/login")
+        async def login_user_endpoint(user_input: UserLogin):
+            user = await database.find_one(User, {"username": user_input.username})
+            if not user or not verify_password(user_input.password, user.password):
+                raise HTTPException(status_code=401, detail="Invalid password")
+            return {"username": user.username}
+    else:
+        app.include_router(user_router)
+    return app
+
+async def storm(app, usernames: list, logins: int) -> dict:
+    import httpx
+
+    lags, health = [], []
+    statuses = {}
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+
+        async def probe():
+            # Expected to wake every 10 ms; anything later is time the loop was blocked
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - started - 0.01)
+                started = time.perf_counter()
+                await client.get("/health")
+                health.append(time.perf_counter() - started)
+
+        async def login(n: int):
+            response = await client.post("/users/login", json={"username": usernames[n % len(usernames)], "password": PASSWORD})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(n) for n in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "logins_per_s": logins / elapsed,
+        "lag_p50": statistics.median(lags),
+        "lag_max": max(lags),
+        "health_p95": sorted(health)[int(len(health) * 0.95)] if health else float("nan"),
+        "statuses": statuses,
+    }
+
+async def main(args):
+    from mongomock_motor import AsyncMongoMockClient
+    from app.database import init_db
+    from app.services import password_hasher
+
+    await init_db(AsyncMongoMockClient())
+    usernames = await seed_users(args.users)
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["inline"] = await storm(build_app(inline=True), usernames, args.logins)
+        await password_hasher.init_password_pool()
+        try:
+            results["pool"] = await storm(build_app(inline=False), usernames, args.logins)
+        finally:
+            await password_hasher.close_password_pool()
+
+    print(f"{args.logins} concurrent logins, {password_hasher.PASSWORD_HASH_WORKERS} pool workers, "
+          f"queue limit {password_hasher.PASSWORD_HASH_MAX_QUEUE}")
+    print(f"{'path':<9}{'logins/s':>10}{'lag p50 ms':>12}{'lag max ms':>12}{'/health p95 ms':>16}  statuses")
+    for name, row in results.items():
+        print(f"{name:<9}{row['logins_per_s']:>10.1f}{row['lag_p50'] * 1000:>12.1f}{row['lag_max'] * 1000:>12.1f}"
+              f"{row['health_p95'] * 1000:>16.1f}  {row['statuses']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark logins and event-loop lag during a login storm")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--users", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Overhead of the Prometheus instrumentation.
+
+    Calls a tiny FastAPI app directly over ASGI (no sockets, so the middleware
+    cost is not hidden by network time), with and without PrometheusMiddleware,
+    and times the LLM observe helpers on their own.
+
+    Usage (from backend/):
+        python -m benchmarks.bench_metrics_overhead --requests 20000
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+
+from app.middleware.metrics import setup_metrics
+from app.services.metrics import observe_llm_call, observe_llm_ttft
+
+def create_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"item_id": item_id}
+
+    if instrumented:
+        setup_metrics(app)
+    return app
+
+async def call(app, path: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+async def per_request(app, requests: int) -> float:
+    for n in range(200):  # Warm-up
+        await call(app, f"/items/{n}")
+    started = time.perf_counter()
+    for n in range(requests):
+        await call(app, f"/items/{n}")
+    return (time.perf_counter() - started) / requests
+
+def per_observe(calls: int) -> float:
+    usage = {"prompt_tokens": 120, "completion_tokens": 300}
+    started = time.perf_counter()
+    for _ in range(calls):
+        observe_llm_ttft("groq", "bench-model", 0.2)
+        observe_llm_call("groq", "bench-model", "stream", 1.5, "ok", usage)
+    return (time.perf_counter() - started) / calls
+
+async def main(args):
+    plain, instrumented = [], []
+    for _ in range(args.rounds):
+        plain.append(await per_request(create_app(False), args.requests))
+        instrumented.append(await per_request(create_app(True), args.requests))
+    base, metered = statistics.median(plain), statistics.median(instrumented)
+
+    print(f"{args.requests} requests x {args.rounds} rounds, median per request")
+    print(f"{'without middleware':<28}{base * 1e6:>9.1f} us")
+    print(f"{'with middleware':<28}{metered * 1e6:>9.1f} us")
+    print(f"{'overhead':<28}{(metered - base) * 1e6:>9.1f} us ({(metered - base) / base:.1%})")
+    print(f"{'LLM ttft + call observe':<28}{per_observe(args.requests) * 1e6:>9.1f} us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cost of the metrics middleware and LLM observers")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Roster import: onboarding a whole unit at once.
+
+    Registers `--users` students against an in-memory MongoDB (mongomock-motor):
+        - register  one POST /users/register per student, `--concurrency` at a time
+        - import    one POST /users/import with the roster as CSV
+    Both use the password_hasher process pool, so the difference is the
+    per-request work: two uniqueness queries and one insert per student vs.
+    one $in query and one insert_many per batch, and hashes chunked across
+    every worker.
+
+    bcrypt dominates both; throughput scales with PASSWORD_HASH_WORKERS up to
+    the number of CPUs.
+
+    Usage (from backend/):
+        python -m benchmarks.bench_roster_import --users 1000
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = "roster-password"
+
+def build_app():
+    from fastapi import FastAPI
+    from app.routers.user_router import router as user_router
+
+    app = FastAPI()
+    app.include_router(user_router)
+    return app
+
+def roster_csv(prefix: str, count: int) -> bytes:
+    lines = ["username,name,email,password"]
+    lines += [f"{prefix}{n:05d},Student {n},{prefix}{n}@example.com,{PASSWORD}" for n in range(count)]
+    return ("\n".join(lines) + "\n").encode()
+
+async def register_each(client, prefix: str, count: int, concurrency: int) -> dict:
+    statuses = {}
+    queue = list(range(count))
+
+    async def worker():
+        while queue:
+            n = queue.pop()
+            response = await client.post("/users/register", json={
+                "username": f"{prefix}{n:05d}", "name": f"Student {n}", "email": f"{prefix}{n}@example.com", "password": PASSWORD,
+            })
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses
+
+async def import_roster(client, headers: dict, prefix: str, count: int) -> dict:
+    response = await client.post("/users/import", files={"roster": ("roster.csv", roster_csv(prefix, count), "text/csv")}, headers=headers)
+    response.raise_for_status()
+    return response.json()["counts"]
+
+async def main(args):
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient
+    from app import database
+    from app.models.user import User
+    from app.auth.jwt_handler import create_access_token
+    from app.schemas.user import UserRead
+    from app.indexes import sync_indexes
+    from app.services import password_hasher
+
+    await database.init_db(AsyncMongoMockClient())
+    token = create_access_token(UserRead(username="bench-teacher", email="teacher@example.com", role="teacher"))["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        await sync_indexes()
+        await password_hasher.init_password_pool()
+        try:
+            transport = httpx.ASGITransport(app=build_app())
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=3600) as client:
+                if not args.skip_register:
+                    started = time.perf_counter()
+                    statuses = await register_each(client, "reg", args.users, args.concurrency)
+                    results["register"] = (time.perf_counter() - started, statuses)
+                started = time.perf_counter()
+                counts = await import_roster(client, headers, "imp", args.users)
+                results["import"] = (time.perf_counter() - started, counts)
+        finally:
+            await password_hasher.close_password_pool()
+    users = await database.collection(User).count_documents({})
+
+    print(f"{args.users} students, {password_hasher.PASSWORD_HASH_WORKERS} pool workers, {users} users stored")
+    print(f"{'path':<10}{'seconds':>10}{'users/s':>10}  result")
+    for name, (elapsed, outcome) in results.items():
+        print(f"{name:<10}{elapsed:>10.2f}{args.users / elapsed:>10.1f}  {outcome}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark onboarding a roster: per-user registration vs. bulk import")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent /users/register requests")
+    parser.add_argument("--skip-register", action="store_true", help="Only time the bulk import")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Upload memory: peak RSS and throughput for concurrent large uploads.
+
+    Each path runs in its own uvicorn server process (an in-memory MongoDB,
+    auth bypassed) and receives `--concurrency` simultaneous POST
+    /files/upload requests of a `--size-mb` file, `--rounds` times:
+        - buffered    the old handler: `await file.read()` of the whole upload,
+                      then a blocking `open().write()` on the event loop
+        - streamed    app.services.blob_storage: fixed-size chunks, async
+                      file I/O, SHA-256 computed on the way
+    Peak RSS is the server's VmHWM from /proc (Linux only), against its RSS
+    once it is up. Starlette spools the multipart body to a temporary file
+    either way, so the difference is what the handler holds.
+
+    Usage (from backend/):
+        python -m benchmarks.bench_upload_memory --size-mb 200 --concurrency 4
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ------------------------ Server (child process) ------------------------>
+
+def serve(mode: str, port: int, upload_dir: str) -> None:
+    import uvicorn
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI, UploadFile
+    from mongomock_motor import AsyncMongoMockClient
+
+    os.environ["upload_folder"] = "file://" + upload_dir
+    from app.database import init_db
+    from app.auth.jwt_handler import get_current_token
+    from app.routers.file_router import router as file_router
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await init_db(AsyncMongoMockClient())
+        yield
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "ok"}
+
+    if mode == "buffered":
+        @app.post("/files/upload", status_code=201)
+        async def create_file_uploaded_endpoint(file_uploaded_in: UploadFile, username: str):
+            data = await file_uploaded_in.read()
+            with open(os.path.join(upload_dir, file_uploaded_in.filename), "wb") as f:
+                f.write(data)
+            return {"message": "File uploaded successfully"}
+    else:
+        app.include_router(file_router)
+        app.dependency_overrides[get_current_token] = lambda: {"token": "bench", "data": None}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+# ------------------------ Driver ------------------------>
+
+def memory_kb(pid: int) -> dict:
+    with open(f"/proc/{pid}/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return {"rss": int(fields["VmRSS"].split()[0]), "peak": int(fields["VmHWM"].split()[0])}
+
+async def run_mode(mode: str, args, payload: str) -> dict:
+    import httpx
+
+    upload_dir = tempfile.mkdtemp(prefix=f"lazyai-upload-{mode}-")
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_upload_memory", "--serve", mode,
+                               "--port", str(args.port), "--upload-dir", upload_dir],
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=600) as client:
+            for _ in range(200):
+                try:
+                    await client.get("/health")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            baseline = memory_kb(server.pid)["rss"]
+
+            async def upload(n: int):
+                with open(payload, "rb") as f:
+                    response = await client.post("/files/upload", params={"username": "bench"},
+                                                 files={"file_uploaded_in": (f"lecture-{n}.pdf", f, "application/pdf")})
+                response.raise_for_status()
+
+            started = time.perf_counter()
+            for round_ in range(args.rounds):
+                await asyncio.gather(*(upload(round_ * args.concurrency + i) for i in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+        memory = memory_kb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(upload_dir)
+
+    total_mb = args.size_mb * args.concurrency * args.rounds
+    return {"baseline_mb": baseline / 1024, "peak_mb": memory["peak"] / 1024, "mb_per_s": total_mb / elapsed}
+
+async def main(args):
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        block = os.urandom(1024 * 1024)
+        for _ in range(args.size_mb):
+            f.write(block)
+        payload = f.name
+    try:
+        results = {mode: await run_mode(mode, args, payload) for mode in ("buffered", "streamed")}
+    finally:
+        os.remove(payload)
+
+    print(f"{args.concurrency} concurrent uploads of {args.size_mb} MB, {args.rounds} rounds")
+    print(f"{'path':<10}{'base MB':>9}{'peak MB':>9}{'growth MB':>11}{'MB/s':>8}")
+    for mode, row in results.items():
+        print(f"{mode:<10}{row['baseline_mb']:>9.0f}{row['peak_mb']:>9.0f}{row['peak_mb'] - row['baseline_mb']:>11.0f}{row['mb_per_s']:>8.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark server memory and throughput for concurrent large uploads")
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--serve", choices=["buffered", "streamed"], help=argparse.SUPPRESS)
+    parser.add_argument("--upload-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.port, args.upload_dir)
+    else:
+        asyncio.run(main(args))
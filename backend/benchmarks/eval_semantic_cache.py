@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+# ------------------------------------------------------------->
+
+'''
+    Offline evaluation of the semantic hint cache.
+
+    Replays a recorded question set (JSONL with `unit_name`, `question` and an
+    `intent` label grouping paraphrases) through a fresh SemanticCache for each
+    threshold and reports:
+        - hit rate      share of questions served from the cache
+        - false hits    hits whose cached question had a different intent
+        - precision     correct hits / all hits
+        - recall        correct hits / repeats that could have been served
+
+    Embeddings are computed once with the same local model the service uses,
+    so Ollama must be running with SEMANTIC_CACHE_EMBED_MODEL pulled.
+
+    Usage (from backend/):
+        python -m benchmarks.eval_semantic_cache --questions benchmarks/data/recorded_questions.jsonl
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.semantic_cache import SemanticCache, _get_embedder, _normalize
+
+DEFAULT_QUESTIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recorded_questions.jsonl")
+
+def load_questions(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def embed_all(questions: list) -> np.ndarray:
+    vectors = _get_embedder().embed_documents([row["question"] for row in questions])
+    return np.stack([_normalize(vector) for vector in vectors])
+
+def replay(questions: list, vectors: np.ndarray, threshold: float, max_entries_per_unit: int) -> dict:
+    cache = SemanticCache(threshold=threshold, max_entries_per_unit=max_entries_per_unit)
+    seen = set()
+    hits = false_hits = repeats = 0
+    for row, vector in zip(questions, vectors):
+        scope = (row["unit_name"], "eval")
+        intent_key = (row["unit_name"], row["intent"])
+        if intent_key in seen:
+            repeats += 1
+        cached = cache.lookup(scope, vector)
+        if cached is None:
+            cache.insert(scope, vector, row["intent"])
+        else:
+            hits += 1
+            if cached != row["intent"]:
+                false_hits += 1
+        seen.add(intent_key)
+    correct = hits - false_hits
+    return {
+        "threshold": threshold,
+        "hit_rate": hits / len(questions),
+        "false_hits": false_hits,
+        "precision": correct / hits if hits else 1.0,
+        "recall": correct / repeats if repeats else 0.0,
+    }
+
+def main(args):
+    questions = load_questions(args.questions)
+    vectors = embed_all(questions)
+    thresholds = np.round(np.arange(args.min, args.max + 1e-9, args.step), 3)
+
+    print(f"{len(questions)} questions, embedding dim {vectors.shape[1]}")
+    print(f"{'threshold':>10}{'hit rate':>10}{'false':>7}{'precision':>11}{'recall':>8}")
+    for threshold in thresholds:
+        row = replay(questions, vectors, float(threshold), args.max_entries)
+        print(f"{row['threshold']:>10.3f}{row['hit_rate']:>10.1%}{row['false_hits']:>7}"
+              f"{row['precision']:>11.1%}{row['recall']:>8.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hit-rate vs threshold for the semantic hint cache")
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS, help="Recorded question set (JSONL)")
+    parser.add_argument("--min", type=float, default=0.70)
+    parser.add_argument("--max", type=float, default=0.98)
+    parser.add_argument("--step", type=float, default=0.02)
+    parser.add_argument("--max-entries", type=int, default=1024, help="Rows per unit, as in production")
+    main(parser.parse_args())
@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Load test for the whole API.
+
+    Starts `app.main:app` under uvicorn with:
+        - an in-memory MongoDB (mongomock-motor) instead of MONGODB_URI
+        - the stand-in Groq / Ollama server from `stand_in_llm`, with the
+          given latency, reached through GROQ_BASE_URL and OLLAMA_HOST
+        - uploads written to a temporary folder
+    then seeds student accounts and drives a weighted mix of
+    /users/login, /users/me, /files/upload, /chat/ask, /ask and /submit-quiz
+    at each concurrency level for a fixed duration.
+
+    Reports throughput, p50/p95/p99 and error rate per level and per
+    operation, and writes them to a JSON file tagged with the git commit so
+    runs can be compared across commits.
+
+    Usage (from backend/):
+        python -m benchmarks.load_test --levels 5 20 50 100 --duration 20 --latency 0.5
+        python -m benchmarks.load_test --mix login=1 me=5 chat=3 ask=3 --output run.json
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stand_in_llm import start_stand_in
+
+DEFAULT_MIX = {"login": 1, "me": 4, "upload": 1, "chat": 3, "ask": 3, "quiz": 2}
+PASSWORD = "load-test-password"
+UNITS = ["FIT1008", "FIT2004", "FIT3155"]
+# Questions asked over and over (cache and single-flight hits); the rest are unique
+POPULAR_QUESTIONS = [
+    "What is a linked list?",
+    "How does merge sort work?",
+    "Why is quicksort O(n log n) on average?",
+    "What is the difference between a stack and a queue?",
+]
+
+# ------------------------ Server ------------------------>
+
+def start_app(port: int):
+    """Serve app.main:app, backed by an in-memory MongoDB, on a background thread."""
+    import uvicorn
+    from mongomock_motor import AsyncMongoMockClient
+
+    import app.main
+    from app.database import init_db
+
+    # The lifespan looks init_db up at startup
+    app.main.init_db = lambda: init_db(AsyncMongoMockClient())
+
+    config = uvicorn.Config(app.main.app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+# ------------------------ Operations ------------------------>
+
+def _question(rng: random.Random, args, n: int) -> str:
+    if rng.random() < args.repeat_ratio:
+        return rng.choice(POPULAR_QUESTIONS)
+    return f"{rng.choice(POPULAR_QUESTIONS)} (variant {n})"
+
+async def op_login(client, user, rng, args, n):
+    return await client.post("/users/login", json={"username": user["username"], "password": PASSWORD})
+
+async def op_me(client, user, rng, args, n):
+    return await client.get("/users/me", headers=user["headers"])
+
+async def op_upload(client, user, rng, args, n):
+    name = f"notes-{user['username']}-{n}.txt"
+    content = os.urandom(args.upload_kb * 1024)
+    return await client.post(
+        "/files/upload",
+        params={"username": user["username"]},
+        files={"file_uploaded_in": (name, content, "text/plain")},
+        headers=user["headers"],
+    )
+
+async def op_chat(client, user, rng, args, n):
+    payload = {"message": _question(rng, args, n), "unit_name": rng.choice(UNITS)}
+    return await client.post("/chat/ask", json=payload)
+
+async def op_ask(client, user, rng, args, n):
+    payload = {"question": _question(rng, args, n), "unit_name": rng.choice(UNITS)}
+    return await client.post("/ask", json=payload)
+
+async def op_quiz(client, user, rng, args, n):
+    return await client.post("/submit-quiz", json={"answers": {"1": "A", "2": "X", "3": "2"}})
+
+OPERATIONS = {
+    "login": op_login,
+    "me": op_me,
+    "upload": op_upload,
+    "chat": op_chat,
+    "ask": op_ask,
+    "quiz": op_quiz,
+}
+
+# ------------------------ Driver ------------------------>
+
+async def seed_users(client, count: int) -> list:
+    users = []
+    for n in range(count):
+        username = f"loadtest{n:04d}"
+        await client.post("/users/register", json={
+            "username": username,
+            "name": "Load Test",
+            "email": f"{username}@example.com",
+            "password": PASSWORD,
+        })
+        response = await client.post("/users/login", json={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        users.append({"username": username, "headers": {"Authorization": f"Bearer {token}"}})
+    return users
+
+def summarize(samples: list, elapsed: float) -> dict:
+    """samples: (latency, ok, status) tuples."""
+    latencies = sorted(latency for latency, _, _ in samples)
+    errors = [status for _, ok, status in samples if not ok]
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q))] if latencies else None
+
+    statuses = {}
+    for status in errors:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(samples),
+        "throughput": len(samples) / elapsed if elapsed else 0.0,
+        "p50": statistics.median(latencies) if latencies else None,
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "error_rate": len(errors) / len(samples) if samples else 0.0,
+        "error_statuses": statuses,
+    }
+
+async def run_level(client, users: list, mix: dict, concurrency: int, args, seed: int) -> dict:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = {name: [] for name in names}
+    deadline = time.perf_counter() + args.duration
+    counter = 0
+
+    async def worker(worker_id: int):
+        nonlocal counter
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            counter += 1
+            started = time.perf_counter()
+            try:
+                response = await OPERATIONS[name](client, rng.choice(users), rng, args, f"{seed}-{counter}")
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            samples[name].append((time.perf_counter() - started, isinstance(status, int) and status < 400, status))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    every = [sample for rows in samples.values() for sample in rows]
+    return {
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        **summarize(every, elapsed),
+        "operations": {name: summarize(rows, elapsed) for name, rows in samples.items() if rows},
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+def parse_mix(items: list) -> dict:
+    if not items:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def print_report(results: dict) -> None:
+    print(f"commit {results['commit']}, stand-in latency {results['config']['latency']:.2f}s, "
+          f"{results['config']['duration']:g}s per level")
+    print(f"{'conc':>5} {'operation':<10}{'req':>7}{'req/s':>9}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'err %':>8}")
+    for level in results["levels"]:
+        rows = [("all", level)] + list(level["operations"].items())
+        for name, row in rows:
+            print(f"{level['concurrency']:>5} {name:<10}{row['requests']:>7}{row['throughput']:>9.1f}"
+                  f"{row['p50']:>9.3f}{row['p95']:>9.3f}{row['p99']:>9.3f}{row['error_rate'] * 100:>8.1f}")
+
+async def main(args):
+    import httpx
+
+    mix = parse_mix(args.mix)
+    upload_dir = tempfile.mkdtemp(prefix="lazyai-load-")
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{args.llm_port}"
+    os.environ.setdefault("API_KEY", "stand-in")
+    # The upload service strips a file:// scheme from the folder it writes to
+    os.environ["upload_folder"] = "file://" + upload_dir
+    os.environ.setdefault("LLM_PROVIDER_CONCURRENCY", json.dumps({"groq": 1024, "ollama": 1024}))
+
+    start_stand_in(port=args.llm_port, latency=args.latency, token_delay=args.token_delay)
+
+    # The chat service prints every prompt; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        start_app(args.app_port)
+
+    limits = httpx.Limits(max_connections=max(args.levels) * 2, max_keepalive_connections=max(args.levels) * 2)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.app_port}", timeout=args.timeout, limits=limits) as client:
+        users = await seed_users(client, args.users)
+        levels = []
+        for seed, concurrency in enumerate(args.levels):
+            with contextlib.redirect_stdout(io.StringIO()):
+                levels.append(await run_level(client, users, mix, concurrency, args, seed))
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {**vars(args), "mix": mix},
+        "levels": levels,
+    }
+    print_report(results)
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"load_test_{results['commit']}_{time.strftime('%Y%m%d-%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the API against stand-in MongoDB and LLM backends")
+    parser.add_argument("--levels", type=int, nargs="+", default=[5, 20, 50, 100], help="Concurrent clients per level")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per level")
+    parser.add_argument("--mix", nargs="*", help="Operation weights as name=weight (default: %s)"
+                        % " ".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()))
+    parser.add_argument("--latency", type=float, default=0.5, help="Stand-in LLM delay before the first token, in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Stand-in delay between streamed tokens")
+    parser.add_argument("--repeat-ratio", type=float, default=0.3, help="Share of questions drawn from a small popular set")
+    parser.add_argument("--users", type=int, default=20, help="Student accounts seeded before the run")
+    parser.add_argument("--upload-kb", type=int, default=64, help="Size of each uploaded file")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--llm-port", type=int, default=8765)
+    parser.add_argument("--app-port", type=int, default=8766)
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/load_test_<commit>_<time>.json)")
+    asyncio.run(main(parser.parse_args()))
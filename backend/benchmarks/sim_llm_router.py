@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+# ------------------------------------------------------------->
+
+'''
+    Routing simulation for the LLM router with stub providers.
+
+    Two providers serve the same route: a "primary" that is usually fast but
+    has a slow tail, and a steadier "backup". The same call sequence is replayed
+    with hedging off and on, and the p50/p95/p99 of each run is printed along
+    with how often the hedge fired and won.
+
+    Usage (from backend/):
+        python -m benchmarks.sim_llm_router --calls 400 --concurrency 20
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_providers import StubProvider, lognormal_latency
+from app.services.llm_router import LLMRouter
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+def tail_latency(median: float, slow: float, slow_share: float, rng: random.Random):
+    base = lognormal_latency(median, 0.3, rng)
+    return lambda: slow if rng.random() < slow_share else base()
+
+async def run(args, hedge: bool) -> dict:
+    rng = random.Random(args.seed)
+    providers = {
+        "primary": StubProvider("primary", latency=tail_latency(args.primary_median, args.slow, args.slow_share, rng), rng=rng),
+        "backup": StubProvider("backup", latency=lognormal_latency(args.backup_median, 0.2, rng), rng=rng),
+    }
+    router = LLMRouter(providers, {"chat": ["primary:stub", "backup:stub"]}, hedge=hedge,
+                       min_samples=20, hedge_default_delay=args.slow, hedge_min_delay=0.01)
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def call():
+        async with semaphore:
+            started = time.perf_counter()
+            await router.complete("chat", "simulated prompt")
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(call() for _ in range(args.calls)))
+    backup = router.stats()["targets"]["backup:stub"]
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "hedges": backup["hedges"],
+        "hedge_wins": backup["hedge_wins"],
+    }
+
+async def main(args):
+    print(f"{'hedging':<9}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'hedges':>8}{'wins':>6}")
+    for hedge in (False, True):
+        row = await run(args, hedge)
+        print(f"{'on' if hedge else 'off':<9}{row['p50']:>8.3f}{row['p95']:>8.3f}{row['p99']:>8.3f}"
+              f"{row['hedges']:>8}{row['hedge_wins']:>6}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate LLM routing and hedging with stub providers")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--primary-median", type=float, default=0.05)
+    parser.add_argument("--backup-median", type=float, default=0.08)
+    parser.add_argument("--slow", type=float, default=1.0, help="Latency of the primary's slow tail")
+    parser.add_argument("--slow-share", type=float, default=0.03, help="Share of primary calls in the slow tail")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# ------------------------------------------------------------->
+
+'''
+    Local stand-in for the Groq chat-completions API and the Ollama API.
+    It answers, after a configurable delay:
+        - POST /openai/v1/chat/completions  (Groq, plain and streamed)
+        - POST /api/generate                (Ollama, plain and streamed NDJSON)
+        - POST /api/embed                   (Ollama, deterministic unit vectors)
+    so benchmarks can point the real SDKs at it with GROQ_BASE_URL and
+    OLLAMA_HOST and measure our side of the call without network noise.
+'''
+
+# ------------------------------------------------------------->
+
+REPLY = "Think about how each node points at the next one and what happens at the tail."
+THINKING = "<think>The student needs a nudge, not the answer.</think>"
+EMBEDDING_SIZE = 384
+
+def _embedding(text: str) -> list:
+    # Same text, same vector; different texts are far apart
+    digest = hashlib.sha256(text.encode()).digest()
+    values = [(digest[i % len(digest)] ^ (i * 31 % 256)) / 255 - 0.5 for i in range(EMBEDDING_SIZE)]
+    norm = sum(v * v for v in values) ** 0.5
+    return [v / norm for v in values]
+
+def create_app(latency: float = 0.5, token_delay: float = 0.01) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stand-in")
+        created = int(time.time())
+        words = REPLY.split(" ")
+        usage = {"prompt_tokens": 32, "completion_tokens": len(words), "total_tokens": 32 + len(words)}
+
+        await asyncio.sleep(latency)
+
+        if not body.get("stream"):
+            return {
+                "id": "chatcmpl-stand-in",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": REPLY},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+
+        async def events():
+            for index, word in enumerate(words):
+                await asyncio.sleep(token_delay)
+                chunk = {
+                    "id": "chatcmpl-stand-in",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"content": word if index == 0 else " " + word},
+                        "finish_reason": None,
+                    }],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            last = {
+                "id": "chatcmpl-stand-in",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"id": "stand-in", "usage": usage},
+            }
+            yield f"data: {json.dumps(last)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        model = body.get("model", "stand-in")
+        words = (THINKING + " " + REPLY).split(" ")
+        done = {
+            "model": model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "response": "",
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": 32,
+            "eval_count": len(words),
+        }
+
+        await asyncio.sleep(latency)
+
+        if not body.get("stream", True):
+            return {**done, "response": " ".join(words)}
+
+        async def lines():
+            for index, word in enumerate(words):
+                await asyncio.sleep(token_delay)
+                yield json.dumps({**done, "response": word if index == 0 else " " + word, "done": False}) + "\n"
+            yield json.dumps(done) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        await asyncio.sleep(min(latency, 0.01))  # Embedding models are small and fast
+        return {"model": body.get("model", "stand-in"), "embeddings": [_embedding(text) for text in texts]}
+
+    return app
+
+def start_stand_in(port: int = 8765, latency: float = 0.5, token_delay: float = 0.01) -> uvicorn.Server:
+    """Serve the stand-in API on a background thread and wait until it accepts connections."""
+    config = uvicorn.Config(
+        create_app(latency, token_delay),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+        backlog=4096,
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the stand-in Groq API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency), host="127.0.0.1", port=args.port)
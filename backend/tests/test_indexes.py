@@ -0,0 +1,42 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# ------------------------------------------------------------->
+
+'''
+    Every query the services run must be served by an index.
+
+    Needs a MongoDB server (explain() plans can't be faked): set MONGODB_URI
+    to run it, otherwise the module is skipped. The declared indexes are
+    synced into that database first, as at startup; no documents are written.
+
+    Usage (from backend/):
+        MONGODB_URI=mongodb://localhost:27017/lazydb_test python -m pytest tests/test_indexes.py
+'''
+
+# ------------------------------------------------------------->
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytestmark = pytest.mark.skipif(not os.getenv("MONGODB_URI"), reason="MONGODB_URI is not set")
+
+from app import database
+from app.indexes import explain_query, service_queries, sync_indexes
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(database.init_db())
+    report = loop.run_until_complete(sync_indexes())
+    assert not [name for name, row in report.items() if "error" in row], report
+    yield loop
+    loop.run_until_complete(database.close_db())
+    loop.close()
+
+@pytest.mark.parametrize("description, model, query, sort", [pytest.param(*row, id=row[0]) for row in service_queries()])
+def test_query_uses_an_index(loop, description, model, query, sort):
+    stages = loop.run_until_complete(explain_query(model, query, sort))
+    assert "COLLSCAN" not in stages, f"{description}: {' > '.join(stages)}"